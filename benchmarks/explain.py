@@ -0,0 +1,56 @@
+﻿"""
+Benchmark do caminho padrão de `optimize` contra o modo explicação
+(explain=True), que coleta substituições, economia por etapa e entidades.
+
+Uso:
+    python -m benchmarks.explain [--size-kb 64]
+"""
+import argparse
+import timeit
+
+from src.config.settings import Config
+from src.services.optimization_service import OptimizationService
+
+SENTENCE = (
+    "Viajei de São Paulo para o Rio de Janeiro para apresentar o desenvolvimento da aplicação "
+    "em JavaScript e Python; a reunião custou R$ 1.500,00 e durou 3 horas. "
+)
+
+CONFIG = {
+    'abbreviation_level': 0.9,
+    'remove_accents': True,
+    'stop_word_removal': 0.3,
+    'word_compression': 0.8,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-kb', type=int, default=64)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    text = SENTENCE * (args.size_kb * 1024 // len(SENTENCE.encode('utf-8')))
+    size_kb = len(text.encode('utf-8')) / 1024
+    service = OptimizationService(Config())
+    plan = service.build_plan(CONFIG)
+    service.optimize(text[:1000], CONFIG, plan=plan)
+
+    rows = [
+        ('padrão', lambda: service.optimize(text, CONFIG, plan=plan)),
+        ('explain=True', lambda: service.optimize(text, CONFIG, plan=plan, explain=True)),
+        ('abreviações (padrão)', lambda: service.abbreviation_service.apply_abbreviations(
+            text, CONFIG['abbreviation_level'], collect=False)),
+        ('abreviações (coletando)', lambda: service.abbreviation_service.apply_abbreviations(
+            text, CONFIG['abbreviation_level'], collect=True)),
+    ]
+
+    print(f"Texto: {size_kb:.0f} KB, configuração: {CONFIG}")
+    print(f"{'caminho':<26}{'tempo':>10}")
+    for label, run in rows:
+        seconds = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print(f"{label:<26}{seconds * 1000:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+﻿"""
+Benchmark do caminho rápido de JSON: custo de ler/serializar payloads grandes
+com a stdlib e com orjson, e bytes economizados sem o eco de `original_text`.
+
+Uso:
+    python -m benchmarks.json_payload [--size-kb 1024]
+"""
+import argparse
+import json
+import timeit
+
+from src.utils import json_codec
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-kb', type=int, default=1024)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    sentence = "Este é um exemplo de texto em português que será otimizado para reduzir tokens. "
+    text = sentence * (args.size_kb * 1024 // len(sentence.encode('utf-8')))
+    optimized = text[: len(text) * 2 // 3]
+
+    request_body = json.dumps({'text': text, 'preset': 'moderate'}).encode('utf-8')
+    response = {
+        'original_text': text,
+        'optimized_text': optimized,
+        'stats': {'original_length': len(text), 'optimized_length': len(optimized)},
+        'config_used': {'word_compression': 0.75},
+    }
+    lean_response = {k: v for k, v in response.items() if k != 'original_text'}
+
+    def per_call_ms(statement):
+        return min(timeit.repeat(statement, number=1, repeat=args.repeat)) * 1000
+
+    print(f"Texto: {len(text.encode('utf-8')) / 1024:.0f} KB")
+    print(f"{'operação':<34}{'stdlib':>10}{'orjson':>10}")
+    if json_codec.FAST_JSON_AVAILABLE:
+        import orjson
+        rows = [
+            ('parse do corpo da requisição', lambda: json.loads(request_body), lambda: orjson.loads(request_body)),
+            ('serialização da resposta', lambda: json.dumps(response), lambda: orjson.dumps(response)),
+            ('serialização sem original_text', lambda: json.dumps(lean_response), lambda: orjson.dumps(lean_response)),
+        ]
+        for label, stdlib, fast in rows:
+            print(f"{label:<34}{per_call_ms(stdlib):>8.2f}ms{per_call_ms(fast):>8.2f}ms")
+    else:
+        print("orjson não instalado; apenas a stdlib está disponível.")
+
+    full_bytes = len(json_codec.dumps(response))
+    lean_bytes = len(json_codec.dumps(lean_response))
+    print(f"Resposta com original_text: {full_bytes / 1024:.0f} KB; sem: {lean_bytes / 1024:.0f} KB "
+          f"({(1 - lean_bytes / full_bytes) * 100:.0f}% menor)")
+
+
+if __name__ == '__main__':
+    main()
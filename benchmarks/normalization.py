@@ -0,0 +1,61 @@
+﻿"""
+Benchmark da normalização: as etapas separadas anteriores (espaços duas vezes,
+pontuação redundante, NFD para acentos e regex de pontuação) contra o
+TextNormalizer fundido.
+
+Uso:
+    python -m benchmarks.normalization [--size-kb 1024]
+"""
+import argparse
+import re
+import timeit
+import unicodedata
+
+from src.config.settings import Config
+from src.services.optimization.normalization import TextNormalizer, collapse_whitespace
+
+SENTENCE = (
+    "Ação rápida:  o relatório   de análises está pronto!!  Verifique as informações, "
+    "por favor...\n\nA reunião será às 14h em São Paulo; não se atrase. "
+)
+
+
+def previous(text, removable_chars):
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = re.sub(r'([.!?,\-;:"])\1+', r'\1', text)
+    text = re.sub(r'[.,;:]+\s*$', '', text)
+    normalized_text = unicodedata.normalize('NFD', text)
+    text = "".join(c for c in normalized_text if unicodedata.category(c) != 'Mn')
+    text = re.sub(f'[{re.escape("".join(removable_chars))}]', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def fused(text, normalizer):
+    text = normalizer.normalize_spacing(text)
+    text = normalizer.fold(text, remove_accents=True, remove_punctuation=True)
+    return collapse_whitespace(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-kb', type=int, default=1024)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    text = SENTENCE * (args.size_kb * 1024 // len(SENTENCE.encode('utf-8')))
+    size_mb = len(text.encode('utf-8')) / 1024 / 1024
+    normalizer = TextNormalizer(Config.REMOVABLE_CHARS)
+    assert fused(text, normalizer) == previous(text, Config.REMOVABLE_CHARS)
+
+    print(f"Texto: {size_mb:.2f} MB, remove_accents + remove_punctuation")
+    print(f"{'implementação':<16}{'tempo':>10}{'vazão':>12}")
+    for label, run in (
+        ('anterior', lambda: previous(text, Config.REMOVABLE_CHARS)),
+        ('fundida', lambda: fused(text, normalizer)),
+    ):
+        seconds = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print(f"{label:<16}{seconds * 1000:>8.1f}ms{size_mb / seconds:>8.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
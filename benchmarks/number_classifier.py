@@ -0,0 +1,97 @@
+﻿"""
+Benchmark do classificador de números importantes: a implementação anterior
+(conjunto de unidades recriado a cada chamada e até nove regex por token)
+contra o NumberPreservationService atual, sobre um corpus de tokens.
+
+Uso:
+    python -m benchmarks.number_classifier [--tokens 100000]
+"""
+import argparse
+import random
+import re
+import string
+import timeit
+
+from src.data.numbers import IMPORTANT_NUMBER_PATTERNS, CONTEXT_KEYWORDS, NumberPreservationService
+
+SENTENCE = (
+    "O relatório da versão 2.1 mostra que 30 clientes pagaram R$ 1.500,00 em 12 meses; "
+    "a entrega de 5 kg levou 3 h e o servidor usa 16 GB de memória, cerca de 25% do total."
+)
+
+
+class PreviousClassifier:
+
+    def __init__(self):
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in IMPORTANT_NUMBER_PATTERNS]
+        self.context_keywords = CONTEXT_KEYWORDS
+
+    def is_important_number(self, text, position=0, context_window=50):
+        text_clean = text.strip()
+        if re.search(r'\d', text_clean):
+            return True, "contains_digits"
+        measurement_units = {
+            'kg', 'g', 'mg', 'ton', 't', 'km', 'm', 'cm', 'mm', 'l', 'ml', 'cl',
+            'h', 'min', 's', 'ms', 'º', '°', 'c', 'mb', 'gb', 'tb', 'kb',
+            'hz', 'khz', 'mhz', 'ghz', 'v', 'w', 'kw', 'mw', 'a', 'ma', 'ka',
+            'r$', 'usd', 'eur', '$', '%', 'pct', 'x', '×',
+        }
+        text_lower = text_clean.lower().strip('.,!?()[]{}')
+        if text_lower in measurement_units:
+            return True, 'measurement_unit'
+        for pattern in self.patterns:
+            if pattern.search(text_clean):
+                return True, "matched_pattern"
+        if position > 0:
+            start = max(0, position - context_window)
+            end = min(len(text), position + context_window)
+            context = text[start:end].lower()
+            for category, keywords in self.context_keywords.items():
+                if any(keyword in context for keyword in keywords):
+                    return True, f"context_{category}"
+        return False, "no_importance_indicators"
+
+
+def classify_all(classifier, tokens):
+    is_important_number = classifier.is_important_number
+    return [is_important_number(token) for token in tokens]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=100_000)
+    parser.add_argument('--vocabulary', type=int, default=5000, help='Palavras sem dígitos geradas')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = [
+        ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        for _ in range(args.vocabulary)
+    ]
+    words = SENTENCE.split()
+    # Metade do corpus vem das frases com números e metade do vocabulário.
+    tokens = [
+        words[i % len(words)] if i % 2 else vocabulary[rng.randrange(len(vocabulary))]
+        for i in range(args.tokens)
+    ]
+
+    previous = PreviousClassifier()
+    assert classify_all(previous, tokens) == classify_all(NumberPreservationService(), tokens)
+
+    rows = [
+        ('anterior', lambda: classify_all(previous, tokens)),
+        # Instância nova a cada execução: inclui o aquecimento do cache.
+        ('atual (cache frio)', lambda: classify_all(NumberPreservationService(), tokens)),
+        ('atual (cache quente)', lambda service=NumberPreservationService(): classify_all(service, tokens)),
+    ]
+
+    print(f"Corpus: {len(tokens)} tokens ({len(set(tokens))} distintos)")
+    print(f"{'implementação':<24}{'tempo':>10}{'tokens/s':>14}")
+    for label, run in rows:
+        seconds = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print(f"{label:<24}{seconds * 1000:>8.1f}ms{len(tokens) / seconds:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+﻿"""
+Benchmark de inicialização: mede, em processos novos, o custo de importar o
+serviço de otimização e de processar a primeira requisição de cada preset.
+
+Uso:
+    python -m benchmarks.startup [--runs 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+_PROBE = '''
+import json, sys, time
+t0 = time.perf_counter()
+from src.config.settings import Config
+from src.services.optimization_service import OptimizationService
+from src.utils.presets import get_presets_dict
+t1 = time.perf_counter()
+service = OptimizationService(Config())
+preset = sys.argv[1]
+config = get_presets_dict()[preset]['config'] if preset != 'none' else None
+if config is not None:
+    config = dict(config, translate_to_english=False)
+    service.optimize("Texto de exemplo para medir a inicialização.", config)
+t2 = time.perf_counter()
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000,
+    'first_request_ms': (t2 - t1) * 1000,
+    'data_modules': sorted(m for m in sys.modules if m.startswith('src.data.')),
+    'requests_loaded': 'requests' in sys.modules,
+}))
+'''
+
+
+def measure(preset: str, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _PROBE, preset],
+            capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output))
+
+    return {
+        'preset': preset,
+        'import_ms': statistics.median(s['import_ms'] for s in samples),
+        'first_request_ms': statistics.median(s['first_request_ms'] for s in samples),
+        'data_modules': samples[-1]['data_modules'],
+        'requests_loaded': samples[-1]['requests_loaded'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    from src.utils.presets import PRESETS
+
+    print(f"{'preset':<20}{'import (ms)':>12}{'1ª req (ms)':>13}  dicionários carregados")
+    for preset in ['none', *PRESETS]:
+        result = measure(preset, args.runs)
+        modules = ', '.join(m.rsplit('.', 1)[-1] for m in result['data_modules']) or '-'
+        print(f"{preset:<20}{result['import_ms']:>12.1f}{result['first_request_ms']:>13.1f}  {modules}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+﻿"""
+Benchmark da remoção de stop words: implementação anterior (lower + strip +
+lista de índices + set) contra o StopWordFilter, com a lista padrão e com uma
+lista externa grande.
+
+Uso:
+    python -m benchmarks.stop_words [--size-kb 1024] [--extra-words 5000]
+"""
+import argparse
+import string
+import timeit
+
+from src.config.settings import Config
+from src.services.optimization.stop_words import StopWordFilter
+
+SENTENCE = (
+    "Este é um exemplo de texto em português que será otimizado para reduzir tokens, "
+    "mas ainda assim a mensagem deve continuar clara para quem lê. "
+)
+
+
+def remove_stop_words_previous(text, stop_words_set, removal_ratio):
+    words = text.split()
+    stop_word_indices = [
+        i for i, word in enumerate(words)
+        if word.lower().strip(string.punctuation) in stop_words_set
+    ]
+    num_to_remove = int(len(stop_word_indices) * removal_ratio)
+    indices_to_remove = set(stop_word_indices[:num_to_remove])
+    return ' '.join(word for i, word in enumerate(words) if i not in indices_to_remove)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-kb', type=int, default=1024)
+    parser.add_argument('--extra-words', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    text = SENTENCE * (args.size_kb * 1024 // len(SENTENCE.encode('utf-8')))
+    size_mb = len(text.encode('utf-8')) / 1024 / 1024
+    base_words = Config.STOP_WORDS['pt']
+    extra_words = [f'palavra{i}' for i in range(args.extra_words)]
+
+    rows = [
+        ('anterior', lambda: remove_stop_words_previous(text, base_words, 0.5)),
+        ('StopWordFilter', lambda f=StopWordFilter(base_words): f.remove(text, 0.5)),
+        (f'StopWordFilter (+{args.extra_words})',
+         lambda f=StopWordFilter(list(base_words) + extra_words): f.remove(text, 0.5)),
+    ]
+
+    print(f"Texto: {size_mb:.2f} MB, stop_word_removal=0.5")
+    print(f"{'implementação':<28}{'tempo':>10}{'vazão':>12}")
+    for label, run in rows:
+        seconds = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print(f"{label:<28}{seconds * 1000:>8.1f}ms{size_mb / seconds:>8.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+﻿"""
+Benchmark de memória do modo streaming: pico de alocações (tracemalloc) de
+`optimize` no texto inteiro contra `optimize_stream` lendo o arquivo em pedaços.
+
+Uso:
+    python -m benchmarks.streaming_memory [--size-mb 2] [--window-kb 64]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from src.config.settings import Config
+from src.services.optimization_service import OptimizationService
+
+PARAGRAPHS = (
+    "Este é um exemplo de relatório sobre São Paulo que custa R$ 20 e rende 15% ao ano.",
+    "A inteligência artificial ajuda o desenvolvimento de software em Minas Gerais, "
+    "segundo a equipe de tecnologia.",
+    "Contato: suporte@exemplo.com ou https://exemplo.com/docs até 10/05/2024.",
+)
+
+CONFIG = {'stop_word_removal': 0.5, 'remove_accents': True, 'abbreviation_level': 0.5}
+
+
+def write_sample(path, size_mb):
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, 'w', encoding='utf-8') as output:
+        while written < target:
+            for paragraph in PARAGRAPHS:
+                written += output.write(paragraph + '\n\n')
+
+
+def read_chunks(path, chunk_size=64 * 1024):
+    with open(path, encoding='utf-8') as source:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def measure(run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    output_length = run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return output_length, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=2)
+    parser.add_argument('--window-kb', type=int, default=64)
+    args = parser.parse_args()
+
+    service = OptimizationService(Config())
+    service.preload(CONFIG)
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, 'input.txt')
+        output_path = os.path.join(directory, 'output.txt')
+        write_sample(source_path, args.size_mb)
+
+        def full():
+            with open(source_path, encoding='utf-8') as source:
+                text = source.read()
+            result = service.optimize(text, CONFIG)
+            with open(output_path, 'w', encoding='utf-8') as output:
+                return output.write(result.optimized_text)
+
+        def streamed():
+            written = 0
+            with open(output_path, 'w', encoding='utf-8') as output:
+                for piece in service.optimize_stream(
+                    read_chunks(source_path), CONFIG, window_size=args.window_kb * 1024
+                ):
+                    written += output.write(piece)
+            return written
+
+        print(f"Entrada: {args.size_mb} MB, janela: {args.window_kb} KB")
+        print(f"{'modo':<12}{'pico':>12}{'tempo':>10}{'saída':>12}")
+        for label, run in (('optimize', full), ('stream', streamed)):
+            output_length, elapsed, peak = measure(run)
+            print(f"{label:<12}{peak / 1024 / 1024:>9.1f} MB{elapsed:>9.2f}s{output_length:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,16 +2,39 @@
 Aplicação Flask com documentação automática Swagger/OpenAPI.
 Implementa as melhores práticas para APIs REST com documentação.
 """
-from flask import Flask
+import math
+import threading
+from dataclasses import asdict
+from functools import partial
+
+from flask import Flask, g, make_response, request
 from flask_restx import Api, Resource, fields, Namespace
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 from src.config.settings import Config
+from src.services.admission import InFlightBudget, build_rate_limiter
+from src.services.message_service import HISTORY_ROLE, MessageOptimizer
 from src.services.optimization_service import OptimizationService
-from src.utils.validators import validate_request_data
+from src.services.optimization import DEFAULT_TENANT
+from src.services.preset_store import PresetStore
+from src.services.template_store import TemplateStore
+from src.utils import json_codec
+from src.utils.compression import compress_response, content_etag
+from src.utils.deadline import Deadline, parse_deadline_ms
+from src.utils.validators import (
+    parse_bool,
+    parse_config_params,
+    validate_config_options,
+    validate_request_data
+)
 from src.utils.presets import get_presets_dict
 
 
+# Campos de controle da requisição que não fazem parte da configuração.
+REQUEST_ONLY_FIELDS = ('text', 'preset', 'preset_id', 'return_original', 'explain', 'deadline_ms')
+MESSAGES_ONLY_FIELDS = ('messages', 'role_configs')
+
+
 def create_api_app(config_class=None):
     app = Flask(__name__)
     
@@ -20,6 +43,12 @@ def create_api_app(config_class=None):
     
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
     
+    config = config_class() if config_class else Config()
+    fast_json = config.FAST_JSON and json_codec.FAST_JSON_AVAILABLE
+    if fast_json:
+        app.json = json_codec.FastJSONProvider(app)
+    output_json = partial(json_codec.output_json, fast=fast_json)
+    
     api = Api(
         app,
         version='2.0.0',
@@ -58,8 +87,124 @@ def create_api_app(config_class=None):
         response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
         return response
     
-    config = Config()
-    optimizer = OptimizationService(config)
+    if config.COMPRESSION_MIN_SIZE > 0:
+        @app.after_request
+        def compress(response):
+            return compress_response(response, request.accept_encodings, config.COMPRESSION_MIN_SIZE)
+    
+    if fast_json:
+        api.representation('application/json')(output_json)
+    
+    # Só as rotas de otimização passam pela admissão; saúde, métricas e
+    # configuração respondem sempre.
+    admission_prefix = f'{api.prefix}/optimization/'
+    budget = InFlightBudget(config.ADMISSION_MAX_WEIGHT) if config.ADMISSION_MAX_WEIGHT > 0 else None
+    rate_limiter = build_rate_limiter(config)
+    
+    if budget is not None or rate_limiter is not None:
+        @app.before_request
+        def admit():
+            if not request.path.startswith(admission_prefix):
+                return None
+            
+            if rate_limiter is not None:
+                key = rate_limiter.client_key(request.headers.get('X-API-KEY'), request.remote_addr)
+                delay = rate_limiter.check(key)
+                if delay > 0:
+                    return (
+                        {'error': 'Limite de requisições do cliente excedido', 'code': 'RATE_LIMITED'},
+                        429,
+                        {'Retry-After': str(math.ceil(delay))}
+                    )
+            
+            if budget is not None:
+                weight = budget.weight(request.content_length or 0, config.ADMISSION_WEIGHT_BYTES)
+                if not budget.try_enter(weight):
+                    return (
+                        {'error': 'Servidor ocupado, tente novamente', 'code': 'OVERLOADED'},
+                        503,
+                        {'Retry-After': str(config.ADMISSION_RETRY_AFTER)}
+                    )
+                g.admission_weight = weight
+            return None
+        
+        @app.teardown_request
+        def release(exception):
+            weight = g.pop('admission_weight', None)
+            if weight is not None:
+                budget.leave(weight)
+    
+    optimizer = OptimizationService(config, prewarm_translations=True)
+    preset_store = PresetStore(
+        config.PRESET_DB_PATH,
+        optimizer.build_plan,
+        config.PRESET_STORE_REFRESH_INTERVAL
+    )
+    message_optimizer = MessageOptimizer(optimizer, config.MESSAGE_CACHE_SIZE)
+    template_store = TemplateStore(
+        config.PRESET_DB_PATH,
+        optimizer.build_plan,
+        config.PRESET_STORE_REFRESH_INTERVAL
+    )
+    builtin_plans = {
+        name: optimizer.build_plan(preset['config'])
+        for name, preset in get_presets_dict().items()
+    }
+    
+    if config.PRELOAD_PRESET:
+        preload_presets = get_presets_dict()
+        if config.PRELOAD_PRESET in preload_presets:
+            optimizer.preload(preload_presets[config.PRELOAD_PRESET]['config'])
+    
+    optimizer.custom_dictionaries.reload()
+    optimizer.custom_dictionaries.start_watching(config.CUSTOM_DICTIONARY_WATCH_INTERVAL)
+    
+    if config.TRANSLATION_WARMUP:
+        # As conexões com os provedores são abertas em segundo plano para não
+        # atrasar a subida do worker.
+        threading.Thread(target=optimizer.translation_service.warmup, daemon=True).start()
+    
+    # Os presets predefinidos não mudam durante a vida do processo: as ETags
+    # são calculadas uma vez e as rotas respondem 304 sem serializar nada.
+    presets_etag = content_etag(get_presets_dict())
+    preset_etags = {name: content_etag(preset) for name, preset in get_presets_dict().items()}
+    
+    def static_config_response(data, etag):
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = api.make_response(data, 200)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = f'public, max-age={config.PRESETS_CACHE_MAX_AGE}'
+        return response
+    
+    api_keys = dict(config.API_KEYS)
+    
+    @app.before_request
+    def identify_tenant():
+        key_tenant = api_keys.get(request.headers.get('X-API-KEY'))
+        tenant = key_tenant or DEFAULT_TENANT
+        header = request.headers.get('X-Tenant-ID')
+        if header and header != tenant:
+            if key_tenant is not None or not config.TRUST_TENANT_HEADER:
+                return {'error': 'Tenant não autorizado para esta chave', 'code': 'TENANT_FORBIDDEN'}, 403
+            tenant = header
+        g.tenant = tenant
+        g.tenant_identified = key_tenant is not None or tenant != DEFAULT_TENANT
+        return None
+    
+    def current_tenant():
+        return g.get('tenant', DEFAULT_TENANT)
+    
+    def tenant_write_denied():
+        # O tenant `default` é de todos os clientes anônimos: alterar os seus
+        # dicionários mudaria o resultado das requisições dos outros.
+        if g.get('tenant_identified') and current_tenant() != DEFAULT_TENANT:
+            return None
+        return {
+            'error': 'Alterar dicionários exige uma chave de API (X-API-KEY) de um tenant',
+            'code': 'TENANT_REQUIRED'
+        }, 401
     
     
     optimization_config = api.model('OptimizationConfig', {
@@ -68,6 +213,11 @@ def create_api_app(config_class=None):
             default=False,
             example=True
         ),
+        'translation_backend': fields.String(
+            description='Backend de tradução: remoto (MyMemory/LibreTranslate) ou glossário offline',
+            enum=['remote', 'glossary'],
+            example='glossary'
+        ),
         'language': fields.String(
             description='Idioma do texto original',
             default='pt',
@@ -118,6 +268,31 @@ def create_api_app(config_class=None):
             enum=['conservative', 'moderate', 'aggressive', 'translation_only'],
             example='moderate'
         ),
+        'preset_id': fields.String(
+            description='ID de um preset personalizado do tenant (ver /config/custom-presets)',
+            example='3f2b9c0e5d7a4f1e8b6c2a9d0e1f2a3b'
+        ),
+        'return_original': fields.Boolean(
+            description='Inclui o texto original na resposta (false reduz o tamanho da resposta)',
+            default=True,
+            example=False
+        ),
+        'custom_abbreviations': fields.Raw(
+            description='Abreviações extras só para esta requisição ({"termo": "abreviação"})',
+            example={'nota fiscal eletrônica': 'NF-e'}
+        ),
+        'explain': fields.Boolean(
+            description='Inclui na resposta a economia por etapa, as substituições e as entidades preservadas',
+            default=False,
+            example=False
+        ),
+        'deadline_ms': fields.Float(
+            description=(
+                'Prazo da requisição em milissegundos (ou header X-Request-Deadline-Ms); etapas caras '
+                'sem tempo são puladas e o resultado parcial é devolvido'
+            ),
+            example=500
+        ),
         **optimization_config
     })
     
@@ -142,7 +317,7 @@ def create_api_app(config_class=None):
     
     optimization_response = api.model('OptimizationResponse', {
         'original_text': fields.String(
-            description='Texto original fornecido',
+            description='Texto original fornecido (omitido com return_original=false)',
             example='Este é um exemplo de texto que será otimizado para reduzir tokens.'
         ),
         'optimized_text': fields.String(
@@ -156,6 +331,19 @@ def create_api_app(config_class=None):
         'config_used': fields.Nested(
             optimization_config,
             description='Configuração que foi aplicada'
+        ),
+        'explanation': fields.Raw(
+            description=(
+                'Só com explain=true: economia por etapa (stages), substituições com offsets '
+                'no texto original (edits) e entidades preservadas (entities)'
+            )
+        ),
+        'partial': fields.Boolean(
+            description='Só com prazo: indica que alguma etapa foi pulada por falta de tempo'
+        ),
+        'skipped_stages': fields.List(
+            fields.String,
+            description='Só com prazo: etapas puladas (entities, abbreviations, translation, ...)'
         )
     })
     
@@ -209,6 +397,12 @@ def create_api_app(config_class=None):
         path='/config'
     )
     
+    dictionaries_ns = Namespace(
+        'dictionaries',
+        description='Dicionários de abreviações personalizados do tenant da chave de API',
+        path='/dictionaries'
+    )
+    
     system_ns = Namespace(
         'system',
         description='Operações do sistema',
@@ -216,6 +410,59 @@ def create_api_app(config_class=None):
     )
     
     
+    def resolve_config(options, manual_config):
+        base_config, plan = {}, None
+        if 'preset_id' in options:
+            stored_preset = preset_store.get(current_tenant(), options['preset_id'])
+            if stored_preset is None:
+                return None, None, ({
+                    'error': f"Preset '{options['preset_id']}' não encontrado",
+                    'code': 'INVALID_PRESET'
+                }, 400)
+            base_config, plan = stored_preset.config, stored_preset.plan
+        elif 'preset' in options:
+            presets = get_presets_dict()
+            if options['preset'] not in presets:
+                return None, None, ({
+                    'error': f"Preset '{options['preset']}' não encontrado",
+                    'code': 'INVALID_PRESET'
+                }, 400)
+            base_config, plan = presets[options['preset']]['config'], builtin_plans[options['preset']]
+        
+        # Sem ajustes manuais o plano pré-compilado do preset é usado direto.
+        if manual_config:
+            return {**base_config, **manual_config}, None, None
+        # Cópia: a configuração do preset fica em cache e é compartilhada.
+        return dict(base_config), plan, None
+    
+    def build_optimize_response(result, return_original=True):
+        response = {}
+        if return_original:
+            response['original_text'] = result.original_text
+        response.update({
+            'optimized_text': result.optimized_text,
+            'stats': {
+                'original_length': result.stats.original_length,
+                'optimized_length': result.stats.optimized_length,
+                'compression_ratio_percent': result.stats.compression_ratio_percent,
+                'characters_saved': result.stats.characters_saved
+            },
+            'config_used': result.config_used
+        })
+        if result.explanation is not None:
+            response['explanation'] = asdict(result.explanation)
+        if result.skipped_stages is not None:
+            response['partial'] = result.partial
+            response['skipped_stages'] = result.skipped_stages
+        return response
+    
+    def request_deadline(value=None):
+        # O campo (ou parâmetro) tem precedência sobre o header.
+        if value is None:
+            value = request.headers.get('X-Request-Deadline-Ms')
+        budget_ms = parse_deadline_ms(value)
+        return Deadline.after_ms(budget_ms) if budget_ms is not None else None
+    
     @optimization_ns.route('/optimize')
     class OptimizeResource(Resource):
         @optimization_ns.doc('optimize_text')
@@ -232,53 +479,337 @@ def create_api_app(config_class=None):
                     return {'error': error_message, 'code': 'VALIDATION_ERROR'}, 400
                 
                 text = data['text']
+                deadline = request_deadline(data.get('deadline_ms'))
+                
+                manual_config = {k: v for k, v in data.items() if k not in REQUEST_ONLY_FIELDS}
+                error_message = validate_config_options(manual_config)
+                if error_message:
+                    return {'error': error_message, 'code': 'VALIDATION_ERROR'}, 400
                 
-                manual_config = {k: v for k, v in data.items() if k not in ['text', 'preset']}
+                config_options, plan, error = resolve_config(data, manual_config)
+                if error:
+                    return error
                 
-                if 'preset' in data:
-                    presets = get_presets_dict()
-                    if data['preset'] not in presets:
-                        return {
-                            'error': f"Preset '{data['preset']}' não encontrado",
-                            'code': 'INVALID_PRESET'
-                        }, 400
-                    
-                    config_options = presets[data['preset']]['config'].copy()
-                    config_options.update(manual_config) 
-                else:
-                    config_options = manual_config
+                result = optimizer.optimize(
+                    text, config_options, tenant=current_tenant(), plan=plan,
+                    explain=data.get('explain', False), deadline=deadline
+                )
                 
-                result = optimizer.optimize(text, config_options)
+                return build_optimize_response(result, data.get('return_original', True)), 200
                 
+            except ValueError as e:
+                return {'error': str(e), 'code': 'VALIDATION_ERROR'}, 400
+            except Exception as e:
                 return {
-                    'original_text': result.original_text,
-                    'optimized_text': result.optimized_text,
-                    'stats': {
-                        'original_length': result.stats.original_length,
-                        'optimized_length': result.stats.optimized_length,
-                        'compression_ratio_percent': result.stats.compression_ratio_percent,
-                        'characters_saved': result.stats.characters_saved
-                    },
-                    'config_used': result.config_used
-                }, 200
+                    'error': 'Erro interno no processamento',
+                    'code': 'INTERNAL_ERROR'
+                }, 500
+    
+    @optimization_ns.route('/optimize/raw')
+    class OptimizeRawResource(Resource):
+        @optimization_ns.doc(
+            'optimize_raw_text',
+            description=(
+                'Recebe o texto puro no corpo (text/plain). A configuração vem da query string '
+                '(ex.: ?preset=moderate&word_compression=0.7) e/ou do header X-Optimization-Config '
+                '(objeto JSON). Por padrão o texto original não é devolvido; com Accept: text/plain '
+                'a resposta é só o texto otimizado, com as estatísticas nos headers.'
+            ),
+            params={
+                'preset': 'Preset predefinido',
+                'preset_id': 'ID de preset personalizado do tenant',
+                'return_original': 'Inclui original_text na resposta JSON (padrão: false)',
+                'explain': 'Inclui a explicação (etapas, substituições e entidades) na resposta JSON',
+                'deadline_ms': 'Prazo em milissegundos (ou header X-Request-Deadline-Ms)'
+            }
+        )
+        @optimization_ns.response(200, 'Sucesso', optimization_response)
+        @optimization_ns.response(400, 'Erro de validação', error_response)
+        def post(self):
+            try:
+                text = request.get_data(as_text=True)
+                if not text:
+                    return {
+                        'error': 'O corpo da requisição deve conter o texto a ser otimizado.',
+                        'code': 'VALIDATION_ERROR'
+                    }, 400
+                
+                options = {}
+                header_config = request.headers.get('X-Optimization-Config')
+                if header_config:
+                    options = json_codec.loads(header_config, fast_json)
+                    if not isinstance(options, dict):
+                        raise ValueError('O header X-Optimization-Config deve ser um objeto JSON.')
+                options.update(parse_config_params(request.args))
+                for key in ('preset', 'preset_id'):
+                    if key in request.args:
+                        options[key] = request.args[key]
+                
+                manual_config = {k: v for k, v in options.items() if k not in REQUEST_ONLY_FIELDS}
+                error_message = validate_config_options(manual_config)
+                if error_message:
+                    return {'error': error_message, 'code': 'VALIDATION_ERROR'}, 400
+                
+                config_options, plan, error = resolve_config(options, manual_config)
+                if error:
+                    return error
+                
+                explain = parse_bool(request.args.get('explain', 'false'))
+                deadline = request_deadline(request.args.get('deadline_ms'))
+                result = optimizer.optimize(
+                    text, config_options, tenant=current_tenant(), plan=plan, explain=explain,
+                    deadline=deadline
+                )
                 
+                stats_headers = {
+                    'X-Original-Length': str(result.stats.original_length),
+                    'X-Optimized-Length': str(result.stats.optimized_length),
+                    'X-Characters-Saved': str(result.stats.characters_saved),
+                    'X-Compression-Ratio-Percent': str(result.stats.compression_ratio_percent)
+                }
+                if result.skipped_stages is not None:
+                    stats_headers['X-Partial-Result'] = 'true' if result.partial else 'false'
+                    stats_headers['X-Skipped-Stages'] = ','.join(result.skipped_stages)
+                if request.accept_mimetypes.best_match(['application/json', 'text/plain']) == 'text/plain':
+                    response = make_response(result.optimized_text, 200, stats_headers)
+                    response.mimetype = 'text/plain'
+                    return response
+                
+                return_original = parse_bool(request.args.get('return_original', 'false'))
+                return output_json(
+                    build_optimize_response(result, return_original), 200, stats_headers
+                )
+            
+            except ValueError as e:
+                return {'error': str(e), 'code': 'VALIDATION_ERROR'}, 400
             except Exception as e:
                 return {
                     'error': 'Erro interno no processamento',
                     'code': 'INTERNAL_ERROR'
                 }, 500
     
+    chat_message = api.model('ChatMessage', {
+        'role': fields.String(required=True, description='Papel da mensagem', example='user'),
+        'content': fields.String(required=True, description='Texto da mensagem', example='Qual é o prazo de entrega?')
+    })
+    
+    messages_request = api.model('MessagesRequest', {
+        'messages': fields.List(fields.Nested(chat_message), required=True, description='Mensagens da conversa'),
+        'role_configs': fields.Raw(
+            description=(
+                'Configuração por papel (mesmos campos de /optimize, inclusive preset e preset_id); '
+                f'null mantém as mensagens do papel sem alteração. "{HISTORY_ROLE}" vale para as mensagens '
+                'anteriores à última cujo papel não tem configuração própria'
+            ),
+            example={'system': None, HISTORY_ROLE: {'preset': 'aggressive'}}
+        ),
+        'preset': fields.String(description='Preset padrão das mensagens', example='moderate'),
+        'preset_id': fields.String(description='Preset personalizado padrão das mensagens'),
+        'return_original': fields.Boolean(
+            description='Inclui original_content em cada mensagem',
+            default=False
+        ),
+        **optimization_config
+    })
+    
+    def resolve_plan(options):
+        manual_config = {k: v for k, v in options.items() if k not in REQUEST_ONLY_FIELDS + MESSAGES_ONLY_FIELDS}
+        error_message = validate_config_options(manual_config)
+        if error_message:
+            return None, ({'error': error_message, 'code': 'VALIDATION_ERROR'}, 400)
+        config_options, plan, error = resolve_config(options, manual_config)
+        if error:
+            return None, error
+        return plan or optimizer.build_plan(config_options), None
+    
+    def serialize_messages(result, return_original):
+        messages = []
+        for message in result.messages:
+            item = {'role': message.role, 'content': message.content}
+            if return_original:
+                item['original_content'] = message.original_content
+            item['stats'] = asdict(message.stats)
+            item['source'] = message.source
+            messages.append(item)
+        return {
+            'messages': messages,
+            'stats': {**asdict(result.stats), 'messages': len(messages), 'sources': result.counts}
+        }
+    
+    @optimization_ns.route('/messages')
+    class MessagesResource(Resource):
+        @optimization_ns.doc(
+            'optimize_messages',
+            description=(
+                'Otimiza uma lista de mensagens (system/user/assistant) numa só requisição, cada uma '
+                'isolada e com a configuração do seu papel. Mensagens repetidas são otimizadas uma vez '
+                'e as já vistas em turnos anteriores saem do cache do worker.'
+            )
+        )
+        @optimization_ns.expect(messages_request, validate=True)
+        @optimization_ns.response(400, 'Erro de validação', error_response)
+        def post(self):
+            data = api.payload
+            messages = data['messages']
+            if not messages:
+                return {'error': 'O campo "messages" não pode ser vazio.', 'code': 'VALIDATION_ERROR'}, 400
+            if len(messages) > config.MESSAGES_MAX_COUNT:
+                return {
+                    'error': f'No máximo {config.MESSAGES_MAX_COUNT} mensagens por requisição.',
+                    'code': 'VALIDATION_ERROR'
+                }, 400
+            
+            default_plan, error = resolve_plan(data)
+            if error:
+                return error
+            role_configs = data.get('role_configs') or {}
+            if not isinstance(role_configs, dict):
+                return {'error': 'O campo "role_configs" deve ser um objeto.', 'code': 'VALIDATION_ERROR'}, 400
+            role_plans = {}
+            for role, options in role_configs.items():
+                if options is None:
+                    role_plans[role] = None
+                    continue
+                if not isinstance(options, dict):
+                    return {
+                        'error': f'A configuração do papel "{role}" deve ser um objeto ou null.',
+                        'code': 'VALIDATION_ERROR'
+                    }, 400
+                role_plans[role], error = resolve_plan(options)
+                if error:
+                    return error
+            
+            result = message_optimizer.optimize(
+                [(message['role'], message['content']) for message in messages],
+                default_plan, role_plans, current_tenant()
+            )
+            return output_json(serialize_messages(result, data.get('return_original', False)), 200)
+    
+    template_request = api.model('TemplateRequest', {
+        'name': fields.String(required=True, description='Nome do modelo (único por tenant)', example='suporte'),
+        'template': fields.String(
+            required=True,
+            description='Texto com placeholders {nome}; "{{" e "}}" são chaves literais',
+            example='Você é o assistente de suporte da {empresa}. Pergunta: {pergunta}'
+        ),
+        'config': fields.Nested(optimization_config, description='Configuração aplicada ao modelo e aos valores')
+    })
+    
+    template_render_request = api.model('TemplateRenderRequest', {
+        'values': fields.Raw(
+            required=True,
+            description='Valor de cada placeholder',
+            example={'empresa': 'ACME', 'pergunta': 'Como emitir a nota fiscal?'}
+        ),
+        'return_original': fields.Boolean(
+            description='Inclui o texto preenchido sem otimização na resposta',
+            default=False
+        )
+    })
+    
+    def serialize_template(template):
+        return {
+            'id': template.id,
+            'name': template.name,
+            'template': template.template,
+            'slots': list(dict.fromkeys(template.slots)),
+            'config': template.config,
+            'created_at': template.created_at,
+            'updated_at': template.updated_at
+        }
+    
+    def template_not_found(template_id):
+        return {
+            'error': f"Modelo '{template_id}' não encontrado",
+            'code': 'TEMPLATE_NOT_FOUND'
+        }, 404
+    
+    @optimization_ns.route('/templates')
+    class TemplatesResource(Resource):
+        @optimization_ns.doc('list_templates')
+        def get(self):
+            return [serialize_template(t) for t in template_store.list(current_tenant())], 200
+        
+        @optimization_ns.doc(
+            'create_template',
+            description=(
+                'Registra um modelo de prompt. O texto fixo é otimizado (e traduzido) uma vez; '
+                'cada chamada a /templates/{id}/render só otimiza os valores dos placeholders.'
+            )
+        )
+        @optimization_ns.expect(template_request, validate=True)
+        @optimization_ns.response(400, 'Erro de validação', error_response)
+        def post(self):
+            data = api.payload
+            template = template_store.create(
+                current_tenant(), data['name'], data['template'], data.get('config') or {}
+            )
+            # O texto fixo é compilado já no registro, não na primeira chamada.
+            optimizer.compiled_template(template, current_tenant())
+            return serialize_template(template), 201
+    
+    @optimization_ns.route('/templates/<string:template_id>')
+    class TemplateResource(Resource):
+        @optimization_ns.doc('get_template')
+        @optimization_ns.response(404, 'Modelo não encontrado', error_response)
+        def get(self, template_id):
+            template = template_store.get(current_tenant(), template_id)
+            if template is None:
+                return template_not_found(template_id)
+            return serialize_template(template), 200
+        
+        @optimization_ns.doc('update_template')
+        @optimization_ns.response(404, 'Modelo não encontrado', error_response)
+        def put(self, template_id):
+            data = request.get_json(silent=True) or {}
+            template = template_store.update(
+                current_tenant(), template_id,
+                name=data.get('name'),
+                template=data.get('template'),
+                config=data.get('config')
+            )
+            if template is None:
+                return template_not_found(template_id)
+            return serialize_template(template), 200
+        
+        @optimization_ns.doc('delete_template')
+        @optimization_ns.response(404, 'Modelo não encontrado', error_response)
+        def delete(self, template_id):
+            if not template_store.delete(current_tenant(), template_id):
+                return template_not_found(template_id)
+            return '', 204
+    
+    @optimization_ns.route('/templates/<string:template_id>/render')
+    class TemplateRenderResource(Resource):
+        @optimization_ns.doc('render_template')
+        @optimization_ns.expect(template_render_request, validate=True)
+        @optimization_ns.response(200, 'Sucesso', optimization_response)
+        @optimization_ns.response(400, 'Erro de validação', error_response)
+        @optimization_ns.response(404, 'Modelo não encontrado', error_response)
+        def post(self, template_id):
+            template = template_store.get(current_tenant(), template_id)
+            if template is None:
+                return template_not_found(template_id)
+            data = api.payload
+            try:
+                result = optimizer.render_template(template, data['values'], tenant=current_tenant())
+            except ValueError as e:
+                return {'error': str(e), 'code': 'VALIDATION_ERROR'}, 400
+            return build_optimize_response(result, data.get('return_original', False)), 200
+    
     @config_ns.route('/presets')
     class PresetsResource(Resource):
         @config_ns.doc('get_presets')
         @config_ns.response(200, 'Sucesso', fields.Raw)
+        @config_ns.response(304, 'Não modificado (If-None-Match)')
         def get(self):
-            return get_presets_dict(), 200
+            return static_config_response(get_presets_dict(), presets_etag)
     
     @config_ns.route('/presets/<string:preset_name>')
     class PresetResource(Resource):
         @config_ns.doc('get_preset')
         @config_ns.response(200, 'Sucesso', preset_config)
+        @config_ns.response(304, 'Não modificado (If-None-Match)')
         @config_ns.response(404, 'Preset não encontrado', error_response)
         def get(self, preset_name):
             presets = get_presets_dict()
@@ -288,7 +819,156 @@ def create_api_app(config_class=None):
                     'code': 'PRESET_NOT_FOUND'
                 }, 404
             
-            return presets[preset_name], 200
+            return static_config_response(presets[preset_name], preset_etags[preset_name])
+    
+    custom_preset_request = api.model('CustomPresetRequest', {
+        'name': fields.String(required=True, description='Nome do preset (único por tenant)', example='faturas'),
+        'description': fields.String(description='Descrição do preset', example='Resumo de faturas'),
+        'config': fields.Nested(optimization_config, required=True, description='Configuração do preset')
+    })
+    
+    def serialize_preset(preset):
+        return {
+            'id': preset.id,
+            'name': preset.name,
+            'description': preset.description,
+            'config': preset.config,
+            'created_at': preset.created_at,
+            'updated_at': preset.updated_at
+        }
+    
+    def preset_not_found(preset_id):
+        return {
+            'error': f"Preset '{preset_id}' não encontrado",
+            'code': 'PRESET_NOT_FOUND'
+        }, 404
+    
+    @config_ns.route('/custom-presets')
+    class CustomPresetsResource(Resource):
+        @config_ns.doc('list_custom_presets')
+        def get(self):
+            return [serialize_preset(p) for p in preset_store.list(current_tenant())], 200
+        
+        @config_ns.doc('create_custom_preset')
+        @config_ns.expect(custom_preset_request, validate=True)
+        @config_ns.response(400, 'Erro de validação', error_response)
+        def post(self):
+            data = api.payload
+            preset = preset_store.create(
+                current_tenant(), data['name'], data.get('description', ''), data['config']
+            )
+            return serialize_preset(preset), 201
+    
+    @config_ns.route('/custom-presets/<string:preset_id>')
+    class CustomPresetResource(Resource):
+        @config_ns.doc('get_custom_preset')
+        @config_ns.response(404, 'Preset não encontrado', error_response)
+        def get(self, preset_id):
+            preset = preset_store.get(current_tenant(), preset_id)
+            if preset is None:
+                return preset_not_found(preset_id)
+            return serialize_preset(preset), 200
+        
+        @config_ns.doc('update_custom_preset')
+        @config_ns.response(404, 'Preset não encontrado', error_response)
+        def put(self, preset_id):
+            data = request.get_json(silent=True) or {}
+            preset = preset_store.update(
+                current_tenant(), preset_id,
+                name=data.get('name'),
+                description=data.get('description'),
+                config=data.get('config')
+            )
+            if preset is None:
+                return preset_not_found(preset_id)
+            return serialize_preset(preset), 200
+        
+        @config_ns.doc('delete_custom_preset')
+        @config_ns.response(404, 'Preset não encontrado', error_response)
+        def delete(self, preset_id):
+            if not preset_store.delete(current_tenant(), preset_id):
+                return preset_not_found(preset_id)
+            return '', 204
+    
+    def serialize_dictionary(dictionary, include_entries=False):
+        data = {
+            'name': dictionary.name,
+            'tenant': dictionary.tenant,
+            'entries_count': len(dictionary.entries),
+            'memory_bytes': dictionary.memory_bytes,
+            'source': 'api' if dictionary.source == 'api' else 'file',
+            'loaded_at': dictionary.loaded_at
+        }
+        if include_entries:
+            data['entries'] = dictionary.entries
+        return data
+    
+    @dictionaries_ns.route('')
+    class DictionariesResource(Resource):
+        @dictionaries_ns.doc('list_dictionaries')
+        def get(self):
+            dictionaries = optimizer.custom_dictionaries.list_dictionaries(current_tenant())
+            return {
+                'tenant': current_tenant(),
+                'dictionaries': [serialize_dictionary(d) for d in dictionaries],
+                'memory_bytes': sum(d.memory_bytes for d in dictionaries)
+            }, 200
+    
+    @dictionaries_ns.route('/reload')
+    class DictionariesReloadResource(Resource):
+        @dictionaries_ns.doc('reload_dictionaries')
+        @dictionaries_ns.response(401, 'Tenant não identificado', error_response)
+        def post(self):
+            denied = tenant_write_denied()
+            if denied:
+                return denied
+            changed = optimizer.custom_dictionaries.reload(current_tenant())
+            dictionaries = optimizer.custom_dictionaries.list_dictionaries(current_tenant())
+            return {
+                'reloaded': changed,
+                'tenant': current_tenant(),
+                'dictionaries': len(dictionaries)
+            }, 200
+    
+    @dictionaries_ns.route('/<string:name>')
+    class DictionaryResource(Resource):
+        @dictionaries_ns.doc('get_dictionary')
+        @dictionaries_ns.response(404, 'Dicionário não encontrado', error_response)
+        def get(self, name):
+            for dictionary in optimizer.custom_dictionaries.list_dictionaries(current_tenant()):
+                if dictionary.name == name:
+                    return serialize_dictionary(dictionary, include_entries=True), 200
+            return {
+                'error': f"Dicionário '{name}' não encontrado",
+                'code': 'DICTIONARY_NOT_FOUND'
+            }, 404
+        
+        @dictionaries_ns.doc('put_dictionary')
+        @dictionaries_ns.response(400, 'Erro de validação', error_response)
+        @dictionaries_ns.response(401, 'Tenant não identificado', error_response)
+        def put(self, name):
+            denied = tenant_write_denied()
+            if denied:
+                return denied
+            data = request.get_json(silent=True) or {}
+            dictionary = optimizer.custom_dictionaries.register(
+                current_tenant(), name, data.get('entries')
+            )
+            return serialize_dictionary(dictionary), 200
+        
+        @dictionaries_ns.doc('delete_dictionary')
+        @dictionaries_ns.response(401, 'Tenant não identificado', error_response)
+        @dictionaries_ns.response(404, 'Dicionário não encontrado', error_response)
+        def delete(self, name):
+            denied = tenant_write_denied()
+            if denied:
+                return denied
+            if not optimizer.custom_dictionaries.remove(current_tenant(), name):
+                return {
+                    'error': f"Dicionário '{name}' não encontrado",
+                    'code': 'DICTIONARY_NOT_FOUND'
+                }, 404
+            return '', 204
     
     @system_ns.route('/health')
     class HealthResource(Resource):
@@ -302,8 +982,22 @@ def create_api_app(config_class=None):
                 'timestamp': datetime.now(timezone.utc).isoformat()
             }, 200
     
+    @system_ns.route('/metrics')
+    class MetricsResource(Resource):
+        @system_ns.doc('metrics')
+        def get(self):
+            return {
+                'translation': optimizer.translation_stats(),
+                'message_cache': message_optimizer.stats(),
+                'admission': {
+                    'budget': budget.stats() if budget is not None else None,
+                    'rate_limit': rate_limiter.stats() if rate_limiter is not None else None
+                }
+            }, 200
+    
     api.add_namespace(optimization_ns)
     api.add_namespace(config_ns)  
+    api.add_namespace(dictionaries_ns)
     api.add_namespace(system_ns)
     
     
@@ -0,0 +1,313 @@
+﻿"""
+Linha de comando para otimizar arquivos grandes sem passar pela API HTTP.
+
+Uso:
+    python -m src.cli optimize entrada.txt -o saida.txt --preset conservative
+    python -m src.cli optimize dados.jsonl --format jsonl --field text -o saida.jsonl --workers 8
+    python -m src.cli optimize dados.jsonl --format jsonl -o saida.jsonl --resume
+
+O arquivo de entrada é mapeado em memória (mmap) e dividido em registros (linhas,
+um campo de cada linha JSONL ou um delimitador). Os registros são otimizados em
+lotes pelo `BatchService`, que lê a entrada e grava os resultados em buffers
+compartilhados, e gravados na ordem original. Após cada lote gravado um
+checkpoint registra o offset de entrada e o tamanho da saída, usado por `--resume`.
+"""
+import argparse
+import collections
+import json
+import mmap
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.services.batch_service import BatchService
+from src.utils.presets import get_presets_dict
+from src.utils.validators import validate_config_options
+
+FORMATS = ('lines', 'jsonl', 'delimiter')
+
+
+@dataclass(frozen=True)
+class RecordFormat:
+    kind: str
+    separator: bytes = b'\n'
+    field: str = 'text'
+
+
+@dataclass
+class Batch:
+    spans: List[Tuple[int, int]]
+    # Se o último registro do lote era seguido pelo separador na entrada.
+    trailing_separator: bool
+    end_offset: int
+
+
+def iter_records(data, start: int, separator: bytes) -> Iterator[Tuple[int, int, int]]:
+    """Gera (início, fim, início do próximo) de cada registro a partir de `start`."""
+    size = len(data)
+    position = start
+    while position < size:
+        end = data.find(separator, position)
+        if end == -1:
+            yield position, size, size
+            return
+        yield position, end, end + len(separator)
+        position = end + len(separator)
+
+
+def align_offset(data, offset: int, separator: bytes) -> int:
+    # Um offset no meio de um registro avança até o início do próximo.
+    if offset <= 0:
+        return 0
+    if offset >= len(data):
+        return len(data)
+    if data[max(0, offset - len(separator)):offset] == separator:
+        return offset
+    end = data.find(separator, offset)
+    return len(data) if end == -1 else end + len(separator)
+
+
+def iter_batches(data, start: int, separator: bytes, batch_size: int) -> Iterator[Batch]:
+    spans: List[Tuple[int, int]] = []
+    for record_start, record_end, next_start in iter_records(data, start, separator):
+        spans.append((record_start, record_end))
+        if len(spans) >= batch_size:
+            yield Batch(spans, next_start != record_end, next_start)
+            spans = []
+    if spans:
+        yield Batch(spans, next_start != record_end, next_start)
+
+
+class Progress:
+
+    def __init__(self, total_bytes: int, start_offset: int, stream=None, interval: float = 1.0):
+        self.total_bytes = total_bytes
+        self.start_offset = start_offset
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.records = 0
+        self.offset = start_offset
+        self._started = time.monotonic()
+        self._reported = self._started
+
+    def update(self, offset: int, records: int) -> None:
+        self.offset = offset
+        self.records += records
+        now = time.monotonic()
+        if now - self._reported >= self.interval:
+            self._reported = now
+            self.report()
+
+    def report(self, final: bool = False) -> None:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        processed = self.offset - self.start_offset
+        percent = self.offset / self.total_bytes * 100 if self.total_bytes else 100.0
+        label = 'Concluído' if final else 'Progresso'
+        self.stream.write(
+            f"{label}: {self.offset / 1e6:.1f}/{self.total_bytes / 1e6:.1f} MB ({percent:.1f}%), "
+            f"{self.records} registros, {processed / 1e6 / elapsed:.2f} MB/s, "
+            f"{self.records / elapsed:.0f} registros/s\n"
+        )
+        self.stream.flush()
+
+
+def read_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding='utf-8') as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return None
+
+
+def write_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as output:
+        json.dump(checkpoint, output)
+    os.replace(tmp_path, path)
+
+
+def resolve_config(preset: Optional[str], config_json: Optional[str]) -> Dict[str, Any]:
+    config_options: Dict[str, Any] = {}
+    if preset:
+        presets = get_presets_dict()
+        if preset not in presets:
+            raise ValueError(f"Preset '{preset}' não encontrado")
+        config_options.update(presets[preset]['config'])
+    if config_json:
+        manual_config = json.loads(config_json)
+        if not isinstance(manual_config, dict):
+            raise ValueError('--config deve ser um objeto JSON.')
+        config_options.update(manual_config)
+
+    error = validate_config_options(config_options)
+    if error:
+        raise ValueError(error)
+    return config_options
+
+
+def parse_delimiter(value: str) -> bytes:
+    # Aceita escapes como "\n---\n" na linha de comando.
+    return value.encode('utf-8').decode('unicode_escape').encode('latin-1')
+
+
+def optimize_file(
+    input_path: str,
+    output,
+    config_options: Dict[str, Any],
+    record_format: RecordFormat,
+    workers: int = 1,
+    batch_size: int = 256,
+    start_offset: int = 0,
+    output_offset: int = 0,
+    checkpoint_path: Optional[str] = None,
+    progress: Optional[Progress] = None
+) -> int:
+    """Otimiza `input_path` a partir de `start_offset` e devolve o número de registros."""
+    separator = record_format.separator
+    records_done = 0
+
+    with open(input_path, 'rb') as source:
+        size = os.fstat(source.fileno()).st_size
+        if size == 0:
+            return 0
+
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start_offset = align_offset(data, start_offset, separator)
+            if progress is not None:
+                progress.start_offset = progress.offset = start_offset
+
+            def write(batch: Batch, outputs) -> None:
+                nonlocal output_offset, records_done
+                last = len(outputs) - 1
+                for index, optimized in enumerate(outputs):
+                    output_offset += output.write(optimized)
+                    if index < last or batch.trailing_separator:
+                        output_offset += output.write(separator)
+                records_done += len(outputs)
+
+                if checkpoint_path:
+                    output.flush()
+                    write_checkpoint(checkpoint_path, {
+                        'input': os.path.abspath(input_path),
+                        'input_size': size,
+                        'input_offset': batch.end_offset,
+                        'output_offset': output_offset,
+                        'records': records_done
+                    })
+                if progress is not None:
+                    progress.update(batch.end_offset, len(outputs))
+
+            json_field = record_format.field if record_format.kind == 'jsonl' else None
+            pending = collections.deque()
+
+            def spans():
+                for batch in iter_batches(data, start_offset, separator, batch_size):
+                    pending.append(batch)
+                    yield batch.spans
+
+            # O serviço consome os lotes sob demanda (uma janela por vez), então
+            # o arquivo não é lido adiantado e a saída sai na ordem da entrada.
+            with BatchService(config_options, workers, json_field) as batch_service:
+                for outputs in batch_service.map_file(input_path, spans()):
+                    write(pending.popleft(), outputs)
+
+    return records_done
+
+
+def run_optimize(args: argparse.Namespace) -> int:
+    config_options = resolve_config(args.preset, args.config)
+    if args.format == 'delimiter' and not args.delimiter:
+        raise ValueError('--format delimiter exige --delimiter.')
+    record_format = RecordFormat(
+        kind=args.format,
+        separator=parse_delimiter(args.delimiter) if args.format == 'delimiter' else b'\n',
+        field=args.field
+    )
+
+    checkpoint_path = None
+    start_offset, output_offset = args.start_offset, 0
+    if args.output:
+        checkpoint_path = args.checkpoint or f'{args.output}.checkpoint'
+    elif args.resume:
+        raise ValueError('--resume exige --output.')
+
+    mode = 'wb'
+    if args.resume:
+        checkpoint = read_checkpoint(checkpoint_path)
+        if checkpoint is not None:
+            if checkpoint.get('input_size') != os.path.getsize(args.input):
+                raise ValueError('O arquivo de entrada mudou desde o checkpoint; recomece sem --resume.')
+            start_offset = checkpoint['input_offset']
+            output_offset = checkpoint['output_offset']
+            # Sem os bytes já gravados, a retomada deixaria um buraco na saída.
+            if not os.path.exists(args.output) or os.path.getsize(args.output) < output_offset:
+                raise ValueError(
+                    'A saída foi removida ou truncada desde o checkpoint; recomece sem --resume.'
+                )
+            mode = 'r+b'
+            sys.stderr.write(f"Retomando a partir do byte {start_offset} da entrada.\n")
+
+    progress = None if args.quiet else Progress(os.path.getsize(args.input), start_offset)
+
+    if args.output:
+        with open(args.output, mode) as output:
+            # Descarta o que foi gravado depois do último checkpoint.
+            output.truncate(output_offset)
+            output.seek(output_offset)
+            optimize_file(
+                args.input, output, config_options, record_format,
+                workers=args.workers, batch_size=args.batch_size,
+                start_offset=start_offset, output_offset=output_offset,
+                checkpoint_path=checkpoint_path, progress=progress
+            )
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+    else:
+        optimize_file(
+            args.input, sys.stdout.buffer, config_options, record_format,
+            workers=args.workers, batch_size=args.batch_size,
+            start_offset=start_offset, progress=progress
+        )
+        sys.stdout.buffer.flush()
+
+    if progress is not None:
+        progress.report(final=True)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m src.cli', description='Otimização de textos em lote.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    optimize = subparsers.add_parser('optimize', help='Otimiza os registros de um arquivo.')
+    optimize.add_argument('input', help='Arquivo de entrada (UTF-8)')
+    optimize.add_argument('-o', '--output', help='Arquivo de saída (padrão: stdout)')
+    optimize.add_argument('--preset', help='Preset predefinido')
+    optimize.add_argument('--config', help='Configuração em JSON (sobrepõe o preset)')
+    optimize.add_argument('--format', choices=FORMATS, default='lines', help='Como dividir os registros')
+    optimize.add_argument('--field', default='text', help='Campo otimizado em --format jsonl')
+    optimize.add_argument('--delimiter', help='Separador de registros em --format delimiter (aceita \\n)')
+    optimize.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processos em paralelo')
+    optimize.add_argument('--batch-size', type=int, default=256, help='Registros por lote')
+    optimize.add_argument('--start-offset', type=int, default=0, help='Byte da entrada onde começar')
+    optimize.add_argument('--resume', action='store_true', help='Retoma a partir do checkpoint da saída')
+    optimize.add_argument('--checkpoint', help='Arquivo de checkpoint (padrão: <saída>.checkpoint)')
+    optimize.add_argument('-q', '--quiet', action='store_true', help='Não exibe o progresso')
+    optimize.set_defaults(handler=run_optimize)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,6 @@
-﻿import string
+﻿import json
+import os
+import string
 
 
 class Config:
@@ -7,9 +9,131 @@ class Config:
     LIBRETRANSLATE_API_URL = "https://libretranslate.de/translate"
     
     REQUESTS_TIMEOUT = 10
+
+    # Conexões com os provedores de tradução: um pool keep-alive por provedor,
+    # novas tentativas com backoff exponencial e jitter e timeouts de conexão
+    # e leitura separados. O aquecimento abre as conexões na subida do worker.
+    TRANSLATION_POOL_SIZES = {
+        'mymemory': int(os.getenv('MYMEMORY_POOL_SIZE', '10')),
+        'libretranslate': int(os.getenv('LIBRETRANSLATE_POOL_SIZE', '4')),
+    }
+    TRANSLATION_RETRIES = int(os.getenv('TRANSLATION_RETRIES', '2'))
+    TRANSLATION_BACKOFF_FACTOR = float(os.getenv('TRANSLATION_BACKOFF_FACTOR', '0.2'))
+    TRANSLATION_BACKOFF_JITTER = float(os.getenv('TRANSLATION_BACKOFF_JITTER', '0.1'))
+    TRANSLATION_CONNECT_TIMEOUT = float(os.getenv('TRANSLATION_CONNECT_TIMEOUT', '3'))
+    TRANSLATION_READ_TIMEOUT = float(os.getenv('TRANSLATION_READ_TIMEOUT', str(REQUESTS_TIMEOUT)))
+    TRANSLATION_WARMUP = os.getenv('TRANSLATION_WARMUP', 'false').lower() in ('1', 'true', 'yes')
+
+    # Limites de uso por provedor (0 desativa): chamadas acima deles esperam
+    # até TRANSLATION_MAX_QUEUE_WAIT segundos e depois são recusadas, sem
+    # chegar ao provedor. A cota anônima da MyMemory é de 5000 caracteres/dia.
+    TRANSLATION_RATE_LIMITS = {
+        'mymemory': {
+            'requests_per_second': float(os.getenv('MYMEMORY_REQUESTS_PER_SECOND', '5')),
+            'burst': int(os.getenv('MYMEMORY_BURST', '10')),
+            'chars_per_day': int(os.getenv('MYMEMORY_CHARS_PER_DAY', '0')),
+        },
+        'libretranslate': {
+            'requests_per_second': float(os.getenv('LIBRETRANSLATE_REQUESTS_PER_SECOND', '2')),
+            'burst': int(os.getenv('LIBRETRANSLATE_BURST', '4')),
+            'chars_per_day': int(os.getenv('LIBRETRANSLATE_CHARS_PER_DAY', '0')),
+        },
+    }
+    TRANSLATION_MAX_QUEUE_WAIT = float(os.getenv('TRANSLATION_MAX_QUEUE_WAIT', '2'))
+    # Fallbacks para a LibreTranslate que chegam dentro da janela (s) viram uma
+    # só chamada com vários textos (0 desativa o agrupamento).
+    TRANSLATION_BATCH_WINDOW = float(os.getenv('TRANSLATION_BATCH_WINDOW', '0.02'))
+    TRANSLATION_BATCH_MAX_CHARS = int(os.getenv('TRANSLATION_BATCH_MAX_CHARS', '2000'))
+    TRANSLATION_BATCH_MAX_ITEMS = int(os.getenv('TRANSLATION_BATCH_MAX_ITEMS', '16'))
     
     TRANSLATION_CHAR_LIMIT = 500
 
+    # Backend padrão de tradução: "remote" (MyMemory/LibreTranslate) ou
+    # "glossary" (offline, por glossário PT→EN). A configuração
+    # `translation_backend` escolhe por requisição ou preset.
+    TRANSLATION_BACKEND = os.getenv('TRANSLATION_BACKEND', 'remote')
+    # Glossário extra (JSON ou CSV, como os dicionários personalizados) que
+    # complementa o embutido em src/data/glossary.py.
+    TRANSLATION_GLOSSARY_PATH = os.getenv('TRANSLATION_GLOSSARY_PATH')
+    # Trechos traduzidos guardados em memória por worker e sua validade (s).
+    TRANSLATION_CACHE_SIZE = int(os.getenv('TRANSLATION_CACHE_SIZE', '4096'))
+    TRANSLATION_CACHE_TTL = float(os.getenv('TRANSLATION_CACHE_TTL', '3600'))
+    # Frequência dos trechos traduzidos (Count-Min sketch de largura x
+    # profundidade, contagens divididas por dois a cada DECAY registros) e os
+    # TOP_K mais frequentes, retraduzidos em segundo plano a cada INTERVAL
+    # segundos quando faltam menos de AHEAD segundos para vencerem no cache.
+    # Só a tradução remota entra, e só no worker da API; um trecho sem
+    # ocorrência há MAX_IDLE segundos deixa de ser renovado (0 desativa o corte).
+    TRANSLATION_SKETCH_WIDTH = int(os.getenv('TRANSLATION_SKETCH_WIDTH', '2048'))
+    TRANSLATION_SKETCH_DEPTH = int(os.getenv('TRANSLATION_SKETCH_DEPTH', '4'))
+    TRANSLATION_SKETCH_DECAY = int(os.getenv('TRANSLATION_SKETCH_DECAY', '100000'))
+    TRANSLATION_PREWARM_TOP_K = int(os.getenv('TRANSLATION_PREWARM_TOP_K', '64'))
+    TRANSLATION_PREWARM_MIN_COUNT = int(os.getenv('TRANSLATION_PREWARM_MIN_COUNT', '3'))
+    TRANSLATION_PREWARM_INTERVAL = float(os.getenv('TRANSLATION_PREWARM_INTERVAL', '30'))
+    TRANSLATION_PREWARM_AHEAD = float(os.getenv('TRANSLATION_PREWARM_AHEAD', '300'))
+    TRANSLATION_PREWARM_MAX_IDLE = float(os.getenv('TRANSLATION_PREWARM_MAX_IDLE', '3600'))
+    # Com prazo na requisição, a tradução remota só é tentada se restarem
+    # pelo menos estes milissegundos.
+    DEADLINE_TRANSLATION_RESERVE_MS = float(os.getenv('DEADLINE_TRANSLATION_RESERVE_MS', '250'))
+
+    # Preset cujos dicionários são carregados na criação da aplicação; sem ele
+    # tudo é carregado sob demanda na primeira requisição que precisar.
+    PRELOAD_PRESET = os.getenv('PRELOAD_PRESET')
+
+    # Artefato gerado por `python -m src.data.artifact`; se ausente ou
+    # desatualizado, os dicionários são compilados a partir das fontes.
+    DICTIONARY_ARTIFACT_PATH = os.getenv(
+        'DICTIONARY_ARTIFACT_PATH',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'compiled', 'dictionaries.bin')
+    )
+
+    # Dicionários personalizados em <dir>/<tenant>/<nome>.json|csv, recarregados
+    # quando os arquivos mudam (0 desativa a observação).
+    CUSTOM_DICTIONARY_DIR = os.getenv('CUSTOM_DICTIONARY_DIR')
+    CUSTOM_DICTIONARY_WATCH_INTERVAL = float(os.getenv('CUSTOM_DICTIONARY_WATCH_INTERVAL', '5'))
+
+    # Presets personalizados por tenant (SQLite). O intervalo controla a
+    # frequência com que cada worker verifica gravações feitas por outros.
+    PRESET_DB_PATH = os.getenv('PRESET_DB_PATH', os.path.join('instance', 'presets.sqlite3'))
+    PRESET_STORE_REFRESH_INTERVAL = float(os.getenv('PRESET_STORE_REFRESH_INTERVAL', '1'))
+
+    # /optimization/messages: mensagens por requisição e resultados guardados
+    # por worker para as mensagens repetidas entre turnos da conversa.
+    MESSAGES_MAX_COUNT = int(os.getenv('MESSAGES_MAX_COUNT', '512'))
+    MESSAGE_CACHE_SIZE = int(os.getenv('MESSAGE_CACHE_SIZE', '4096'))
+
+    # Usa orjson (se instalado) para ler e serializar JSON em toda a API.
+    FAST_JSON = os.getenv('FAST_JSON', 'false').lower() in ('1', 'true', 'yes')
+
+    # Respostas a partir deste tamanho (bytes) são comprimidas com zstd, br ou
+    # gzip conforme o Accept-Encoding; 0 desativa a compressão.
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+
+    # Controle de admissão das rotas de otimização. Cada requisição pesa
+    # 1 + tamanho do corpo / ADMISSION_WEIGHT_BYTES; acima de
+    # ADMISSION_MAX_WEIGHT em andamento no worker a resposta é 503 (0 desativa).
+    ADMISSION_MAX_WEIGHT = int(os.getenv('ADMISSION_MAX_WEIGHT', '64'))
+    ADMISSION_WEIGHT_BYTES = int(os.getenv('ADMISSION_WEIGHT_BYTES', '16384'))
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+
+    # Requisições por segundo (e rajada) por X-API-KEY, ou por IP sem a chave;
+    # acima disso a resposta é 429 (0 desativa). Com RATE_LIMIT_DB_PATH os
+    # limites valem para todos os workers que usam o mesmo arquivo.
+    CLIENT_RATE_LIMIT = float(os.getenv('CLIENT_RATE_LIMIT', '0'))
+    CLIENT_RATE_BURST = int(os.getenv('CLIENT_RATE_BURST', '20'))
+    RATE_LIMIT_DB_PATH = os.getenv('RATE_LIMIT_DB_PATH')
+
+    # Chaves de API aceitas e o tenant de cada uma, em JSON: {"chave": "tenant"}.
+    # A chave define o tenant da requisição; sem chave conhecida o tenant é
+    # `default`. O header X-Tenant-ID só é aceito sem chave com
+    # TRUST_TENANT_HEADER, atrás de um proxy que autentica o cliente e define
+    # o header; nos demais casos um tenant diferente do da chave é recusado.
+    API_KEYS = json.loads(os.getenv('API_KEYS', '{}'))
+    TRUST_TENANT_HEADER = os.getenv('TRUST_TENANT_HEADER', 'false').lower() in ('1', 'true', 'yes')
+
+    # Validade (s) do cache HTTP das rotas de configuração estática (/config/presets).
+    PRESETS_CACHE_MAX_AGE = int(os.getenv('PRESETS_CACHE_MAX_AGE', '3600'))
+
     STOP_WORDS = {
         'pt': {
             'o', 'a', 'os', 'as', 'um', 'uma', 'uns', 'umas', 'de', 'do', 'da', 'dos', 'das', 
@@ -25,6 +149,10 @@ class Config:
         }
     }
 
+    # Listas extras de stop words em <dir>/<idioma>.txt (uma palavra por linha),
+    # somadas às de STOP_WORDS; a comparação ignora maiúsculas e acentos.
+    STOP_WORDS_DIR = os.getenv('STOP_WORDS_DIR')
+
     REMOVABLE_CHARS = set(string.punctuation)
 
 
@@ -39,6 +167,7 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     DEBUG = True
+    PRESET_DB_PATH = ':memory:'
 
 
 config_by_name = {
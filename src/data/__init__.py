@@ -1,29 +1,46 @@
-﻿from .locations import (
-    BRAZILIAN_STATES, 
-    STATE_ABBREVIATIONS, 
-    COUNTRIES,
-    get_all_locations,
-    is_known_location
-)
-from .animals import (
-    DOMESTIC_ANIMALS,
-    WILD_ANIMALS,
-    get_all_animals,
-    is_animal,
-    is_nature_element
-)
-from .technology import (
-    PROGRAMMING_TECHNOLOGIES,
-    AI_ML_TERMS,
-    get_all_tech_terms,
-    is_tech_term
-)
-from .abbreviations import (
-    MEASUREMENTS,
-    TIME_UNITS,
-    get_all_abbreviations,
-    get_savings_potential
-)
+﻿import importlib
+
+# Os dicionários são carregados sob demanda: importar `src.data` (ou um de seus
+# submódulos) não deve custar a carga de todos os outros.
+_LAZY_ATTRIBUTES = {
+    'BRAZILIAN_STATES': 'locations',
+    'STATE_ABBREVIATIONS': 'locations',
+    'COUNTRIES': 'locations',
+    'get_all_locations': 'locations',
+    'is_known_location': 'locations',
+
+    'DOMESTIC_ANIMALS': 'animals',
+    'WILD_ANIMALS': 'animals',
+    'get_all_animals': 'animals',
+    'is_animal': 'animals',
+    'is_nature_element': 'animals',
+
+    'PROGRAMMING_TECHNOLOGIES': 'technology',
+    'AI_ML_TERMS': 'technology',
+    'get_all_tech_terms': 'technology',
+    'is_tech_term': 'technology',
+
+    'MEASUREMENTS': 'abbreviations',
+    'TIME_UNITS': 'abbreviations',
+    'get_all_abbreviations': 'abbreviations',
+    'get_savings_potential': 'abbreviations',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(f'.{module_name}', __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 __all__ = [
     'BRAZILIAN_STATES',
@@ -0,0 +1,210 @@
+﻿"""
+Artefato binário com todos os dicionários pré-compilados.
+
+O artefato é gerado por um passo de build (`python -m src.data.artifact`) e
+carregado via mmap na inicialização, evitando executar os literais de
+`src/data/*.py`, mesclar e ordenar o mapa de abreviações em cada processo.
+O checksum das fontes versiona o artefato e as chaves de cache que dependem
+dos dicionários; para não reler as fontes a cada subida, o cabeçalho também
+guarda o tamanho e o mtime de cada uma, e o hash só é refeito quando eles mudam.
+"""
+import argparse
+import hashlib
+import logging
+import marshal
+import mmap
+import os
+import struct
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from src.config.settings import Config
+from src.utils.accents import fold_accents
+
+ARTIFACT_MAGIC = b'APIRODIC'
+ARTIFACT_FORMAT_VERSION = 2
+
+# magic, versão do formato, versão do marshal, cache_tag do Python,
+# sha256 das fontes, sha256 do tamanho e mtime das fontes e tamanho do payload.
+_HEADER = struct.Struct('<8sHH16s32s32sQ')
+
+_SOURCE_MODULES = ('locations', 'animals', 'technology', 'abbreviations', 'numbers')
+_DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+# Além dos dados, o conteúdo do artefato depende da normalização de acentos
+# (chaves de locais) e da própria compilação abaixo.
+_SOURCE_FILES = tuple(
+    os.path.join(_DATA_DIR, f'{module_name}.py') for module_name in _SOURCE_MODULES
+) + (
+    os.path.join(os.path.dirname(_DATA_DIR), 'utils', 'accents.py'),
+    os.path.abspath(__file__),
+)
+
+
+@dataclass(frozen=True)
+class DictionaryArtifact:
+    checksum: str
+    abbreviations: Tuple[Tuple[str, str], ...]
+    location_keys: FrozenSet[str]
+    nature_terms: FrozenSet[str]
+    tech_terms: FrozenSet[str]
+    preservation_categories: Dict[str, FrozenSet[str]]
+    tech_preservation: Dict[str, FrozenSet[str]]
+    number_patterns: Tuple[str, ...]
+
+    def is_known_location(self, text: str) -> bool:
+        # Mesma normalização de `locations.normalize_text`, sem importar os
+        # literais que o artefato existe para evitar.
+        return fold_accents(text.lower()) in self.location_keys
+
+    def is_nature_element(self, text: str) -> bool:
+        return text.lower().rstrip('s') in self.nature_terms
+
+    def is_tech_term(self, text: str) -> bool:
+        return text in self.tech_terms
+
+
+def source_checksum() -> str:
+    digest = hashlib.sha256()
+    for path in _SOURCE_FILES:
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def source_fingerprint() -> str:
+    """Hash do tamanho e do mtime das fontes: só um `stat` por arquivo."""
+    digest = hashlib.sha256()
+    for path in _SOURCE_FILES:
+        stat = os.stat(path)
+        digest.update(f'{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def compile_dictionaries() -> Dict:
+    from src.data.locations import get_all_locations, normalize_text, LOCATION_VARIATIONS
+    from src.data.animals import get_all_nature, PRESERVATION_CATEGORIES
+    from src.data.technology import get_all_tech_terms, TECH_PRESERVATION
+    from src.data.abbreviations import get_all_abbreviations
+    from src.data.numbers import IMPORTANT_NUMBER_PATTERNS
+
+    merged = {}
+    merged.update(get_all_locations())
+    merged.update(get_all_nature())
+    merged.update(get_all_tech_terms())
+    merged.update(get_all_abbreviations())
+    merged.update(LOCATION_VARIATIONS)
+
+    nature = get_all_nature()
+    tech = get_all_tech_terms()
+
+    return {
+        'checksum': source_checksum(),
+        'abbreviations': tuple(sorted(merged.items(), key=lambda x: len(x[0]), reverse=True)),
+        'location_keys': frozenset(normalize_text(loc) for loc in get_all_locations()),
+        'nature_terms': frozenset(nature) | frozenset(nature.values()),
+        'tech_terms': frozenset(tech) | frozenset(tech.values()),
+        'preservation_categories': {k: frozenset(v) for k, v in PRESERVATION_CATEGORIES.items()},
+        'tech_preservation': {k: frozenset(v) for k, v in TECH_PRESERVATION.items()},
+        'number_patterns': tuple(IMPORTANT_NUMBER_PATTERNS),
+    }
+
+
+def build_artifact(path: str) -> str:
+    data = compile_dictionaries()
+    payload = marshal.dumps(data)
+    checksum = data['checksum']
+    header = _HEADER.pack(
+        ARTIFACT_MAGIC,
+        ARTIFACT_FORMAT_VERSION,
+        marshal.version,
+        sys.implementation.cache_tag.encode('ascii'),
+        bytes.fromhex(checksum),
+        bytes.fromhex(source_fingerprint()),
+        len(payload)
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as output:
+        output.write(header)
+        output.write(payload)
+    os.replace(tmp_path, path)
+    return checksum
+
+
+def read_artifact(
+    path: str,
+    expected_checksum: Optional[str] = None,
+    expected_fingerprint: Optional[str] = None
+) -> Optional[Dict]:
+    """Lê o artefato; None se for de outro formato ou de outras fontes."""
+    try:
+        with open(path, 'rb') as source, mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if len(mapped) < _HEADER.size:
+                return None
+
+            magic, format_version, marshal_version, cache_tag, checksum, fingerprint, size = (
+                _HEADER.unpack_from(mapped, 0)
+            )
+            if (magic != ARTIFACT_MAGIC
+                    or format_version != ARTIFACT_FORMAT_VERSION
+                    or marshal_version != marshal.version
+                    or cache_tag.rstrip(b'\0') != sys.implementation.cache_tag.encode('ascii')):
+                return None
+            if expected_checksum is not None and checksum.hex() != expected_checksum:
+                return None
+            if expected_fingerprint is not None and fingerprint.hex() != expected_fingerprint:
+                return None
+
+            with memoryview(mapped)[_HEADER.size:_HEADER.size + size] as payload:
+                return marshal.loads(payload)
+    except (OSError, ValueError, EOFError):
+        return None
+
+
+_artifact: Optional[DictionaryArtifact] = None
+_artifact_lock = threading.Lock()
+
+
+def load_dictionaries(path: Optional[str] = None) -> DictionaryArtifact:
+    global _artifact
+    if _artifact is not None and path is None:
+        return _artifact
+
+    with _artifact_lock:
+        if _artifact is not None and path is None:
+            return _artifact
+
+        artifact_path = path or Config.DICTIONARY_ARTIFACT_PATH
+        # Fontes com o mesmo tamanho e mtime da geração dispensam o hash do
+        # conteúdo; se mudaram (ex.: checkout), o conteúdo decide.
+        data = read_artifact(artifact_path, expected_fingerprint=source_fingerprint())
+        if data is None:
+            data = read_artifact(artifact_path, expected_checksum=source_checksum())
+        if data is None:
+            logging.info(
+                f"Artefato de dicionários ausente ou desatualizado em {artifact_path}; "
+                "compilando a partir das fontes."
+            )
+            data = compile_dictionaries()
+
+        artifact = DictionaryArtifact(**data)
+        if path is None:
+            _artifact = artifact
+        return artifact
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compila os dicionários em um artefato binário.')
+    parser.add_argument('--output', default=Config.DICTIONARY_ARTIFACT_PATH)
+    args = parser.parse_args()
+
+    checksum = build_artifact(args.output)
+    print(f"Artefato gerado em {args.output} (checksum {checksum[:12]})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+﻿from typing import Dict
+
+# Glossário PT→EN do tradutor offline. As expressões de várias palavras vêm
+# antes das palavras isoladas que as compõem apenas por legibilidade: o
+# tradutor sempre prefere a correspondência mais longa.
+PHRASES = {
+    'por favor': 'please',
+    'por exemplo': 'for example',
+    'por causa de': 'because of',
+    'de acordo com': 'according to',
+    'além disso': 'in addition',
+    'no entanto': 'however',
+    'ou seja': 'that is',
+    'até agora': 'so far',
+    'o mais rápido possível': 'as soon as possible',
+    'tudo bem': 'all right',
+    'bom dia': 'good morning',
+    'boa tarde': 'good afternoon',
+    'boa noite': 'good evening',
+    'muito obrigado': 'thank you very much',
+    'muito obrigada': 'thank you very much',
+    'em relação a': 'regarding',
+    'a partir de': 'starting from',
+    'ao invés de': 'instead of',
+    'em vez de': 'instead of',
+    'antes de': 'before',
+    'depois de': 'after',
+    'dentro de': 'within',
+    'fora de': 'outside',
+    'perto de': 'near',
+    'longe de': 'far from',
+    'cada vez mais': 'increasingly',
+    'pelo menos': 'at least',
+    'de novo': 'again',
+    'às vezes': 'sometimes',
+    'o que': 'what',
+}
+
+FUNCTION_WORDS = {
+    'o': 'the',
+    'a': 'the',
+    'os': 'the',
+    'as': 'the',
+    'um': 'a',
+    'uma': 'a',
+    'uns': 'some',
+    'umas': 'some',
+    'de': 'of',
+    'do': 'of the',
+    'da': 'of the',
+    'dos': 'of the',
+    'das': 'of the',
+    'em': 'in',
+    'no': 'in the',
+    'na': 'in the',
+    'nos': 'in the',
+    'nas': 'in the',
+    'ao': 'to the',
+    'aos': 'to the',
+    'à': 'to the',
+    'às': 'to the',
+    'para': 'for',
+    'pra': 'for',
+    'por': 'by',
+    'pelo': 'by the',
+    'pela': 'by the',
+    'com': 'with',
+    'sem': 'without',
+    'sobre': 'about',
+    'entre': 'between',
+    'até': 'until',
+    'desde': 'since',
+    'contra': 'against',
+    'durante': 'during',
+    'e': 'and',
+    'ou': 'or',
+    'mas': 'but',
+    'porque': 'because',
+    'porém': 'however',
+    'então': 'so',
+    'se': 'if',
+    'que': 'that',
+    'quando': 'when',
+    'onde': 'where',
+    'como': 'how',
+    'qual': 'which',
+    'quais': 'which',
+    'quem': 'who',
+    'não': 'not',
+    'sim': 'yes',
+    'também': 'also',
+    'já': 'already',
+    'ainda': 'still',
+    'sempre': 'always',
+    'nunca': 'never',
+    'muito': 'very',
+    'muitos': 'many',
+    'muitas': 'many',
+    'mais': 'more',
+    'menos': 'less',
+    'bem': 'well',
+    'mal': 'badly',
+    'todo': 'all',
+    'toda': 'all',
+    'todos': 'all',
+    'todas': 'all',
+    'este': 'this',
+    'esta': 'this',
+    'esse': 'this',
+    'essa': 'this',
+    'isso': 'this',
+    'isto': 'this',
+    'aquele': 'that',
+    'aquela': 'that',
+    'eu': 'I',
+    'você': 'you',
+    'vocês': 'you',
+    'ele': 'he',
+    'ela': 'she',
+    'nós': 'we',
+    'eles': 'they',
+    'elas': 'they',
+    'meu': 'my',
+    'minha': 'my',
+    'seu': 'your',
+    'sua': 'your',
+    'nosso': 'our',
+    'nossa': 'our',
+    'hoje': 'today',
+    'amanhã': 'tomorrow',
+    'ontem': 'yesterday',
+    'agora': 'now',
+    'depois': 'after',
+    'antes': 'before',
+    'aqui': 'here',
+}
+
+VERBS = {
+    'é': 'is',
+    'são': 'are',
+    'foi': 'was',
+    'foram': 'were',
+    'era': 'was',
+    'ser': 'be',
+    'será': 'will be',
+    'está': 'is',
+    'estão': 'are',
+    'estava': 'was',
+    'estar': 'be',
+    'tem': 'has',
+    'têm': 'have',
+    'tenho': 'have',
+    'temos': 'have',
+    'ter': 'have',
+    'teve': 'had',
+    'há': 'there is',
+    'fazer': 'do',
+    'faz': 'does',
+    'fez': 'did',
+    'pode': 'can',
+    'podem': 'can',
+    'posso': 'can',
+    'poder': 'be able to',
+    'deve': 'must',
+    'devem': 'must',
+    'precisa': 'needs',
+    'preciso': 'need',
+    'precisamos': 'need',
+    'quero': 'want',
+    'quer': 'wants',
+    'vai': 'will',
+    'vamos': "let's",
+    'sei': 'know',
+    'saber': 'know',
+    'ver': 'see',
+    'enviar': 'send',
+    'envie': 'send',
+    'receber': 'receive',
+    'recebeu': 'received',
+    'usar': 'use',
+    'criar': 'create',
+    'alterar': 'change',
+    'atualizar': 'update',
+    'verificar': 'check',
+    'verifique': 'check',
+    'resolver': 'solve',
+    'ajudar': 'help',
+    'escreva': 'write',
+    'escrever': 'write',
+    'ler': 'read',
+    'acesse': 'access',
+    'acessar': 'access',
+    'ligue': 'call',
+    'pague': 'pay',
+    'pagar': 'pay',
+    'custa': 'costs',
+    'explique': 'explain',
+    'explicar': 'explain',
+    'resuma': 'summarize',
+    'resumir': 'summarize',
+    'traduza': 'translate',
+    'liste': 'list',
+    'analise': 'analyze',
+    'analisar': 'analyze',
+    'gere': 'generate',
+    'gerar': 'generate',
+    'responda': 'answer',
+    'responder': 'answer',
+}
+
+NOUNS_AND_ADJECTIVES = {
+    'empresa': 'company',
+    'empresas': 'companies',
+    'cliente': 'customer',
+    'clientes': 'customers',
+    'usuário': 'user',
+    'usuários': 'users',
+    'sistema': 'system',
+    'sistemas': 'systems',
+    'dados': 'data',
+    'projeto': 'project',
+    'projetos': 'projects',
+    'desenvolvimento': 'development',
+    'aplicação': 'application',
+    'aplicações': 'applications',
+    'problema': 'problem',
+    'problemas': 'problems',
+    'solução': 'solution',
+    'soluções': 'solutions',
+    'relatório': 'report',
+    'relatórios': 'reports',
+    'reunião': 'meeting',
+    'equipe': 'team',
+    'pessoa': 'person',
+    'pessoas': 'people',
+    'tempo': 'time',
+    'dia': 'day',
+    'dias': 'days',
+    'semana': 'week',
+    'mês': 'month',
+    'meses': 'months',
+    'ano': 'year',
+    'anos': 'years',
+    'hora': 'hour',
+    'horas': 'hours',
+    'preço': 'price',
+    'valor': 'value',
+    'pedido': 'order',
+    'pedidos': 'orders',
+    'produto': 'product',
+    'produtos': 'products',
+    'serviço': 'service',
+    'serviços': 'services',
+    'venda': 'sale',
+    'vendas': 'sales',
+    'compra': 'purchase',
+    'pagamento': 'payment',
+    'conta': 'account',
+    'senha': 'password',
+    'arquivo': 'file',
+    'arquivos': 'files',
+    'texto': 'text',
+    'textos': 'texts',
+    'palavra': 'word',
+    'palavras': 'words',
+    'pergunta': 'question',
+    'perguntas': 'questions',
+    'resposta': 'answer',
+    'respostas': 'answers',
+    'exemplo': 'example',
+    'informação': 'information',
+    'informações': 'information',
+    'documento': 'document',
+    'documentos': 'documents',
+    'código': 'code',
+    'erro': 'error',
+    'erros': 'errors',
+    'teste': 'test',
+    'testes': 'tests',
+    'banco de dados': 'database',
+    'página': 'page',
+    'site': 'website',
+    'mensagem': 'message',
+    'mensagens': 'messages',
+    'desconto': 'discount',
+    'resultado': 'result',
+    'resultados': 'results',
+    'objetivo': 'goal',
+    'processo': 'process',
+    'mercado': 'market',
+    'contrato': 'contract',
+    'novo': 'new',
+    'nova': 'new',
+    'novos': 'new',
+    'novas': 'new',
+    'grande': 'large',
+    'grandes': 'large',
+    'pequeno': 'small',
+    'pequena': 'small',
+    'bom': 'good',
+    'boa': 'good',
+    'melhor': 'better',
+    'pior': 'worse',
+    'importante': 'important',
+    'importantes': 'important',
+    'rápido': 'fast',
+    'rápida': 'fast',
+    'lento': 'slow',
+    'fácil': 'easy',
+    'difícil': 'difficult',
+    'possível': 'possible',
+    'necessário': 'necessary',
+    'urgente': 'urgent',
+    'primeiro': 'first',
+    'primeira': 'first',
+    'último': 'last',
+    'última': 'last',
+}
+
+
+def get_pt_en_glossary() -> Dict[str, str]:
+    glossary = {}
+    glossary.update(PHRASES)
+    glossary.update(FUNCTION_WORDS)
+    glossary.update(VERBS)
+    glossary.update(NOUNS_AND_ADJECTIVES)
+    return glossary
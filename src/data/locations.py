@@ -1,4 +1,7 @@
-﻿from typing import Dict, List
+﻿from functools import lru_cache
+from typing import Dict, List
+
+from src.utils.accents import fold_accents
 
 BRAZILIAN_STATES = [
     'Acre', 'Alagoas', 'Amapá', 'Amazonas', 'Bahia', 'Ceará',
@@ -103,22 +106,23 @@ def get_all_locations() -> Dict[str, str]:
     return all_locations
 
 def normalize_text(text: str) -> str:
-    import unicodedata
-    normalized = unicodedata.normalize('NFD', text.lower())
-    return ''.join(c for c in normalized if unicodedata.category(c) != 'Mn')
+    return fold_accents(text.lower())
+
+@lru_cache(maxsize=1)
+def _normalized_locations() -> Dict[str, str]:
+    # Primeira ocorrência vence, como na busca linear anterior.
+    normalized: Dict[str, str] = {}
+    for location, abbrev in get_all_locations().items():
+        normalized.setdefault(normalize_text(location), abbrev)
+    return normalized
 
 def find_location_match(text: str) -> str:
     all_locations = get_all_locations()
-    text_normalized = normalize_text(text)
     
     if text in all_locations:
         return all_locations[text]
     
-    for location, abbrev in all_locations.items():
-        if normalize_text(location) == text_normalized:
-            return abbrev
-    
-    return None
+    return _normalized_locations().get(normalize_text(text))
 
 def is_known_location(text: str) -> bool:
     match = find_location_match(text)
@@ -1,4 +1,5 @@
 ﻿import re
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 
 IMPORTANT_NUMBER_PATTERNS = [
@@ -19,60 +20,85 @@ IMPORTANT_NUMBER_PATTERNS = [
     r'\b\d+[.,]\s*\d+[.,]?\s*\d*',
 ]
 
+MEASUREMENT_UNITS = frozenset({
+    'kg', 'g', 'mg', 'ton', 't',  # peso
+    'km', 'm', 'cm', 'mm',        # distância
+    'l', 'ml', 'cl',              # volume
+    'h', 'min', 's', 'ms',        # tempo
+    'º', '°', 'c',                # temperatura/ângulo
+
+    'mb', 'gb', 'tb', 'kb',       # armazenamento
+    'hz', 'khz', 'mhz', 'ghz',    # frequência
+    'v', 'w', 'kw', 'mw',         # elétrica
+    'a', 'ma', 'ka',              # corrente
+
+    'r$', 'usd', 'eur', '$',      # moedas
+
+    '%', 'pct', 'x', '×',         # operações
+})
+
+CONTEXT_KEYWORDS = {
+    'financial': ['preço', 'custo', 'valor', 'price', 'cost', 'value', 'real', 'dollar', 'euro'],
+    'measurement': ['metros', 'km', 'kg', 'litros', 'meters', 'kilometers', 'kilograms'],
+    'temporal': ['anos', 'meses', 'dias', 'horas', 'years', 'months', 'days', 'hours'],
+    'version': ['versão', 'version', 'release', 'update'],
+    'quantity': ['quantidade', 'total', 'quantity', 'amount']
+}
+
+_DIGIT = re.compile(r'\d')
+
+# Tokens classificados sem contexto (position == 0) ficam em cache; o
+# resultado só depende do próprio token.
+TOKEN_CACHE_SIZE = 65536
+
+
 class NumberPreservationService:
     
-    def __init__(self):
-        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in IMPORTANT_NUMBER_PATTERNS]
-        self.context_keywords = {
-            'financial': ['preço', 'custo', 'valor', 'price', 'cost', 'value', 'real', 'dollar', 'euro'],
-            'measurement': ['metros', 'km', 'kg', 'litros', 'meters', 'kilometers', 'kilograms'],
-            'temporal': ['anos', 'meses', 'dias', 'horas', 'years', 'months', 'days', 'hours'],
-            'version': ['versão', 'version', 'release', 'update'],
-            'quantity': ['quantidade', 'total', 'quantity', 'amount']
-        }
-    
-    def is_important_number(self, text: str, position: int = 0, context_window: int = 50) -> Tuple[bool, str]:
-        text_clean = text.strip()
-        
-        if re.search(r'\d', text_clean):
+    def __init__(self, patterns: Optional[List[str]] = None):
+        patterns = IMPORTANT_NUMBER_PATTERNS if patterns is None else list(patterns)
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        # Todos os padrões padrão exigem um dígito, e tokens com dígito já são
+        # importantes antes deles; só padrões customizados precisam rodar.
+        self._patterns_need_digits = tuple(patterns) == tuple(IMPORTANT_NUMBER_PATTERNS)
+        self.context_keywords = CONTEXT_KEYWORDS
+        self._classify_token = lru_cache(maxsize=TOKEN_CACHE_SIZE)(self._classify)
+
+    def _matches_pattern(self, text: str) -> bool:
+        if self._patterns_need_digits:
+            return False
+        return any(pattern.search(text) for pattern in self.patterns)
+
+    def _classify(self, text: str) -> Tuple[bool, str]:
+        if _DIGIT.search(text):
             return True, "contains_digits"
-        
-        measurement_units = {
-            'kg', 'g', 'mg', 'ton', 't',  # peso
-            'km', 'm', 'cm', 'mm',        # distância  
-            'l', 'ml', 'cl',              # volume
-            'h', 'min', 's', 'ms',        # tempo
-            'º', '°', 'c',                # temperatura/ângulo
-            
-            'mb', 'gb', 'tb', 'kb',       # armazenamento
-            'hz', 'khz', 'mhz', 'ghz',    # frequência
-            'v', 'w', 'kw', 'mw',         # elétrica
-            'a', 'ma', 'ka',              # corrente
-            
-            'r$', 'usd', 'eur', '$',      # moedas
-            
-            '%', 'pct', 'x', '×',         # operações
-        }
-        
-        text_lower = text_clean.lower().strip('.,!?()[]{}')
-        if text_lower in measurement_units:
+
+        text_clean = text.strip()
+        if text_clean.lower().strip('.,!?()[]{}') in MEASUREMENT_UNITS:
             return True, 'measurement_unit'
-        
-        for pattern in self.patterns:
-            if pattern.search(text_clean):
-                return True, "matched_pattern"
-        
-        if position > 0:
-            start = max(0, position - context_window)
-            end = min(len(text), position + context_window)
-            context = text[start:end].lower()
-            
-            for category, keywords in self.context_keywords.items():
-                if any(keyword in context for keyword in keywords):
-                    return True, f"context_{category}"
-        
+
+        if self._matches_pattern(text_clean):
+            return True, "matched_pattern"
+
         return False, "no_importance_indicators"
     
+    def is_important_number(self, text: str, position: int = 0, context_window: int = 50) -> Tuple[bool, str]:
+        if position <= 0:
+            return self._classify_token(text)
+
+        result = self._classify(text)
+        if result[0]:
+            return result
+
+        start = max(0, position - context_window)
+        end = min(len(text), position + context_window)
+        context = text[start:end].lower()
+
+        for category, keywords in self.context_keywords.items():
+            if any(keyword in context for keyword in keywords):
+                return True, f"context_{category}"
+
+        return result
+    
     def extract_important_numbers(self, text: str) -> List[Dict]:
         important_numbers = []
         
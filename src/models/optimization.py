@@ -1,5 +1,5 @@
-﻿from dataclasses import dataclass
-from typing import Dict, Any, Optional
+﻿from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
 
 
 @dataclass
@@ -19,6 +19,55 @@ class OptimizationStats:
     compression_ratio_percent: float
     characters_saved: int
 
+    @classmethod
+    def measure(cls, original_length: int, optimized_length: int) -> 'OptimizationStats':
+        compression_percentage = (
+            ((original_length - optimized_length) / original_length * 100)
+            if original_length > 0 else 0
+        )
+        return cls(
+            original_length=original_length,
+            optimized_length=optimized_length,
+            compression_ratio_percent=round(compression_percentage, 2),
+            characters_saved=original_length - optimized_length
+        )
+
+
+@dataclass
+class StageSavings:
+    stage: str
+    characters_saved: int
+
+
+@dataclass
+class EditSpan:
+    stage: str
+    original: str
+    replacement: str
+    # Offsets no texto original.
+    start: int
+    end: int
+    category: str
+
+
+@dataclass
+class PreservedEntity:
+    text: str
+    entity_type: str
+    preservation_level: str
+    start: int
+    end: int
+
+
+@dataclass
+class OptimizationExplanation:
+    stages: List[StageSavings] = field(default_factory=list)
+    edits: List[EditSpan] = field(default_factory=list)
+    entities: List[PreservedEntity] = field(default_factory=list)
+
+    def record_stage(self, stage: str, before: str, after: str) -> None:
+        self.stages.append(StageSavings(stage, len(before) - len(after)))
+
 
 @dataclass
 class OptimizationResponse:
@@ -26,9 +75,86 @@ class OptimizationResponse:
     optimized_text: str
     stats: OptimizationStats
     config_used: Dict[str, Any]
+    explanation: Optional[OptimizationExplanation] = None
+    # Etapas puladas por falta de tempo; None quando a requisição não tinha prazo.
+    skipped_stages: Optional[List[str]] = None
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.skipped_stages)
+
+
+@dataclass
+class MessageResult:
+    role: str
+    original_content: str
+    content: str
+    stats: OptimizationStats
+    # optimized, cache (mensagem já vista em outra requisição), duplicate
+    # (repetida nesta requisição) ou unchanged (papel sem otimização).
+    source: str
+
+
+@dataclass
+class MessagesResponse:
+    messages: List[MessageResult]
+    stats: OptimizationStats
+    counts: Dict[str, int]
 
 
 @dataclass
 class PresetConfig:
     description: str
     config: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class OptimizationPlan:
+    config: Dict[str, Any]
+    translate_to_english: bool = False
+    language: str = 'pt'
+    stop_word_removal: float = 0.0
+    remove_accents: bool = False
+    word_compression: float = 1.0
+    min_word_length: int = 2
+    remove_punctuation: bool = False
+    abbreviation_level: float = 0.5
+    preserve_entities: bool = True
+    translation_backend: Optional[str] = None
+    custom_matcher: Optional[Any] = None
+
+
+@dataclass
+class StoredPreset:
+    id: str
+    tenant: str
+    name: str
+    description: str
+    config: Dict[str, Any]
+    created_at: float
+    updated_at: float
+    plan: Optional[OptimizationPlan] = None
+
+
+@dataclass
+class CompiledTemplate:
+    # Trechos fixos já otimizados, um a mais que os placeholders.
+    static_parts: List[str]
+    # Dicionários do tenant usados na compilação; outros exigem recompilar.
+    tenant_matcher: Optional[Any] = None
+
+
+@dataclass
+class StoredTemplate:
+    id: str
+    tenant: str
+    name: str
+    template: str
+    config: Dict[str, Any]
+    created_at: float
+    updated_at: float
+    # Texto fixo entre os placeholders e os nomes deles, na ordem do modelo.
+    literals: List[str] = field(default_factory=list)
+    slots: List[str] = field(default_factory=list)
+    plan: Optional[OptimizationPlan] = None
+    compiled: Optional[CompiledTemplate] = None
@@ -0,0 +1,216 @@
+﻿"""
+Controle de admissão das requisições de otimização.
+
+Cada worker aceita no máximo `capacity` unidades de trabalho simultâneas, com o
+peso de cada requisição proporcional ao tamanho do corpo; acima disso responde
+503 na hora, em vez de enfileirar. Cada cliente (uma chave de `API_KEYS` no
+header X-API-KEY, ou o IP sem chave conhecida) tem um balde de fichas; sem
+fichas a resposta é 429. Os baldes ficam em
+memória ou, com `RATE_LIMIT_DB_PATH`, num SQLite compartilhado pelos workers da
+máquina.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from src.config.settings import Config
+from src.utils.rate_limiting import TokenBucket
+
+
+class InFlightBudget:
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_flight = 0
+        self.peak = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def weight(self, size: int, unit: int) -> int:
+        # Uma requisição maior que o orçamento inteiro ainda entra quando o
+        # worker está livre.
+        return min(1 + size // unit, self.capacity)
+
+    def try_enter(self, weight: int) -> bool:
+        with self._lock:
+            if self.in_flight + weight > self.capacity:
+                self.rejected += 1
+                return False
+            self.in_flight += weight
+            self.peak = max(self.peak, self.in_flight)
+            self.admitted += 1
+            return True
+
+    def leave(self, weight: int) -> None:
+        with self._lock:
+            self.in_flight -= weight
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'capacity': self.capacity,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak,
+            'admitted': self.admitted,
+            'rejected': self.rejected
+        }
+
+
+class MemoryBucketStore:
+    """Baldes por cliente no próprio worker, com os menos usados descartados."""
+
+    def __init__(self, max_clients: int = 10000):
+        self.max_clients = max_clients
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.failures = 0
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, capacity)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+        return bucket.try_acquire()
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBucketStore:
+    """Baldes por cliente num SQLite local, compartilhados entre os workers.
+
+    O relógio é o de parede, comum aos processos; a leitura e a gravação de
+    cada balde acontecem na mesma transação. Com o banco travado por mais de
+    `timeout` segundos a requisição passa sem limite, em vez de virar um 500.
+    A cada `prune_every` gravações, os baldes parados há tempo suficiente para
+    encher de novo são apagados: equivalem a um cliente novo.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        timeout: float = 1.0,
+        prune_every: int = 1000,
+        clock: Callable[[], float] = time.time
+    ):
+        self.db_path = db_path
+        self.timeout = timeout
+        self.prune_every = prune_every
+        self.clock = clock
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.failures = 0
+        self.pruned = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if self.db_path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            connection = sqlite3.connect(
+                self.db_path, check_same_thread=False, isolation_level=None, timeout=self.timeout
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+            )
+            self._connection = connection
+        return self._connection
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        with self._lock:
+            try:
+                return self._take(key, rate, capacity)
+            except sqlite3.OperationalError as e:
+                self.failures += 1
+                logging.warning(f"Limite por cliente indisponível, requisição liberada: {e}")
+                return 0.0
+
+    def _take(self, key: str, rate: float, capacity: float) -> float:
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            now = self.clock()
+            row = connection.execute(
+                'SELECT tokens, updated_at FROM rate_limits WHERE key = ?', (key,)
+            ).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+            delay = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                delay = (1 - tokens) / rate
+            connection.execute(
+                'INSERT OR REPLACE INTO rate_limits (key, tokens, updated_at) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            self._writes += 1
+            pruned = 0
+            if self.prune_every > 0 and self._writes % self.prune_every == 0:
+                pruned = connection.execute(
+                    'DELETE FROM rate_limits WHERE updated_at < ?', (now - capacity / rate,)
+                ).rowcount
+            connection.execute('COMMIT')
+            self.pruned += pruned
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+        return delay
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class ClientRateLimiter:
+
+    def __init__(self, rate: float, burst: int, store, api_keys: Iterable[str] = ()):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.store = store
+        self.api_keys = frozenset(api_keys)
+        self.limited = 0
+
+    def client_key(self, api_key: Optional[str], remote_addr: Optional[str]) -> str:
+        # Só chaves configuradas têm balde próprio: trocar de chave a cada
+        # requisição não escapa do balde do IP. As chaves não são guardadas em
+        # claro, nem na memória nem no SQLite.
+        identity = f'key:{api_key}' if api_key in self.api_keys else f'ip:{remote_addr}'
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()[:32]
+
+    def check(self, key: str) -> float:
+        """Consome uma ficha do cliente; devolve 0 ou a espera (s) até a próxima."""
+        delay = self.store.take(key, self.rate, self.burst)
+        if delay > 0:
+            self.limited += 1
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'limited': self.limited,
+            'store_failures': self.store.failures
+        }
+
+
+def build_rate_limiter(config: Config) -> Optional[ClientRateLimiter]:
+    if config.CLIENT_RATE_LIMIT <= 0:
+        return None
+    if config.RATE_LIMIT_DB_PATH:
+        store = SQLiteBucketStore(config.RATE_LIMIT_DB_PATH)
+    else:
+        store = MemoryBucketStore()
+    return ClientRateLimiter(config.CLIENT_RATE_LIMIT, config.CLIENT_RATE_BURST, store, config.API_KEYS)
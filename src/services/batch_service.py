@@ -0,0 +1,291 @@
+﻿"""
+Processamento em lote com buffers em memória compartilhada.
+
+Os textos de entrada ficam em um segmento `multiprocessing.shared_memory` (ou,
+para arquivos, no próprio arquivo mapeado com mmap por cada worker) e uma tabela
+de offsets indica onde cada registro começa e termina e qual região do buffer de
+saída está reservada para o seu resultado. Os workers leem a entrada e gravam a
+saída diretamente nesses buffers; entre processos só trafegam os intervalos de
+índices de cada tarefa e os tamanhos dos resultados. Um resultado maior que a
+região reservada volta pelo pipe, como exceção.
+"""
+import json
+import mmap
+import multiprocessing
+import os
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from src.config.settings import Config
+
+Span = Tuple[int, int]
+
+# Cada linha da tabela de offsets: início e fim na entrada, início e
+# capacidade na saída (int64).
+_ROW = 4
+
+
+def output_capacity(length: int) -> int:
+    # Resultados costumam ser menores que a entrada; a folga cobre tradução
+    # e a regravação de linhas JSONL.
+    return length + length // 4 + 64
+
+
+def transform_record(service, plan, json_field: Optional[str], raw: bytes) -> bytes:
+    if json_field is not None:
+        if not raw.strip():
+            return raw
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            # Linhas JSONL inválidas são copiadas sem alteração.
+            return raw
+        value = record.get(json_field) if isinstance(record, dict) else None
+        if not isinstance(value, str):
+            return raw
+        record[json_field] = service.optimize(value, plan.config, plan=plan).optimized_text
+        return json.dumps(record, ensure_ascii=False).encode('utf-8')
+
+    text = raw.decode('utf-8', errors='replace')
+    return service.optimize(text, plan.config, plan=plan).optimized_text.encode('utf-8')
+
+
+_worker_state = None
+# Segmentos já abertos pelo worker, por papel: (nome, recurso, memoryview).
+_attached: Dict[str, Tuple[str, Any, memoryview]] = {}
+
+
+def _load_worker_state(config_options: Dict[str, Any], json_field: Optional[str]) -> None:
+    global _worker_state
+    from src.services.optimization_service import OptimizationService
+    service = OptimizationService(Config())
+    service.preload(config_options)
+    _worker_state = (service, service.build_plan(config_options), json_field)
+
+
+def _init_worker(config_options: Dict[str, Any], json_field: Optional[str]) -> None:
+    # Com fork os filhos herdam o serviço já carregado pelo processo principal.
+    if _worker_state is None:
+        _load_worker_state(config_options, json_field)
+
+
+def _open_segment(name: str) -> shared_memory.SharedMemory:
+    # O segmento pertence ao processo principal, que o remove ao final. Antes
+    # do Python 3.13 abrir um segmento sempre o registra no resource tracker,
+    # compartilhado com o processo principal (ver BatchService._get_pool).
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _attach(role: str, kind: str, name: str) -> memoryview:
+    current = _attached.get(role)
+    if current is not None and current[0] == name:
+        return current[2]
+    if current is not None:
+        current[2].release()
+        current[1].close()
+
+    if kind == 'file':
+        with open(name, 'rb') as source:
+            resource = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(resource)
+    else:
+        resource = _open_segment(name)
+        view = resource.buf
+    if role == 'table':
+        view = view.cast('q')
+
+    _attached[role] = (name, resource, view)
+    return view
+
+
+def _run_task(
+    input_kind: str,
+    input_name: str,
+    table_name: str,
+    output_name: str,
+    first: int,
+    last: int
+) -> Tuple[List[int], Dict[int, bytes]]:
+    service, plan, json_field = _worker_state
+    source = _attach('input', input_kind, input_name)
+    table = _attach('table', 'shm', table_name)
+    output = _attach('output', 'shm', output_name)
+
+    lengths: List[int] = []
+    overflow: Dict[int, bytes] = {}
+    for index in range(first, last):
+        row = index * _ROW
+        in_start, in_end, out_start, capacity = table[row], table[row + 1], table[row + 2], table[row + 3]
+        result = transform_record(service, plan, json_field, bytes(source[in_start:in_end]))
+        if len(result) <= capacity:
+            output[out_start:out_start + len(result)] = result
+            lengths.append(len(result))
+        else:
+            lengths.append(-1)
+            overflow[index] = result
+    return lengths, overflow
+
+
+class _SharedBuffer:
+    """Segmento de memória compartilhada reaproveitado entre janelas."""
+
+    def __init__(self):
+        self.segment: Optional[shared_memory.SharedMemory] = None
+
+    def ensure(self, size: int) -> shared_memory.SharedMemory:
+        if self.segment is None or self.segment.size < size:
+            self.release()
+            self.segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        return self.segment
+
+    def release(self) -> None:
+        if self.segment is not None:
+            self.segment.close()
+            self.segment.unlink()
+            self.segment = None
+
+
+class BatchService:
+    """Otimiza muitos registros em paralelo usando buffers compartilhados.
+
+    `map_file` e `optimize_texts` devolvem os resultados na ordem da entrada.
+    Os itens produzidos por `map_file` podem ser `memoryview`s sobre o buffer de
+    saída e só valem até a próxima iteração.
+    """
+
+    def __init__(
+        self,
+        config_options: Dict[str, Any],
+        workers: Optional[int] = None,
+        json_field: Optional[str] = None,
+        window_bytes: int = 8 * 1024 * 1024
+    ):
+        self.config_options = config_options
+        self.workers = workers or os.cpu_count() or 1
+        self.json_field = json_field
+        self.window_bytes = window_bytes
+        self._pool = None
+        self._input = _SharedBuffer()
+        self._table = _SharedBuffer()
+        self._output = _SharedBuffer()
+        _load_worker_state(config_options, json_field)
+
+    def __enter__(self) -> 'BatchService':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        for buffer in (self._input, self._table, self._output):
+            buffer.release()
+
+    def map_file(self, path: str, batches: Iterable[Sequence[Span]]) -> Iterator[List[Union[bytes, memoryview]]]:
+        """Para cada lote de intervalos (início, fim) do arquivo, gera os resultados do lote."""
+        if self.workers <= 1:
+            yield from self._map_file_inline(path, batches)
+            return
+
+        window: List[Sequence[Span]] = []
+        window_size = 0
+        for spans in batches:
+            window.append(spans)
+            window_size += sum(end - start for start, end in spans)
+            if window_size >= self.window_bytes or len(window) >= self.workers * 4:
+                yield from self._run_window('file', path, window)
+                window, window_size = [], 0
+        if window:
+            yield from self._run_window('file', path, window)
+
+    def optimize_texts(self, texts: Sequence[str], batch_size: int = 256) -> List[str]:
+        encoded = [text.encode('utf-8') for text in texts]
+        if self.workers <= 1:
+            service, plan, json_field = _worker_state
+            return [transform_record(service, plan, json_field, raw).decode('utf-8') for raw in encoded]
+
+        segment = self._input.ensure(sum(len(raw) for raw in encoded))
+        spans: List[Span] = []
+        position = 0
+        for raw in encoded:
+            segment.buf[position:position + len(raw)] = raw
+            spans.append((position, position + len(raw)))
+            position += len(raw)
+        del encoded
+
+        batches = [spans[i:i + batch_size] for i in range(0, len(spans), batch_size)]
+        results: List[str] = []
+        for outputs in self._run_window('shm', segment.name, batches):
+            results.extend(bytes(output).decode('utf-8') for output in outputs)
+        return results
+
+    def _get_pool(self):
+        if self._pool is None:
+            # Os workers herdam o resource tracker já em execução; sem isso cada
+            # um iniciaria o seu e removeria os segmentos ao terminar.
+            resource_tracker.ensure_running()
+            self._pool = multiprocessing.Pool(self.workers, _init_worker, (self.config_options, self.json_field))
+        return self._pool
+
+    def _map_file_inline(self, path: str, batches: Iterable[Sequence[Span]]) -> Iterator[List[bytes]]:
+        service, plan, json_field = _worker_state
+        with open(path, 'rb') as source, mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for spans in batches:
+                yield [transform_record(service, plan, json_field, data[start:end]) for start, end in spans]
+
+    def _run_window(
+        self,
+        input_kind: str,
+        input_name: str,
+        batches: List[Sequence[Span]]
+    ) -> Iterator[List[Union[bytes, memoryview]]]:
+        pool = self._get_pool()
+        count = sum(len(spans) for spans in batches)
+
+        table_segment = self._table.ensure(count * _ROW * 8)
+        table = table_segment.buf.cast('q')
+        output_starts: List[int] = []
+        tasks: List[Tuple[int, int]] = []
+        index = output_size = 0
+        try:
+            for spans in batches:
+                first = index
+                for start, end in spans:
+                    row = index * _ROW
+                    capacity = output_capacity(end - start)
+                    table[row], table[row + 1], table[row + 2], table[row + 3] = start, end, output_size, capacity
+                    output_starts.append(output_size)
+                    output_size += capacity
+                    index += 1
+                tasks.append((first, index))
+        finally:
+            table.release()
+
+        output_segment = self._output.ensure(output_size)
+        results = [
+            pool.apply_async(_run_task, (input_kind, input_name, table_segment.name, output_segment.name, first, last))
+            for first, last in tasks
+        ]
+
+        view = output_segment.buf
+        for (first, _), result in zip(tasks, results):
+            lengths, overflow = result.get()
+            outputs: List[Union[bytes, memoryview]] = []
+            for offset, length in enumerate(lengths):
+                if length < 0:
+                    outputs.append(overflow[first + offset])
+                else:
+                    start = output_starts[first + offset]
+                    outputs.append(view[start:start + length])
+            try:
+                yield outputs
+            finally:
+                for output in outputs:
+                    if isinstance(output, memoryview):
+                        output.release()
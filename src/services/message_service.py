@@ -0,0 +1,131 @@
+﻿"""
+Otimização de conversas (listas de mensagens com papel).
+
+Cada mensagem é otimizada isolada, com a configuração do seu papel, então as
+fronteiras entre mensagens nunca se misturam. Uma conversa reenvia o histórico
+inteiro a cada turno: mensagens repetidas na mesma requisição são otimizadas
+uma vez, e as já vistas em requisições anteriores saem de um LRU por worker.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from src.models.optimization import MessageResult, MessagesResponse, OptimizationPlan, OptimizationStats
+
+# Papel que vale para todas as mensagens anteriores à última, quando o papel
+# da mensagem não tem configuração própria.
+HISTORY_ROLE = 'history'
+
+
+class MessageOptimizer:
+
+    def __init__(self, optimizer, cache_size: int):
+        self.optimizer = optimizer
+        self.cache_size = cache_size
+        # Chave: tenant, configuração e hash do conteúdo; o conteúdo em si não
+        # fica guardado, só o resultado.
+        self._cache: 'OrderedDict[Tuple[str, str, bytes], Tuple[Any, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def optimize(
+        self,
+        messages: Sequence[Tuple[str, str]],
+        default_plan: OptimizationPlan,
+        role_plans: Dict[str, Optional[OptimizationPlan]],
+        tenant: str
+    ) -> MessagesResponse:
+        """Otimiza `(papel, conteúdo)` com o plano do papel, `history` ou o padrão.
+
+        Um papel mapeado para None mantém suas mensagens sem alteração.
+        """
+        matcher = self.optimizer.custom_dictionaries.get_matcher(tenant)
+        seen: Dict[Tuple[str, bytes], str] = {}
+        config_keys: Dict[int, str] = {}
+        counts = {'optimized': 0, 'cache': 0, 'duplicate': 0, 'unchanged': 0}
+        results = []
+        last = len(messages) - 1
+
+        for index, (role, content) in enumerate(messages):
+            plan = self._plan_for(role, index < last, default_plan, role_plans)
+            if plan is None:
+                source, optimized = 'unchanged', content
+            else:
+                config_key = config_keys.get(id(plan))
+                if config_key is None:
+                    config_key = config_keys[id(plan)] = json.dumps(plan.config, sort_keys=True, default=str)
+                key = (config_key, hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest())
+                if key in seen:
+                    source, optimized = 'duplicate', seen[key]
+                else:
+                    cacheable = self._cacheable(plan)
+                    optimized = self._cached(tenant, key, matcher) if cacheable else None
+                    source = 'cache'
+                    if optimized is None:
+                        source = 'optimized'
+                        optimized = self.optimizer.optimize(content, plan.config, tenant=tenant, plan=plan).optimized_text
+                        if cacheable:
+                            self._store(tenant, key, matcher, optimized)
+                    seen[key] = optimized
+            counts[source] += 1
+            results.append(MessageResult(
+                role=role,
+                original_content=content,
+                content=optimized,
+                stats=OptimizationStats.measure(len(content), len(optimized)),
+                source=source
+            ))
+
+        return MessagesResponse(
+            messages=results,
+            stats=OptimizationStats.measure(
+                sum(r.stats.original_length for r in results),
+                sum(r.stats.optimized_length for r in results)
+            ),
+            counts=counts
+        )
+
+    @staticmethod
+    def _plan_for(
+        role: str,
+        in_history: bool,
+        default_plan: OptimizationPlan,
+        role_plans: Dict[str, Optional[OptimizationPlan]]
+    ) -> Optional[OptimizationPlan]:
+        if role in role_plans:
+            return role_plans[role]
+        if in_history and HISTORY_ROLE in role_plans:
+            return role_plans[HISTORY_ROLE]
+        return default_plan
+
+    def _cacheable(self, plan: OptimizationPlan) -> bool:
+        # Os trechos traduzidos remotamente já têm o cache do serviço de tradução.
+        return not self.optimizer.uses_remote_translation(plan)
+
+    def _cached(self, tenant: str, key: Tuple[str, bytes], matcher: Any) -> Optional[str]:
+        if self.cache_size <= 0:
+            return None
+        with self._lock:
+            entry = self._cache.get((tenant, *key))
+            # Resultados de antes de uma troca dos dicionários do tenant não valem.
+            if entry is None or entry[0] is not matcher:
+                self.misses += 1
+                return None
+            self._cache.move_to_end((tenant, *key))
+            self.hits += 1
+            return entry[1]
+
+    def _store(self, tenant: str, key: Tuple[str, bytes], matcher: Any, optimized: str) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[(tenant, *key)] = (matcher, optimized)
+            self._cache.move_to_end((tenant, *key))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses}
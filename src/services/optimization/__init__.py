@@ -1,16 +1,25 @@
-﻿from .abbreviation_service import AbbreviationService, ReplacementResult
+﻿from .abbreviation_service import AbbreviationService, AbbreviationMatcher, ReplacementResult
 from .entity_preservation_service import (
     EntityPreservationService, 
     Entity, 
     EntityType, 
     PreservationLevel
 )
+from .custom_dictionary_service import (
+    CustomDictionaryService,
+    CustomDictionary,
+    DEFAULT_TENANT
+)
 
 __all__ = [
     'AbbreviationService',
+    'AbbreviationMatcher',
     'ReplacementResult', 
     'EntityPreservationService',
     'Entity',
     'EntityType',
-    'PreservationLevel'
+    'PreservationLevel',
+    'CustomDictionaryService',
+    'CustomDictionary',
+    'DEFAULT_TENANT'
 ]
@@ -1,12 +1,11 @@
-﻿import re
-from typing import Dict, List, Tuple, Optional
+﻿import math
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple, Optional
 from dataclasses import dataclass
 
-from src.data.locations import get_all_locations, find_location_match, LOCATION_VARIATIONS
-from src.data.animals import get_all_nature
-from src.data.technology import get_all_tech_terms
-from src.data.abbreviations import get_all_abbreviations
-from src.data.numbers import NumberPreservationService
+from src.utils.offsets import OffsetMap
+
 
 @dataclass
 class ReplacementResult:
@@ -15,85 +14,270 @@ class ReplacementResult:
     position: int
     savings: int
     category: str = "general"
+    # Posição no texto de origem (o recebido por `apply_abbreviations` ou o do
+    # mapa de posições); `position` é relativa ao texto da passada.
+    source_start: Optional[int] = None
+    source_end: Optional[int] = None
+
+
+class _EditRecorder:
+    """Registra as substituições de cada passada num `OffsetMap`.
+
+    Com `collect` também monta os `ReplacementResult`, com a posição de origem
+    de cada um; sem ele só guarda os trechos alterados.
+    """
+
+    def __init__(self, offsets: OffsetMap, collect: bool):
+        self.offsets = offsets
+        self.collect = collect
+        self.replacements: List[ReplacementResult] = []
+        self._spans: List[Tuple[int, int, int]] = []
+        self._pass_start = 0
+
+    def add(self, matched_text: str, replacement: str, position: int, category: str) -> None:
+        self._spans.append((position, position + len(matched_text), len(replacement)))
+        if self.collect:
+            self.replacements.append(ReplacementResult(
+                original=matched_text,
+                replacement=replacement,
+                position=position,
+                savings=len(matched_text) - len(replacement),
+                category=category
+            ))
+
+    def end_pass(self) -> None:
+        if not self._spans:
+            return
+        if self.collect:
+            for result in self.replacements[self._pass_start:]:
+                result.source_start, result.source_end = self.offsets.to_source_span(
+                    result.position, result.position + len(result.original)
+                )
+            self._pass_start = len(self.replacements)
+        self.offsets.apply(self._spans)
+        self._spans = []
+
+
+_LOCATION_VARIATION_PATTERNS = tuple(
+    (re.compile(pattern), abbrev, category)
+    for pattern, abbrev, category in (
+        (r'\b[Cc]ear[aá]\b', 'CE', 'location'),
+        (r'\b[Ss][ãa]o\s+[Pp]aulo\b', 'SP', 'location'),
+        (r'\b[Rr]io\s+de\s+[Jj]aneiro\b', 'RJ', 'location'),
+        (r'\b[Bb]ras[ií]lia\b', 'BSB', 'location'),
+        (r'\b[Mm]inas\s+[Gg]erais\b', 'MG', 'location'),
+    )
+)
+
+# A agressividade vira chave de cache arredondada para cima em passos de
+# 1/20: o matcher do nível cobre todas as entradas do valor exato, e
+# `_should_abbreviate` com o valor exato descarta as demais a cada casamento.
+_AGGRESSIVENESS_STEPS = 20
+_ACTIVE_MATCHERS_CACHE_SIZE = 2 * (_AGGRESSIVENESS_STEPS + 1)
+
+
+def savings_ratio(original: str, abbrev: str) -> float:
+    return (len(original) - len(abbrev)) / len(original)
+
+
+def quantize_aggressiveness(aggressiveness: float) -> float:
+    level = math.ceil(aggressiveness * _AGGRESSIVENESS_STEPS - 1e-9) / _AGGRESSIVENESS_STEPS
+    return min(1.0, max(0.0, level))
+
+
+def _build_trie_pattern(words: Iterable[str]) -> str:
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+
+class AbbreviationMatcher:
+    """Casa várias entradas em uma única passada sobre o texto.
+
+    As chaves viram uma trie em regex, então cada posição do texto é testada
+    uma vez, independentemente do número de entradas, e a chave mais longa vence.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[Tuple[str, str]],
+        lookbehind: str = r'(?<!\w)',
+        lookahead: str = r'(?!\w)'
+    ):
+        self.entries: Dict[str, Tuple[str, str]] = {}
+        for original, abbrev in sorted(entries, key=lambda x: len(x[0]), reverse=True):
+            if original:
+                self.entries.setdefault(original.lower(), (original, abbrev))
+
+        self.pattern: Optional[re.Pattern] = None
+        self.boundary_after = re.compile(lookahead)
+        if self.entries:
+            # Lookarounds em vez de `\b`: chaves que começam ou terminam em
+            # pontuação ("S.A.") também precisam casar.
+            self.pattern = re.compile(
+                lookbehind + _build_trie_pattern(self.entries) + lookahead,
+                re.IGNORECASE
+            )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
 
 class AbbreviationService:
     
     def __init__(self):
-        self.abbreviations = self._build_abbreviation_map()
-        self.number_service = NumberPreservationService()
+        # Dicionários e padrões são montados no primeiro uso: quem não aplica
+        # abreviações (abbreviation_level=0) não paga pela carga dos dados.
+        self._dictionaries = None
+        self._abbreviations: Optional[Dict[str, str]] = None
+        self._number_service = None
+        self._boundary_patterns: Optional[List[re.Pattern]] = None
+        self._ratio_index: Optional[Tuple[List[float], List[int]]] = None
+        self._active_matchers: Dict[Tuple[float, bool], AbbreviationMatcher] = {}
+
+    @property
+    def dictionaries(self):
+        if self._dictionaries is None:
+            from src.data.artifact import load_dictionaries
+            self._dictionaries = load_dictionaries()
+        return self._dictionaries
+
+    @property
+    def dictionary_version(self) -> str:
+        return self.dictionaries.checksum
+
+    @property
+    def abbreviations(self) -> Dict[str, str]:
+        if self._abbreviations is None:
+            self._abbreviations = self._build_abbreviation_map()
+        return self._abbreviations
+
+    @property
+    def number_service(self):
+        if self._number_service is None:
+            from src.data.numbers import NumberPreservationService
+            self._number_service = NumberPreservationService(self.dictionaries.number_patterns)
+        return self._number_service
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._dictionaries is not None
+
+    @property
+    def boundary_patterns(self) -> List[re.Pattern]:
+        # Padrões que podem casar através de espaços: variações de locais e
+        # entradas de várias palavras. Usados para escolher cortes seguros
+        # no modo streaming.
+        if self._boundary_patterns is None:
+            multi_word = AbbreviationMatcher(
+                (original, abbrev) for original, abbrev in self.dictionaries.abbreviations
+                if any(char.isspace() for char in original)
+            )
+            patterns = [regex for regex, _, _ in _LOCATION_VARIATION_PATTERNS]
+            if multi_word.pattern is not None:
+                patterns.append(multi_word.pattern)
+            self._boundary_patterns = patterns
+        return self._boundary_patterns
         
     def _build_abbreviation_map(self) -> Dict[str, str]:
-        all_abbrevs = {}
-        
-        all_abbrevs.update(get_all_locations())
-        all_abbrevs.update(get_all_nature())
-        all_abbrevs.update(get_all_tech_terms())
-        all_abbrevs.update(get_all_abbreviations())
-        
-        all_abbrevs.update(LOCATION_VARIATIONS)
-        
-        return all_abbrevs
+        return dict(self.dictionaries.abbreviations)
+
+    def _get_ratio_index(self) -> Tuple[List[float], List[int]]:
+        # Razões de economia em ordem crescente e o índice de cada entrada no
+        # artefato; entradas que não encurtam o texto ficam de fora.
+        if self._ratio_index is None:
+            ranked = sorted(
+                (savings_ratio(original, abbrev), index)
+                for index, (original, abbrev) in enumerate(self.dictionaries.abbreviations)
+                if len(abbrev) < len(original)
+            )
+            self._ratio_index = ([ratio for ratio, _ in ranked], [index for _, index in ranked])
+        return self._ratio_index
+
+    def active_matcher(self, aggressiveness: float, preserve_context: bool) -> AbbreviationMatcher:
+        """Um matcher com as entradas do dicionário global aplicáveis no nível da agressividade."""
+        key = (quantize_aggressiveness(aggressiveness), preserve_context)
+        matcher = self._active_matchers.get(key)
+        if matcher is None:
+            ratios, indices = self._get_ratio_index()
+            # Mesma condição de `_should_abbreviate`: razão >= 1 - agressividade.
+            first = bisect_left(ratios, 1.0 - key[0])
+            abbreviations = self.dictionaries.abbreviations
+            matcher = AbbreviationMatcher(
+                abbreviations[index] for index in indices[first:]
+                if not (preserve_context and self.number_service.is_important_number(abbreviations[index][0])[0])
+            )
+            if len(self._active_matchers) >= _ACTIVE_MATCHERS_CACHE_SIZE:
+                self._active_matchers.clear()
+            self._active_matchers[key] = matcher
+        return matcher
     
     def apply_abbreviations(
         self, 
         text: str, 
         aggressiveness: float = 0.5,
-        preserve_context: bool = True
+        preserve_context: bool = True,
+        extra_matchers: Iterable[AbbreviationMatcher] = (),
+        collect: bool = True,
+        offsets: Optional[OffsetMap] = None
     ) -> Tuple[str, List[ReplacementResult]]:
+        """Aplica as abreviações; com `collect=False` devolve o texto e uma lista vazia.
+
+        Com `offsets`, as substituições são registradas no mapa de posições e as
+        posições de origem dos resultados passam a ser relativas ao texto de
+        origem do mapa.
+        """
         processed_text = text
-        replacements = []
+        recorder = None
+        if collect or offsets is not None:
+            recorder = _EditRecorder(offsets if offsets is not None else OffsetMap(), collect)
         
-        processed_text, location_replacements = self._handle_location_variations(processed_text)
-        replacements.extend(location_replacements)
+        # Dicionários personalizados têm precedência e rodam antes do global,
+        # que não precisa ser recompilado para incluí-los.
+        for matcher in extra_matchers:
+            processed_text = self._apply_matcher(
+                processed_text, matcher, aggressiveness, preserve_context, recorder
+            )
         
-        sorted_abbrevs = sorted(
-            self.abbreviations.items(),
-            key=lambda x: len(x[0]),
-            reverse=True
-        )
+        processed_text = self._handle_location_variations(processed_text, recorder)
         
-        for original, abbrev in sorted_abbrevs:
-            if self._should_abbreviate(original, abbrev, aggressiveness):
-                new_text, found_replacements = self._replace_with_context(
-                    processed_text, original, abbrev, preserve_context
-                )
-                
-                if found_replacements:
-                    processed_text = new_text
-                    replacements.extend(found_replacements)
+        # Todo o dicionário global numa só passada; a trie faz a chave mais
+        # longa vencer, como a ordem do artefato fazia entrada a entrada.
+        processed_text = self._apply_matcher(
+            processed_text, self.active_matcher(aggressiveness, preserve_context),
+            aggressiveness, preserve_context, recorder, category='abbreviation'
+        )
         
-        return processed_text, replacements
+        return processed_text, recorder.replacements if recorder is not None else []
     
-    def _handle_location_variations(self, text: str) -> Tuple[str, List[ReplacementResult]]:
-        replacements = []
+    def _handle_location_variations(self, text: str, recorder: Optional[_EditRecorder] = None) -> str:
         processed_text = text
         
-        location_patterns = [
-            (r'\b[Cc]ear[aá]\b', 'CE', 'location'),
-            (r'\b[Ss][ãa]o\s+[Pp]aulo\b', 'SP', 'location'),
-            (r'\b[Rr]io\s+de\s+[Jj]aneiro\b', 'RJ', 'location'),
-            (r'\b[Bb]ras[ií]lia\b', 'BSB', 'location'),
-            (r'\b[Mm]inas\s+[Gg]erais\b', 'MG', 'location'),
-        ]
-        
-        for pattern, abbrev, category in location_patterns:
-            regex = re.compile(pattern)
-            for match in regex.finditer(processed_text):
-                original_text = match.group()
-                savings = len(original_text) - len(abbrev)
-                
-                if savings > 0:
-                    replacements.append(ReplacementResult(
-                        original=original_text,
-                        replacement=abbrev,
-                        position=match.start(),
-                        savings=savings,
-                        category=category
-                    ))
+        for regex, abbrev, category in _LOCATION_VARIATION_PATTERNS:
+            if recorder is None:
+                processed_text = regex.sub(abbrev, processed_text)
+                continue
+            
+            def replace_func(match, abbrev=abbrev, category=category):
+                recorder.add(match.group(), abbrev, match.start(), category)
+                return abbrev
             
-            processed_text = regex.sub(abbrev, processed_text)
+            processed_text = regex.sub(replace_func, processed_text)
+            recorder.end_pass()
         
-        return processed_text, replacements
+        return processed_text
     
     def _should_abbreviate(
         self, 
@@ -103,54 +287,76 @@ class AbbreviationService:
     ) -> bool:
         if len(abbrev) >= len(original):
             return False
-            
-        savings_ratio = (len(original) - len(abbrev)) / len(original)
+        
         min_savings_threshold = 1.0 - aggressiveness
         
-        return savings_ratio >= min_savings_threshold
+        return savings_ratio(original, abbrev) >= min_savings_threshold
     
-    def _replace_with_context(
-        self, 
-        text: str, 
-        original: str, 
-        abbrev: str,
-        preserve_context: bool
-    ) -> Tuple[str, List[ReplacementResult]]:
-        replacements = []
+    def _apply_matcher(
+        self,
+        text: str,
+        matcher: AbbreviationMatcher,
+        aggressiveness: float,
+        preserve_context: bool,
+        recorder: Optional[_EditRecorder] = None,
+        category: str = 'custom'
+    ) -> str:
+        if matcher.pattern is None:
+            return text
         
-        if preserve_context and self.number_service.is_important_number(original)[0]:
-            return text, []
-        
-        pattern = re.compile(r'\b' + re.escape(original) + r'\b', re.IGNORECASE)
+        def accepts(match) -> bool:
+            entry = matcher.entries.get(match.group().lower())
+            if entry is None:
+                return False
+            original, abbrev = entry
+            if not self._should_abbreviate(original, abbrev, aggressiveness):
+                return False
+            return not (preserve_context and self.number_service.is_important_number(original)[0])
         
-        def replace_func(match):
-            matched_text = match.group()
-            start_pos = match.start()
+        parts = []
+        position = 0
+        search_from = 0
+        while True:
+            match = matcher.pattern.search(text, search_from)
+            if match is None:
+                break
+            start = match.start()
+            if preserve_context and not self._is_safe_context(text, start):
+                # Nenhuma chave começando aqui passaria; uma mais adiante, sim.
+                search_from = start + 1
+                continue
+            # A mais longa recusada dá lugar a uma mais curta na mesma posição,
+            # como acontecia quando cada entrada tinha sua própria passada.
+            while match is not None and not accepts(match):
+                end = match.end() - 1
+                match = matcher.pattern.match(text, start, end) if end > start else None
+                while match is not None and not matcher.boundary_after.match(text, match.end()):
+                    end = match.end() - 1
+                    match = matcher.pattern.match(text, start, end) if end > start else None
+            if match is None:
+                search_from = start + 1
+                continue
             
-            if matched_text[0].isupper():
-                if len(abbrev) <= 3:
-                    replacement = abbrev.upper()
-                else:
-                    replacement = abbrev.capitalize()
-            else:
-                replacement = abbrev.lower()
-            
-            if preserve_context and not self._is_safe_context(text, start_pos):
-                return matched_text
-            
-            savings = len(matched_text) - len(replacement)
-            replacements.append(ReplacementResult(
-                original=matched_text,
-                replacement=replacement,
-                position=start_pos,
-                savings=savings,
-                category='abbreviation'
-            ))
-            
-            return replacement
+            matched_text = match.group()
+            replacement = self._match_case(matched_text, matcher.entries[matched_text.lower()][1])
+            if recorder is not None:
+                recorder.add(matched_text, replacement, start, category)
+            parts.append(text[position:start])
+            parts.append(replacement)
+            position = search_from = match.end()
         
-        new_text = pattern.sub(replace_func, text)
-        return new_text, replacements
+        parts.append(text[position:])
+        if recorder is not None:
+            recorder.end_pass()
+        return ''.join(parts)
+    
+    @staticmethod
+    def _match_case(matched_text: str, abbrev: str) -> str:
+        if matched_text[0].isupper():
+            if len(abbrev) <= 3:
+                return abbrev.upper()
+            return abbrev.capitalize()
+        return abbrev.lower()
     
     def _is_safe_context(self, text: str, position: int, window: int = 20) -> bool:
         start = max(0, position - window)
@@ -0,0 +1,271 @@
+﻿import csv
+import io
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .abbreviation_service import AbbreviationMatcher
+
+DEFAULT_TENANT = 'default'
+
+_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+_SUPPORTED_EXTENSIONS = ('.json', '.csv')
+
+
+@dataclass(frozen=True)
+class CustomDictionary:
+    name: str
+    tenant: str
+    entries: Dict[str, str]
+    source: str
+    loaded_at: float
+    memory_bytes: int
+
+
+@dataclass(frozen=True)
+class TenantDictionaries:
+    dictionaries: Dict[str, CustomDictionary] = field(default_factory=dict)
+    matcher: Optional[AbbreviationMatcher] = None
+
+
+def validate_name(value: str, label: str) -> str:
+    if not isinstance(value, str) or not _NAME_PATTERN.match(value):
+        raise ValueError(f'{label} inválido: use até 64 letras, números, "_" ou "-".')
+    return value
+
+
+def validate_entries(entries) -> Dict[str, str]:
+    if not isinstance(entries, dict) or not entries:
+        raise ValueError('O dicionário deve ser um objeto não vazio de "termo": "abreviação".')
+
+    for original, abbrev in entries.items():
+        if not isinstance(original, str) or not isinstance(abbrev, str) or not original.strip() or not abbrev.strip():
+            raise ValueError('Termos e abreviações do dicionário devem ser textos não vazios.')
+
+    return {original.strip(): abbrev.strip() for original, abbrev in entries.items()}
+
+
+def parse_dictionary(content: str, file_format: str) -> Dict[str, str]:
+    if file_format == 'json':
+        data = json.loads(content)
+        if isinstance(data, list):
+            data = {item.get('original'): item.get('abbreviation') for item in data if isinstance(item, dict)}
+        return validate_entries(data)
+
+    if file_format == 'csv':
+        rows = [row for row in csv.reader(io.StringIO(content)) if len(row) >= 2]
+        if rows and [c.strip().lower() for c in rows[0][:2]] == ['original', 'abbreviation']:
+            rows = rows[1:]
+        return validate_entries({row[0]: row[1] for row in rows})
+
+    raise ValueError(f'Formato de dicionário não suportado: {file_format}')
+
+
+def estimate_memory(entries: Dict[str, str]) -> int:
+    total = sys.getsizeof(entries)
+    for original, abbrev in entries.items():
+        total += sys.getsizeof(original) + sys.getsizeof(abbrev)
+    return total
+
+
+def estimate_matcher_memory(matcher: Optional[AbbreviationMatcher]) -> int:
+    if matcher is None or matcher.pattern is None:
+        return 0
+    return sys.getsizeof(matcher.entries) + sys.getsizeof(matcher.pattern.pattern)
+
+
+class CustomDictionaryService:
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        # Cada alteração monta um novo snapshot completo e só então troca a
+        # referência: requisições em andamento continuam usando o anterior.
+        self._tenants: Dict[str, TenantDictionaries] = {}
+        self._write_lock = threading.Lock()
+        self._file_state: Dict[str, Tuple[int, int]] = {}
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+
+    def get_matcher(self, tenant: Optional[str]) -> Optional[AbbreviationMatcher]:
+        tenant_dictionaries = self._tenants.get(tenant or DEFAULT_TENANT)
+        return tenant_dictionaries.matcher if tenant_dictionaries else None
+
+    def list_dictionaries(self, tenant: Optional[str] = None) -> List[CustomDictionary]:
+        tenants = self._tenants
+        if tenant is not None:
+            selected = [tenants[tenant]] if tenant in tenants else []
+        else:
+            selected = list(tenants.values())
+        return [d for t in selected for d in t.dictionaries.values()]
+
+    def stats(self) -> Dict[str, int]:
+        tenants = self._tenants
+        dictionaries = [d for t in tenants.values() for d in t.dictionaries.values()]
+        return {
+            'tenants': len(tenants),
+            'dictionaries': len(dictionaries),
+            'entries': sum(len(d.entries) for d in dictionaries),
+            'memory_bytes': sum(d.memory_bytes for d in dictionaries),
+            'matcher_memory_bytes': sum(estimate_matcher_memory(t.matcher) for t in tenants.values()),
+        }
+
+    def register(self, tenant: str, name: str, entries: Dict[str, str]) -> CustomDictionary:
+        validate_name(tenant, 'Tenant')
+        validate_name(name, 'Nome do dicionário')
+        entries = validate_entries(entries)
+
+        # O arquivo é gravado com o lock: uma recarga em andamento não vê o
+        # arquivo novo antes de o snapshot e o estado dos arquivos mudarem.
+        with self._write_lock:
+            source = self._write_file(tenant, name, entries) if self.directory else 'api'
+            dictionary = self._make_dictionary(tenant, name, entries, source)
+            self._swap({(tenant, name): dictionary})
+            if source != 'api':
+                self._file_state[source] = self._stat(source)
+        return dictionary
+
+    def remove(self, tenant: str, name: str) -> bool:
+        with self._write_lock:
+            current = self._tenants.get(tenant)
+            if current is None or name not in current.dictionaries:
+                return False
+
+            source = current.dictionaries[name].source
+            if source != 'api' and os.path.exists(source):
+                os.remove(source)
+                self._file_state.pop(source, None)
+
+            self._swap({(tenant, name): None})
+            return True
+
+    def reload(self, tenant: Optional[str] = None) -> int:
+        """Recarrega os arquivos alterados; com `tenant`, só os desse tenant."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return 0
+
+        with self._write_lock:
+            found = self._scan_directory(tenant)
+            changes: Dict[Tuple[str, str], Optional[CustomDictionary]] = {}
+
+            for path, (path_tenant, name, file_format) in found.items():
+                state = self._stat(path)
+                if self._file_state.get(path) == state:
+                    continue
+                try:
+                    with open(path, encoding='utf-8-sig') as source:
+                        entries = parse_dictionary(source.read(), file_format)
+                except (OSError, ValueError) as e:
+                    # Mantém a versão anterior em vez de publicar um dicionário parcial.
+                    logging.error(f"Falha ao carregar dicionário personalizado {path}: {e}")
+                    continue
+                changes[(path_tenant, name)] = self._make_dictionary(path_tenant, name, entries, path)
+                self._file_state[path] = state
+
+            for path in list(self._file_state):
+                if path in found:
+                    continue
+                path_tenant, name = self._identify(path)
+                if tenant is not None and path_tenant != tenant:
+                    continue
+                del self._file_state[path]
+                current = self._tenants.get(path_tenant)
+                if current and name in current.dictionaries and current.dictionaries[name].source == path:
+                    changes[(path_tenant, name)] = None
+
+            if changes:
+                self._swap(changes)
+            return len(changes)
+
+    def start_watching(self, interval: float) -> None:
+        if self._watcher is not None or not self.directory or interval <= 0:
+            return
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                try:
+                    changed = self.reload()
+                    if changed:
+                        logging.info(f"{changed} dicionário(s) personalizado(s) recarregado(s).")
+                except Exception as e:
+                    logging.error(f"Erro ao observar dicionários personalizados: {e}")
+
+        self._watcher = threading.Thread(target=watch, name='custom-dictionary-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _swap(self, changes: Dict[Tuple[str, str], Optional[CustomDictionary]]) -> None:
+        tenants = dict(self._tenants)
+        affected = {tenant for tenant, _ in changes}
+
+        for tenant in affected:
+            dictionaries = dict(tenants[tenant].dictionaries) if tenant in tenants else {}
+            for (change_tenant, name), dictionary in changes.items():
+                if change_tenant != tenant:
+                    continue
+                if dictionary is None:
+                    dictionaries.pop(name, None)
+                else:
+                    dictionaries[name] = dictionary
+
+            if dictionaries:
+                merged = [item for d in dictionaries.values() for item in d.entries.items()]
+                tenants[tenant] = TenantDictionaries(dictionaries, AbbreviationMatcher(merged))
+            else:
+                tenants.pop(tenant, None)
+
+        self._tenants = tenants
+
+    def _make_dictionary(self, tenant: str, name: str, entries: Dict[str, str], source: str) -> CustomDictionary:
+        return CustomDictionary(
+            name=name,
+            tenant=tenant,
+            entries=entries,
+            source=source,
+            loaded_at=time.time(),
+            memory_bytes=estimate_memory(entries)
+        )
+
+    def _write_file(self, tenant: str, name: str, entries: Dict[str, str]) -> str:
+        tenant_dir = os.path.join(self.directory, tenant)
+        os.makedirs(tenant_dir, exist_ok=True)
+        path = os.path.join(tenant_dir, f'{name}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as output:
+            json.dump(entries, output, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+    def _scan_directory(self, only_tenant: Optional[str] = None) -> Dict[str, Tuple[str, str, str]]:
+        found = {}
+        tenants = [only_tenant] if only_tenant is not None else os.listdir(self.directory)
+        for tenant in tenants:
+            tenant_dir = os.path.join(self.directory, tenant)
+            if not os.path.isdir(tenant_dir) or not _NAME_PATTERN.match(tenant):
+                continue
+            for filename in os.listdir(tenant_dir):
+                name, extension = os.path.splitext(filename)
+                if extension in _SUPPORTED_EXTENSIONS and _NAME_PATTERN.match(name):
+                    found[os.path.join(tenant_dir, filename)] = (tenant, name, extension[1:])
+        return found
+
+    @staticmethod
+    def _identify(path: str) -> Tuple[str, str]:
+        tenant = os.path.basename(os.path.dirname(path))
+        name = os.path.splitext(os.path.basename(path))[0]
+        return tenant, name
+
+    @staticmethod
+    def _stat(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
@@ -3,10 +3,6 @@ from typing import List, Dict, Set, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 
-from src.data.locations import is_known_location, get_all_locations
-from src.data.animals import is_nature_element, PRESERVATION_CATEGORIES
-from src.data.technology import is_tech_term, TECH_PRESERVATION
-
 class EntityType(Enum):
     MONEY = "money"
     PERCENTAGE = "percentage"
@@ -38,8 +34,27 @@ class Entity:
 class EntityPreservationService:
     
     def __init__(self):
-        self.patterns = self._build_entity_patterns()
+        # Os padrões só são compilados na primeira extração de entidades.
+        self._patterns: Optional[Dict[EntityType, List[re.Pattern]]] = None
+        self._dictionaries = None
         self.preservation_rules = self._build_preservation_rules()
+
+    @property
+    def patterns(self) -> Dict[EntityType, List[re.Pattern]]:
+        if self._patterns is None:
+            self._patterns = self._build_entity_patterns()
+        return self._patterns
+
+    @property
+    def dictionaries(self):
+        if self._dictionaries is None:
+            from src.data.artifact import load_dictionaries
+            self._dictionaries = load_dictionaries()
+        return self._dictionaries
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._patterns is not None
     
     def _build_entity_patterns(self) -> Dict[EntityType, List[re.Pattern]]:
         return {
@@ -125,13 +140,17 @@ class EntityPreservationService:
         return sorted(entities, key=lambda e: e.start)
     
     def _extract_dictionary_entities(self, text: str) -> List[Entity]:
+        dictionaries = self.dictionaries
+        preservation_categories = dictionaries.preservation_categories
+        tech_preservation = dictionaries.tech_preservation
+
         entities = []
         words = re.finditer(r'\b\w+(?:\s+\w+)*\b', text)
         
         for word_match in words:
             word_text = word_match.group()
             
-            if is_known_location(word_text):
+            if dictionaries.is_known_location(word_text):
                 entities.append(Entity(
                     text=word_text,
                     entity_type=EntityType.LOCATION,
@@ -140,10 +159,10 @@ class EntityPreservationService:
                     preservation_level=PreservationLevel.MEDIUM_PRESERVE
                 ))
             
-            elif is_nature_element(word_text):
-                if word_text.lower() in PRESERVATION_CATEGORIES['high_preserve']:
+            elif dictionaries.is_nature_element(word_text):
+                if word_text.lower() in preservation_categories['high_preserve']:
                     level = PreservationLevel.HIGH_PRESERVE
-                elif word_text.lower() in PRESERVATION_CATEGORIES['medium_preserve']:
+                elif word_text.lower() in preservation_categories['medium_preserve']:
                     level = PreservationLevel.MEDIUM_PRESERVE
                 else:
                     level = PreservationLevel.LOW_PRESERVE
@@ -156,12 +175,12 @@ class EntityPreservationService:
                     preservation_level=level
                 ))
             
-            elif is_tech_term(word_text):
-                if word_text in TECH_PRESERVATION['never_compress']:
+            elif dictionaries.is_tech_term(word_text):
+                if word_text in tech_preservation['never_compress']:
                     level = PreservationLevel.NEVER_COMPRESS
-                elif word_text in TECH_PRESERVATION['minimal_compress']:
+                elif word_text in tech_preservation['minimal_compress']:
                     level = PreservationLevel.HIGH_PRESERVE
-                elif word_text in TECH_PRESERVATION['moderate_compress']:
+                elif word_text in tech_preservation['moderate_compress']:
                     level = PreservationLevel.MEDIUM_PRESERVE
                 else:
                     level = PreservationLevel.LOW_PRESERVE
@@ -0,0 +1,94 @@
+﻿import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.services.optimization.entity_preservation_service import Entity, PreservationLevel
+from src.services.optimization.normalization import collapse_whitespace
+from src.utils.offsets import OffsetMap
+
+# Sentinelas: um caractere da Private Use Area do BMP por texto protegido. Não
+# são letras, dígitos, espaços nem pontuação, então atravessam abreviações,
+# stop words, acentos e remoção de pontuação sem alteração.
+PRIVATE_USE_START = 0xE000
+PRIVATE_USE_END = 0xF8FF
+
+_PRIVATE_USE = re.compile('[\ue000-\uf8ff]')
+
+
+class EntityMask:
+    """Sentinelas usadas num texto e o texto original de cada uma."""
+
+    def __init__(self, originals: Optional[Dict[str, str]] = None):
+        self.originals: Dict[str, str] = originals or {}
+        self._table = {ord(sentinel): original for sentinel, original in self.originals.items()}
+        self.pattern: Optional[re.Pattern] = None
+        if self.originals:
+            self.pattern = re.compile('[' + ''.join(self.originals) + ']')
+
+    def __len__(self) -> int:
+        return len(self.originals)
+
+    def is_intact(self, text: str) -> bool:
+        # Cada sentinela em uso continua presente em `text`.
+        return all(sentinel in text for sentinel in self.originals)
+
+    def restore(self, text: str) -> str:
+        return text.translate(self._table) if self._table else text
+
+
+def _free_sentinels(text: str) -> Iterator[str]:
+    # Textos que já usam a Private Use Area não podem ter seus caracteres
+    # confundidos com sentinelas.
+    used = set(_PRIVATE_USE.findall(text))
+    for code in range(PRIVATE_USE_START, PRIVATE_USE_END + 1):
+        char = chr(code)
+        if char not in used:
+            yield char
+
+
+def mask_entities(
+    text: str,
+    entities: List[Entity],
+    offsets: Optional[OffsetMap] = None
+) -> Tuple[str, EntityMask, List[Entity]]:
+    """Troca as entidades NEVER_COMPRESS por sentinelas.
+
+    Devolve o texto mascarado, a máscara (para `restore`) e as entidades que
+    continuam no texto. `entities` deve vir ordenada e sem sobreposições, como
+    devolvida por `extract_entities`. Ocorrências repetidas compartilham a
+    sentinela.
+    """
+    if not any(entity.preservation_level is PreservationLevel.NEVER_COMPRESS for entity in entities):
+        return text, EntityMask(), entities
+
+    sentinels = _free_sentinels(text)
+    originals: Dict[str, str] = {}
+    sentinel_for: Dict[str, str] = {}
+    remaining: List[Entity] = []
+    spans: List[Tuple[int, int, int]] = []
+    parts: List[str] = []
+    position = 0
+
+    for entity in entities:
+        if entity.preservation_level is not PreservationLevel.NEVER_COMPRESS:
+            remaining.append(entity)
+            continue
+        sentinel = sentinel_for.get(entity.text)
+        if sentinel is None:
+            sentinel = next(sentinels, None)
+            if sentinel is None:
+                # Sem sentinelas livres a entidade segue sem máscara.
+                remaining.append(entity)
+                continue
+            sentinel_for[entity.text] = sentinel
+            # A saída do pipeline nunca tem espaços repetidos ou quebras de linha.
+            originals[sentinel] = collapse_whitespace(entity.text)
+
+        parts.append(text[position:entity.start])
+        parts.append(sentinel)
+        spans.append((entity.start, entity.end, 1))
+        position = entity.end
+
+    parts.append(text[position:])
+    if offsets is not None:
+        offsets.apply(spans)
+    return ''.join(parts), EntityMask(originals), remaining
@@ -0,0 +1,87 @@
+﻿import re
+from typing import Iterable, Optional
+
+from src.utils.accents import fold_accents, fold_spans
+from src.utils.offsets import OffsetMap
+
+REPEATED_PUNCTUATION = re.compile(r'([.!?,\-;:"])\1+')
+
+
+_WHITESPACE_RUN = re.compile(r'\s+')
+
+
+def collapse_whitespace(text: str, offsets: Optional[OffsetMap] = None) -> str:
+    # Equivale a re.sub(r'\s+', ' ', text).strip(): ambos usam str.isspace.
+    collapsed = ' '.join(text.split())
+    if offsets is not None and len(collapsed) != len(text):
+        offsets.apply(_whitespace_spans(text))
+    return collapsed
+
+
+def _whitespace_spans(text: str):
+    last = len(text)
+    for match in _WHITESPACE_RUN.finditer(text):
+        start, end = match.span()
+        if start == 0 or end == last:
+            yield start, end, 0
+        elif end - start > 1:
+            yield start, end, 1
+
+
+class TextNormalizer:
+    """Etapas de normalização do pipeline fundidas em poucas passadas em C.
+
+    `normalize_spacing` substitui as chamadas de espaços e pontuação redundante;
+    `fold` aplica remoção de acentos e de pontuação na mesma ordem do pipeline
+    original.
+    """
+
+    def __init__(self, removable_chars: Iterable[str]):
+        chars = ''.join(removable_chars)
+        # `re.sub` com uma classe de caracteres é bem mais rápido que
+        # `str.translate` com tabela de remoção em textos não-ASCII.
+        self.punctuation_pattern = re.compile(f'[{re.escape(chars)}]+') if chars else None
+
+    @staticmethod
+    def normalize_spacing(text: str, final: bool = True, offsets: Optional[OffsetMap] = None) -> str:
+        text = collapse_whitespace(text, offsets)
+        if offsets is not None:
+            offsets.apply((m.start(), m.end(), 1) for m in REPEATED_PUNCTUATION.finditer(text))
+        text = REPEATED_PUNCTUATION.sub(r'\1', text)
+        if not final:
+            return text
+        # Sem espaços nas bordas, `[.,;:]+\s*$` equivale a um rstrip.
+        stripped = text.rstrip('.,;:')
+        if offsets is not None and len(stripped) != len(text):
+            offsets.apply([(len(stripped), len(text), 0)])
+        return stripped
+
+    def remove_punctuation(self, text: str, offsets: Optional[OffsetMap] = None) -> str:
+        if self.punctuation_pattern is None:
+            return text
+        if offsets is not None:
+            offsets.apply((m.start(), m.end(), 0) for m in self.punctuation_pattern.finditer(text))
+        return self.punctuation_pattern.sub('', text)
+
+    def fold(
+        self,
+        text: str,
+        remove_accents: bool,
+        remove_punctuation: bool,
+        offsets: Optional[OffsetMap] = None
+    ) -> str:
+        # O NFD pode gerar pontuação (ex.: U+037E vira ";"), por isso os acentos
+        # saem antes da pontuação.
+        if remove_accents:
+            folded = fold_accents(text)
+            if offsets is not None and len(folded) != len(text):
+                spans = fold_spans(text)
+                if len(text) + sum(length - (end - start) for start, end, length in spans) != len(folded):
+                    # A reordenação canônica do NFD pode juntar caracteres;
+                    # nesse caso raro o texto inteiro vira um trecho só.
+                    spans = [(0, len(text), len(folded))]
+                offsets.apply(spans)
+            text = folded
+        if remove_punctuation:
+            text = self.remove_punctuation(text, offsets)
+        return text
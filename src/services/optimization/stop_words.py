@@ -0,0 +1,86 @@
+﻿import os
+import re
+import string
+from itertools import compress
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from src.utils.accents import fold_accents
+from src.utils.offsets import OffsetMap, join_spans
+
+_PUNCTUATION = string.punctuation
+_TOKEN = re.compile(r'\S+')
+
+# Limite do cache de tokens já classificados; textos reais repetem poucas
+# palavras, então o cache quase sempre acerta.
+_MEMO_LIMIT = 100_000
+
+
+def fold_word(word: str) -> str:
+    """Chave de comparação: casefold, sem pontuação nas bordas e sem acentos."""
+    return fold_accents(word.casefold().strip(_PUNCTUATION))
+
+
+def read_stop_word_file(path: str) -> List[str]:
+    # Uma palavra por linha; linhas vazias e comentários (#) são ignorados.
+    with open(path, encoding='utf-8-sig') as source:
+        return [line.strip() for line in source if line.strip() and not line.lstrip().startswith('#')]
+
+
+def select_evenly(count: int, ratio: float) -> List[int]:
+    """Escolhe int(count * ratio) posições em [0, count) espalhadas uniformemente."""
+    selected = int(count * ratio)
+    if selected <= 0:
+        return []
+    if selected >= count:
+        return list(range(count))
+    # Bresenham: a posição j entra quando floor((j+1)*k/n) avança, ou seja, a
+    # m-ésima escolhida é ceil((m+1)*n/k) - 1.
+    return [((m + 1) * count + selected - 1) // selected - 1 for m in range(selected)]
+
+
+class StopWordFilter:
+
+    def __init__(self, words: Iterable[str]):
+        self.words: FrozenSet[str] = frozenset(key for key in map(fold_word, words) if key)
+        self._memo: Dict[str, bool] = {}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def is_stop_word(self, token: str) -> bool:
+        memo = self._memo
+        result = memo.get(token)
+        if result is None:
+            if len(memo) >= _MEMO_LIMIT:
+                memo.clear()
+            result = memo[token] = fold_word(token) in self.words
+        return result
+
+    def remove(self, text: str, removal_ratio: float, offsets: Optional[OffsetMap] = None) -> str:
+        if not (0.0 < removal_ratio <= 1.0):
+            return text
+
+        tokens = text.split()
+        # Só os tokens distintos passam pela classificação em Python; o resto
+        # (filtro das posições e junção) roda em C via map/compress.
+        is_stop_word = self.is_stop_word
+        stop_tokens = {token for token in set(tokens) if is_stop_word(token)}
+        candidates = list(compress(range(len(tokens)), map(stop_tokens.__contains__, tokens)))
+
+        keep = [True] * len(tokens)
+        for j in select_evenly(len(candidates), removal_ratio):
+            keep[candidates[j]] = False
+        if offsets is not None:
+            positions = [match.span() for match in _TOKEN.finditer(text)]
+            offsets.apply(join_spans(len(text), compress(positions, keep)))
+        return ' '.join(compress(tokens, keep))
+
+
+def load_stop_word_filter(language: str, words: Iterable[str], directory: Optional[str] = None) -> StopWordFilter:
+    # Listas externas em <dir>/<idioma>.txt complementam as palavras da configuração.
+    words = list(words)
+    if directory:
+        path = os.path.join(directory, f'{language}.txt')
+        if os.path.isfile(path):
+            words.extend(read_stop_word_file(path))
+    return StopWordFilter(words)
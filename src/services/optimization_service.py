@@ -1,25 +1,95 @@
 ﻿import re
-import string
-import unicodedata
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 
 from src.config.settings import Config
-from src.models.optimization import OptimizationResponse, OptimizationStats
-from src.services.translation_service import TranslationService
-from src.services.optimization import AbbreviationService, EntityPreservationService
+from src.models.optimization import (
+    CompiledTemplate,
+    EditSpan,
+    OptimizationExplanation,
+    OptimizationPlan,
+    OptimizationResponse,
+    OptimizationStats,
+    PreservedEntity,
+    StoredTemplate
+)
+from src.services.optimization import (
+    AbbreviationMatcher,
+    AbbreviationService,
+    CustomDictionaryService,
+    EntityPreservationService
+)
+from src.services.optimization.custom_dictionary_service import validate_entries
+from src.services.optimization.entity_preservation_service import Entity
+from src.services.optimization.masking import EntityMask, mask_entities
+from src.services.optimization.normalization import (
+    REPEATED_PUNCTUATION,
+    TextNormalizer,
+    collapse_whitespace
+)
+from src.services.optimization.stop_words import StopWordFilter, load_stop_word_filter
+from src.utils.accents import fold_accents
+from src.utils.deadline import Deadline
+from src.utils.offsets import OffsetMap
+
+_TRAILING_PUNCTUATION = re.compile(r'[.,;:]+\s*$')
+
+# Pontos de corte do modo streaming, do mais para o menos preferível.
+_STREAM_SEPARATORS = (re.compile(r'\n[^\S\n]*\n\s*'), re.compile(r'\n\s*'), re.compile(r'\s+'))
+
+
+def _allows(deadline: Optional[Deadline], stage: str, reserve: float = 0.0) -> bool:
+    return deadline is None or deadline.allows(stage, reserve)
+
 
 class OptimizationService:
 
-    def __init__(self, config: Config):
+    # Tamanho de cada janela no modo streaming e a região ao redor do corte em
+    # que os padrões sensíveis a fronteira são verificados.
+    STREAM_WINDOW_SIZE = 64 * 1024
+    STREAM_OVERLAP = 256
+
+    def __init__(self, config: Config, prewarm_translations: bool = False):
         self.config = config
-        self.translation_service = TranslationService(config)
+        # Só o app liga o pré-aquecimento; CLI e lotes não mantêm a thread.
+        self.prewarm_translations = prewarm_translations
+        self._translation_service = None
         self.abbreviation_service = AbbreviationService()
         self.entity_service = EntityPreservationService()
+        self.custom_dictionaries = CustomDictionaryService(config.CUSTOM_DICTIONARY_DIR)
+        self._stop_word_filters: Dict[str, StopWordFilter] = {}
+        self.normalizer = TextNormalizer(config.REMOVABLE_CHARS)
+
+    @property
+    def translation_service(self):
+        # O serviço (e o `requests` do backend remoto) só é carregado quando
+        # alguma requisição realmente pede tradução.
+        if self._translation_service is None:
+            from src.services.translation_service import TranslationService
+            self._translation_service = TranslationService(self.config)
+            if self.prewarm_translations:
+                self._translation_service.start_prewarming()
+        return self._translation_service
+
+    def translation_stats(self) -> Optional[Dict[str, Any]]:
+        # Não carrega o serviço de tradução só para as métricas.
+        if self._translation_service is None:
+            return None
+        return self._translation_service.stats()
+
+    def preload(self, config_options: Dict[str, Any]) -> None:
+        plan = self.build_plan(config_options)
+        if plan.abbreviation_level > 0:
+            self.abbreviation_service.abbreviations
+        if plan.word_compression < 1.0:
+            self.abbreviation_service.number_service
+        if plan.preserve_entities:
+            self.entity_service.extract_entities('')
+        if plan.translate_to_english:
+            self.translation_service.preload(plan.translation_backend)
 
     @staticmethod
     def remove_accents(text: str) -> str:
-        normalized_text = unicodedata.normalize('NFD', text)
-        return "".join(c for c in normalized_text if unicodedata.category(c) != 'Mn')
+        return fold_accents(text)
 
     @staticmethod
     def _compress_word(word: str, compression_ratio: float, min_word_length: int = 2) -> str:
@@ -84,130 +154,496 @@ class OptimizationService:
 
     @staticmethod
     def remove_excessive_whitespace(text: str) -> str:
-        return re.sub(r'\s+', ' ', text).strip()
+        return collapse_whitespace(text)
 
     @staticmethod
     def remove_redundant_punctuation(text: str) -> str:
-        text = re.sub(r'([.!?,\-;:"])\1+', r'\1', text)
-        return re.sub(r'[.,;:]+\s*$', '', text)
+        text = REPEATED_PUNCTUATION.sub(r'\1', text)
+        return _TRAILING_PUNCTUATION.sub('', text)
 
-    def remove_stop_words(self, text: str, language: str, removal_ratio: float) -> str:
-        if not (0.0 < removal_ratio <= 1.0):
-            return text
+    def stop_word_filter(self, language: str) -> StopWordFilter:
+        stop_word_filter = self._stop_word_filters.get(language)
+        if stop_word_filter is None:
+            stop_word_filter = load_stop_word_filter(
+                language,
+                self.config.STOP_WORDS.get(language, ()),
+                self.config.STOP_WORDS_DIR
+            )
+            self._stop_word_filters[language] = stop_word_filter
+        return stop_word_filter
 
-        words = text.split()
-        stop_words_set = self.config.STOP_WORDS.get(language, set())
+    def remove_stop_words(
+        self,
+        text: str,
+        language: str,
+        removal_ratio: float,
+        offsets: Optional[OffsetMap] = None
+    ) -> str:
+        # As remoções são espalhadas pelo texto, não concentradas no início.
+        return self.stop_word_filter(language).remove(text, removal_ratio, offsets)
+
+    def _translation_reserve(self, plan: OptimizationPlan) -> float:
+        # Só a tradução remota depende da rede; a do glossário roda com
+        # qualquer tempo restante.
+        backend = plan.translation_backend or self.config.TRANSLATION_BACKEND
+        return self.config.DEADLINE_TRANSLATION_RESERVE_MS / 1000.0 if backend == 'remote' else 0.0
+
+    def build_plan(self, config_options: Dict[str, Any]) -> OptimizationPlan:
+        custom_matcher = None
+        if config_options.get('custom_abbreviations'):
+            custom_matcher = AbbreviationMatcher(
+                validate_entries(config_options['custom_abbreviations']).items()
+            )
         
-        stop_word_indices = [
-            i for i, word in enumerate(words) 
-            if word.lower().strip(string.punctuation) in stop_words_set
-        ]
+        # O plano guarda a própria cópia: o chamador (ou a resposta, em
+        # `config_used`) pode alterar o dicionário sem mexer no plano em cache.
+        return OptimizationPlan(
+            config=dict(config_options),
+            translate_to_english=config_options.get('translate_to_english', False),
+            language=config_options.get('language', 'pt'),
+            stop_word_removal=config_options.get('stop_word_removal', 0.0),
+            remove_accents=config_options.get('remove_accents', False),
+            word_compression=config_options.get('word_compression', 1.0),
+            min_word_length=config_options.get('min_word_length', 2),
+            remove_punctuation=config_options.get('remove_punctuation', False),
+            abbreviation_level=config_options.get('abbreviation_level', 0.5),
+            preserve_entities=config_options.get('preserve_entities', True),
+            translation_backend=config_options.get('translation_backend'),
+            custom_matcher=custom_matcher
+        )
+
+    def _custom_matchers(self, plan: OptimizationPlan, tenant: Optional[str]) -> List[AbbreviationMatcher]:
+        matchers = []
+        
+        if plan.custom_matcher is not None:
+            matchers.append(plan.custom_matcher)
         
-        num_to_remove = int(len(stop_word_indices) * removal_ratio)
-        indices_to_remove = set(stop_word_indices[:num_to_remove])
+        tenant_matcher = self.custom_dictionaries.get_matcher(tenant)
+        if tenant_matcher is not None:
+            matchers.append(tenant_matcher)
         
-        return ' '.join(word for i, word in enumerate(words) if i not in indices_to_remove)
+        return matchers
 
-    def optimize(self, text: str, config_options: Dict[str, Any]) -> OptimizationResponse:
-        original_length = len(text)
+    def optimize(
+        self,
+        text: str,
+        config_options: Dict[str, Any],
+        tenant: Optional[str] = None,
+        plan: Optional[OptimizationPlan] = None,
+        explain: bool = False,
+        deadline: Optional[Deadline] = None
+    ) -> OptimizationResponse:
+        # Um plano pré-compilado (presets) dispensa interpretar a configuração.
+        if plan is None:
+            plan = self.build_plan(config_options)
         
-        should_translate = config_options.get('translate_to_english', False)
-        language = config_options.get('language', 'pt')
-        stop_word_ratio = config_options.get('stop_word_removal', 0.0)
-        should_remove_accents = config_options.get('remove_accents', False)
-        word_compression_ratio = config_options.get('word_compression', 1.0)
-        min_word_length = config_options.get('min_word_length', 2)
-        should_remove_punctuation = config_options.get('remove_punctuation', False)
+        # A explicação (economia por etapa e trechos substituídos) só é montada
+        # quando pedida; sem ela nenhum registro de substituição é criado.
+        explanation = OptimizationExplanation() if explain else None
+        original_length = len(text)
+        processed_text = self._run_pipeline(text, plan, tenant, explanation=explanation, deadline=deadline)
+
+        return OptimizationResponse(
+            original_text=text,
+            optimized_text=processed_text,
+            stats=OptimizationStats.measure(original_length, len(processed_text)),
+            config_used=dict(plan.config),
+            explanation=explanation,
+            skipped_stages=list(deadline.skipped) if deadline is not None else None
+        )
+
+    def uses_remote_translation(self, plan: OptimizationPlan) -> bool:
+        # Com tradução remota, uma falha do provedor devolve o texto sem
+        # tradução: resultados desses planos não podem ficar guardados.
+        if not plan.translate_to_english:
+            return False
+        return (plan.translation_backend or self.config.TRANSLATION_BACKEND) == 'remote'
+
+    def compiled_template(self, template: StoredTemplate, tenant: Optional[str] = None) -> CompiledTemplate:
+        """Trechos fixos do modelo, compilados no primeiro uso e guardados nele.
+
+        Com tradução remota a compilação não é guardada e se repete a cada
+        uso; os trechos já traduzidos saem do cache do serviço de tradução.
+        """
+        compiled = template.compiled
+        if compiled is None or compiled.tenant_matcher is not self.custom_dictionaries.get_matcher(tenant):
+            compiled = self.compile_template(template, tenant)
+            if not self.uses_remote_translation(template.plan):
+                template.compiled = compiled
+        return compiled
+
+    def compile_template(self, template: StoredTemplate, tenant: Optional[str] = None) -> CompiledTemplate:
+        """Otimiza uma vez o texto fixo do modelo, tradução incluída."""
+        last = len(template.literals) - 1
+        return CompiledTemplate(
+            static_parts=[
+                self._optimize_fragment(literal, template.plan, tenant, final=index == last)
+                for index, literal in enumerate(template.literals)
+            ],
+            tenant_matcher=self.custom_dictionaries.get_matcher(tenant)
+        )
+
+    def render_template(
+        self,
+        template: StoredTemplate,
+        values: Dict[str, Any],
+        tenant: Optional[str] = None
+    ) -> OptimizationResponse:
+        """Otimiza só os valores e os encaixa nos trechos fixos já otimizados.
+
+        Cada trecho passa pelo pipeline isolado: uma abreviação ou entidade
+        que atravesse a fronteira entre o texto fixo e um valor não é
+        reconhecida, e as proporções (stop words, compressão) valem por trecho.
+        """
+        if not isinstance(values, dict):
+            raise ValueError('O campo "values" deve ser um objeto.')
+        missing = [slot for slot in dict.fromkeys(template.slots) if slot not in values]
+        if missing:
+            raise ValueError(f'Valores ausentes para: {", ".join(missing)}.')
+        for slot in template.slots:
+            if not isinstance(values[slot], str):
+                raise ValueError(f'O valor de "{slot}" deve ser um texto.')
+
+        compiled = self.compiled_template(template, tenant)
+
+        # Só o último placeholder, sem texto fixo depois dele, recebe o
+        # tratamento de final de texto.
+        ends_with_slot = not template.literals[-1].strip()
+        optimized_values: Dict[Tuple[str, bool], str] = {}
+        original_parts, optimized_parts = [], []
+        for index, slot in enumerate(template.slots):
+            final = ends_with_slot and index == len(template.slots) - 1
+            key = (slot, final)
+            if key not in optimized_values:
+                optimized_values[key] = self._optimize_fragment(values[slot], template.plan, tenant, final)
+            original_parts.extend((template.literals[index], values[slot]))
+            optimized_parts.extend((compiled.static_parts[index], optimized_values[key]))
+        original_parts.append(template.literals[-1])
+        optimized_parts.append(compiled.static_parts[-1])
+
+        original_text = ''.join(original_parts)
+        optimized_text = collapse_whitespace(''.join(optimized_parts))
+        return OptimizationResponse(
+            original_text=original_text,
+            optimized_text=optimized_text,
+            stats=OptimizationStats.measure(len(original_text), len(optimized_text)),
+            config_used=dict(template.plan.config)
+        )
+
+    def _optimize_fragment(self, text: str, plan: OptimizationPlan, tenant: Optional[str], final: bool) -> str:
+        # O pipeline remove os espaços das bordas; eles marcam a separação do
+        # trecho vizinho e voltam como um espaço.
+        if not text.strip():
+            return ' ' if text else ''
+        optimized = self._run_pipeline(text, plan, tenant, final=final)
+        leading = ' ' if text[0].isspace() else ''
+        trailing = ' ' if text[-1].isspace() else ''
+        if not optimized:
+            return ' ' if leading or trailing else ''
+        return leading + optimized + trailing
+
+    def optimize_stream(
+        self,
+        chunks: Iterable[str],
+        config_options: Dict[str, Any],
+        tenant: Optional[str] = None,
+        plan: Optional[OptimizationPlan] = None,
+        window_size: Optional[int] = None
+    ) -> Iterator[str]:
+        """Otimiza um texto recebido em pedaços, produzindo a saída aos poucos.
+
+        A entrada é processada em janelas de até `window_size` caracteres cortadas
+        de preferência entre parágrafos; o pico de memória depende da janela, não
+        do texto inteiro. Um corte só é aceito se nenhuma abreviação de várias
+        palavras, entidade ou variação de local atravessar a fronteira. A
+        pontuação final só é removida na última janela. A remoção de stop words
+        aplica a proporção em cada janela.
+        """
+        if plan is None:
+            plan = self.build_plan(config_options)
+        window_size = window_size or self.STREAM_WINDOW_SIZE
+        boundary_patterns = self._boundary_patterns(plan, tenant)
+
+        buffer = ''
+        emitted = False
+        for chunk in chunks:
+            buffer += chunk
+            while len(buffer) >= window_size:
+                cut = self._find_stream_cut(buffer, window_size, boundary_patterns)
+                if cut is None:
+                    break
+                window, buffer = buffer[:cut], buffer[cut:]
+                output = self._run_pipeline(window, plan, tenant, final=False)
+                if output:
+                    yield (' ' + output) if emitted else output
+                    emitted = True
+
+        output = self._run_pipeline(buffer, plan, tenant)
+        if output:
+            yield (' ' + output) if emitted else output
+
+    def _boundary_patterns(self, plan: OptimizationPlan, tenant: Optional[str]) -> List[re.Pattern]:
+        patterns = []
+        if plan.preserve_entities:
+            patterns.extend(p for group in self.entity_service.patterns.values() for p in group)
+        if plan.abbreviation_level > 0:
+            patterns.extend(self.abbreviation_service.boundary_patterns)
+            patterns.extend(
+                m.pattern for m in self._custom_matchers(plan, tenant) if m.pattern is not None
+            )
+        return patterns
+
+    def _find_stream_cut(self, buffer: str, window_size: int, boundary_patterns: List[re.Pattern]) -> Optional[int]:
+        # Janelas muito maiores que o previsto só aparecem com um texto sem
+        # nenhum corte seguro; nesse caso corta no último espaço disponível.
+        forced = len(buffer) >= 4 * window_size
+        overlap = self.STREAM_OVERLAP
+
+        for separator in _STREAM_SEPARATORS:
+            cuts = [m.end() for m in separator.finditer(buffer, 0, window_size)]
+            for cut in reversed(cuts):
+                # A última janela precisa ter conteúdo para receber o
+                # tratamento de final de texto.
+                if cut >= len(buffer) or buffer[cut:].isspace():
+                    continue
+                if forced:
+                    return cut
+                start = max(0, cut - overlap)
+                region = buffer[start:cut + overlap]
+                boundary = cut - start
+                if not any(
+                    m.start() < boundary < m.end()
+                    for pattern in boundary_patterns
+                    for m in pattern.finditer(region)
+                ):
+                    return cut
+
+        return window_size if forced else None
+
+    def _run_pipeline(
+        self,
+        text: str,
+        plan: OptimizationPlan,
+        tenant: Optional[str],
+        final: bool = True,
+        explanation: Optional[OptimizationExplanation] = None,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        # Com prazo, cada etapa cara só roda se ainda houver tempo; as de
+        # normalização, baratas, rodam sempre. O texto segue com o que já foi
+        # feito e as etapas puladas ficam registradas no prazo.
+        should_translate = plan.translate_to_english
+        language = plan.language
+        stop_word_ratio = plan.stop_word_removal
+        should_remove_accents = plan.remove_accents
+        word_compression_ratio = plan.word_compression
+        min_word_length = plan.min_word_length
+        should_remove_punctuation = plan.remove_punctuation
         
-        abbreviation_level = config_options.get('abbreviation_level', 0.5)
-        preserve_entities = config_options.get('preserve_entities', True)
+        abbreviation_level = plan.abbreviation_level
+        preserve_entities = plan.preserve_entities
 
         processed_text = text
 
         entities = []
-        if preserve_entities:
+        if preserve_entities and _allows(deadline, 'entities'):
             entities = self.entity_service.extract_entities(processed_text)
+            if explanation is not None:
+                explanation.entities = [
+                    PreservedEntity(
+                        text=entity.text,
+                        entity_type=entity.entity_type.value,
+                        preservation_level=entity.preservation_level.value,
+                        start=entity.start,
+                        end=entity.end
+                    )
+                    for entity in entities
+                ]
 
-        if abbreviation_level > 0:
+        # As entidades são extraídas uma vez, no texto original; o mapa de
+        # posições acompanha as edições de cada etapa até a compressão de
+        # palavras, que precisa das posições atuais delas.
+        offsets = None
+        if (entities and word_compression_ratio < 1.0) or explanation is not None:
+            offsets = OffsetMap()
+
+        # Entidades NEVER_COMPRESS viram sentinelas de um caractere até o fim do
+        # pipeline: as etapas seguintes não as alteram e a tradução não as cobra.
+        mask = EntityMask()
+        extracted = entities
+        if entities:
+            before = processed_text
+            processed_text, mask, entities = mask_entities(processed_text, entities, offsets)
+            if explanation is not None:
+                explanation.record_stage('entity_masking', before, processed_text)
+
+        if abbreviation_level > 0 and _allows(deadline, 'abbreviations'):
+            before = processed_text
             processed_text, replacements = self.abbreviation_service.apply_abbreviations(
                 processed_text, 
                 aggressiveness=abbreviation_level,
-                preserve_context=True
+                preserve_context=True,
+                extra_matchers=self._custom_matchers(plan, tenant),
+                collect=explanation is not None,
+                offsets=offsets
             )
+            if explanation is not None:
+                explanation.record_stage('abbreviations', before, processed_text)
+                # O mapa já inclui a máscara, então as posições de origem são
+                # offsets no texto original.
+                explanation.edits.extend(
+                    EditSpan(
+                        stage='abbreviations',
+                        original=replacement.original,
+                        replacement=replacement.replacement,
+                        start=replacement.source_start,
+                        end=replacement.source_end,
+                        category=replacement.category
+                    )
+                    for replacement in replacements
+                )
 
-        if should_translate:
-            processed_text = self.translation_service.translate_to_english(processed_text)
-            language = 'en'
+        if should_translate and _allows(deadline, 'translation', self._translation_reserve(plan)):
+            before = processed_text
+            processed_text = self.translation_service.translate_to_english(
+                processed_text, plan.translation_backend, deadline
+            )
+            if not mask.is_intact(processed_text):
+                # O tradutor descartou alguma sentinela: traduz o texto sem a
+                # máscara, como antes dela existir.
+                processed_text = self.translation_service.translate_to_english(
+                    mask.restore(before), plan.translation_backend, deadline
+                )
+                if deadline is not None and deadline.expired() and processed_text == mask.restore(before):
+                    # Sem tempo para a nova tradução o texto volta mascarado.
+                    processed_text = before
+                else:
+                    mask, entities = EntityMask(), extracted
+            if deadline is not None and processed_text == before and deadline.expired():
+                # O prazo acabou durante a chamada e o tradutor devolveu o
+                # texto original.
+                deadline.skip('translation')
+            else:
+                language = 'en'
+                # A tradução não preserva posições; a compressão passa a
+                # localizar as entidades pelo texto.
+                offsets = None
+            if explanation is not None:
+                explanation.record_stage('translation', before, processed_text)
         
-        processed_text = self.remove_excessive_whitespace(processed_text)
-        processed_text = self.remove_redundant_punctuation(processed_text)
-
-        if stop_word_ratio > 0:
-            processed_text = self.remove_stop_words(processed_text, language, stop_word_ratio)
+        # Espaços e pontuação repetida numa etapa; acentos e pontuação em outra.
+        before = processed_text
+        processed_text = self.normalizer.normalize_spacing(processed_text, final=final, offsets=offsets)
+        if explanation is not None:
+            explanation.record_stage('spacing', before, processed_text)
 
-        if should_remove_accents:
-            processed_text = self.remove_accents(processed_text)
+        if stop_word_ratio > 0 and _allows(deadline, 'stop_words'):
+            before = processed_text
+            processed_text = self.remove_stop_words(processed_text, language, stop_word_ratio, offsets)
+            if explanation is not None:
+                explanation.record_stage('stop_words', before, processed_text)
 
-        if should_remove_punctuation:
-            punct_regex = f'[{re.escape("".join(self.config.REMOVABLE_CHARS))}]'
-            processed_text = re.sub(punct_regex, '', processed_text)
+        if explanation is None:
+            processed_text = self.normalizer.fold(
+                processed_text, should_remove_accents, should_remove_punctuation, offsets
+            )
+        else:
+            # Mesma ordem do `fold`, em duas chamadas para medir cada etapa.
+            if should_remove_accents:
+                before = processed_text
+                processed_text = self.normalizer.fold(processed_text, True, False, offsets)
+                explanation.record_stage('accents', before, processed_text)
+            if should_remove_punctuation:
+                before = processed_text
+                processed_text = self.normalizer.fold(processed_text, False, True, offsets)
+                explanation.record_stage('punctuation', before, processed_text)
 
-        if word_compression_ratio < 1.0:
+        if word_compression_ratio < 1.0 and _allows(deadline, 'word_compression'):
+            before = processed_text
             processed_text = self._compress_words_with_preservation(
                 processed_text, 
                 word_compression_ratio, 
                 min_word_length,
-                entities
+                entities,
+                offsets,
+                mask
             )
+            if explanation is not None:
+                explanation.record_stage('word_compression', before, processed_text)
         
-        processed_text = self.remove_excessive_whitespace(processed_text)
-
-        final_length = len(processed_text)
-        compression_percentage = (
-            ((original_length - final_length) / original_length * 100) 
-            if original_length > 0 else 0
-        )
+        before = processed_text
+        processed_text = collapse_whitespace(processed_text)
+        if explanation is not None:
+            explanation.record_stage('final_whitespace', before, processed_text)
 
-        stats = OptimizationStats(
-            original_length=original_length,
-            optimized_length=final_length,
-            compression_ratio_percent=round(compression_percentage, 2),
-            characters_saved=original_length - final_length
-        )
-
-        return OptimizationResponse(
-            original_text=text,
-            optimized_text=processed_text,
-            stats=stats,
-            config_used=config_options
-        )
+        if mask:
+            before = processed_text
+            processed_text = mask.restore(processed_text)
+            if explanation is not None:
+                explanation.record_stage('entity_restore', before, processed_text)
+        return processed_text
     
     def _compress_words_with_preservation(
         self, 
         text: str, 
         compression_ratio: float, 
         min_word_length: int,
-        entities: List
+        entities: List[Entity],
+        offsets: Optional[OffsetMap] = None,
+        mask: Optional[EntityMask] = None
     ) -> str:
-        words = text.split(' ')
+        """Comprime as palavras, respeitando os limites das entidades preservadas.
+
+        Com `offsets` as entidades (extraídas no texto original) são levadas às
+        posições atuais; sem ele cada palavra é procurada no texto das entidades.
+        """
+        number_service = self.abbreviation_service.number_service
+        limits = self.entity_service.get_compression_limits(entities)
+
+        spans: List[Tuple[int, int, float]] = []
+        entity_words: Dict[str, float] = {}
+        if offsets is not None:
+            for entity in entities:
+                start, end = offsets.to_current_span(entity.start, entity.end)
+                if start < end:
+                    spans.append((start, end, limits[entity.preservation_level.value]))
+        else:
+            for entity in entities:
+                for entity_word in entity.text.split():
+                    entity_words.setdefault(entity_word, limits[entity.preservation_level.value])
+
+        # Palavras com sentinelas ficam intactas para que a entidade volte inteira.
+        protected = mask.pattern if mask else None
+
         compressed_words = []
-        
-        for word in words:
+        # As palavras e as entidades vêm em ordem, então um único ponteiro
+        # percorre as entidades enquanto o texto avança.
+        position = span_index = 0
+        for word in text.split(' '):
+            word_position = position
+            position += len(word) + 1
             if not word.strip():
                 continue
             
-            is_important, _ = self.abbreviation_service.number_service.is_important_number(word)
+            if protected is not None and protected.search(word):
+                compressed_words.append(word)
+                continue
+
+            is_important, _ = number_service.is_important_number(word)
             if is_important:
                 compressed_words.append(word)
                 continue
-                
-            word_position = text.find(word)
             
-            should_preserve, compression_limit = self.entity_service.should_preserve_word(
-                word, word_position, entities
-            )
+            compression_limit = None
+            if offsets is not None:
+                while span_index < len(spans) and spans[span_index][1] <= word_position:
+                    span_index += 1
+                if span_index < len(spans) and spans[span_index][0] <= word_position:
+                    compression_limit = spans[span_index][2]
+            else:
+                compression_limit = entity_words.get(word)
             
-            if should_preserve and compression_limit:
+            if compression_limit:
                 effective_ratio = max(compression_ratio, compression_limit)
             else:
                 effective_ratio = compression_ratio
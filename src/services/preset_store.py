@@ -0,0 +1,25 @@
+﻿from typing import Any, Dict, Optional
+
+from src.models.optimization import StoredPreset
+from src.services.record_store import TenantRecordStore
+
+
+class PresetStore(TenantRecordStore[StoredPreset]):
+
+    table = 'presets'
+    value_column = 'description'
+    record_type = StoredPreset
+    label = 'preset'
+
+    def create(self, tenant: str, name: str, description: str, config: Dict[str, Any]) -> StoredPreset:
+        return self._create(tenant, name, description or '', config)
+
+    def update(
+        self,
+        tenant: str,
+        preset_id: str,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None
+    ) -> Optional[StoredPreset]:
+        return self._update(tenant, preset_id, name, description, config)
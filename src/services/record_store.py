@@ -0,0 +1,199 @@
+﻿import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Generic, List, Optional, Type, TypeVar
+
+from src.models.optimization import OptimizationPlan
+from src.utils.validators import validate_config_options
+
+R = TypeVar('R')
+
+
+class TenantRecordStore(Generic[R]):
+    """Registros nomeados por tenant (presets, modelos) persistidos em SQLite.
+
+    Os registros ficam em memória com o plano de execução compilado, então a
+    leitura em uma requisição é só um lookup; gravações feitas por outro
+    worker são notadas pelo `PRAGMA data_version`. Cada subclasse define a
+    tabela, a coluna de texto própria do registro (com o mesmo nome do
+    atributo) e, se precisar, estende `_compile`.
+    """
+
+    table: str
+    value_column: str
+    record_type: Type[R]
+    # Nome do registro nas mensagens de erro.
+    label: str
+
+    def __init__(
+        self,
+        db_path: str,
+        compile_plan: Callable[[Dict[str, Any]], OptimizationPlan],
+        refresh_interval: float = 1.0
+    ):
+        self.db_path = db_path
+        self.compile_plan = compile_plan
+        self.refresh_interval = refresh_interval
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._records: Dict[str, R] = {}
+        self._data_version: Optional[int] = None
+        self._checked_at = 0.0
+
+    def get(self, tenant: str, record_id: str) -> Optional[R]:
+        self._refresh_if_changed()
+        record = self._records.get(record_id)
+        if record is None or record.tenant != tenant:
+            return None
+        return record
+
+    def list(self, tenant: str) -> List[R]:
+        self._refresh_if_changed()
+        return sorted(
+            (r for r in self._records.values() if r.tenant == tenant),
+            key=lambda r: r.name
+        )
+
+    def delete(self, tenant: str, record_id: str) -> bool:
+        with self._lock:
+            if self.get(tenant, record_id) is None:
+                return False
+            self._execute(f'DELETE FROM {self.table} WHERE id = ? AND tenant = ?', (record_id, tenant))
+            del self._records[record_id]
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _create(self, tenant: str, name: str, value: Any, config: Dict[str, Any]) -> R:
+        now = time.time()
+        record = self._compile(self._record(
+            uuid.uuid4().hex, tenant, self._validate_name(name), value, config, now, now
+        ))
+
+        with self._lock:
+            try:
+                self._execute(
+                    f'INSERT INTO {self.table} '
+                    f'(id, tenant, name, {self.value_column}, config, created_at, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (record.id, tenant, record.name, value,
+                     json.dumps(record.config), record.created_at, record.updated_at)
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Já existe um {self.label} chamado '{record.name}'.")
+            self._records[record.id] = record
+        return record
+
+    def _update(
+        self,
+        tenant: str,
+        record_id: str,
+        name: Optional[str],
+        value: Optional[Any],
+        config: Optional[Dict[str, Any]]
+    ) -> Optional[R]:
+        with self._lock:
+            current = self.get(tenant, record_id)
+            if current is None:
+                return None
+
+            record = self._compile(self._record(
+                current.id,
+                tenant,
+                self._validate_name(name) if name is not None else current.name,
+                value if value is not None else getattr(current, self.value_column),
+                config if config is not None else current.config,
+                current.created_at,
+                time.time()
+            ))
+            try:
+                self._execute(
+                    f'UPDATE {self.table} SET name = ?, {self.value_column} = ?, config = ?, updated_at = ? '
+                    'WHERE id = ? AND tenant = ?',
+                    (record.name, getattr(record, self.value_column), json.dumps(record.config),
+                     record.updated_at, record_id, tenant)
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Já existe um {self.label} chamado '{record.name}'.")
+            self._records[record_id] = record
+            return record
+
+    def _record(
+        self, record_id: str, tenant: str, name: str, value: Any,
+        config: Dict[str, Any], created_at: float, updated_at: float
+    ) -> R:
+        return self.record_type(
+            id=record_id, tenant=tenant, name=name, config=config,
+            created_at=created_at, updated_at=updated_at, **{self.value_column: value}
+        )
+
+    def _compile(self, record: R) -> R:
+        error = validate_config_options(record.config)
+        if error:
+            raise ValueError(error)
+        record.plan = self.compile_plan(record.config)
+        return record
+
+    def _validate_name(self, name: Any) -> str:
+        if not isinstance(name, str) or not name.strip() or len(name) > 100:
+            raise ValueError(f'O nome do {self.label} é obrigatório e deve ter até 100 caracteres.')
+        return name.strip()
+
+    def _connect(self) -> sqlite3.Connection:
+        # A conexão só é aberta no primeiro uso: instâncias que não usam
+        # registros personalizados não criam o banco.
+        if self._connection is None:
+            directory = os.path.dirname(os.path.abspath(self.db_path))
+            if self.db_path != ':memory:':
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                'id TEXT PRIMARY KEY, tenant TEXT NOT NULL, name TEXT NOT NULL, '
+                f'{self.value_column} TEXT NOT NULL, config TEXT NOT NULL, '
+                'created_at REAL NOT NULL, updated_at REAL NOT NULL, '
+                'UNIQUE (tenant, name))'
+            )
+        return self._connection
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        return self._connect().execute(sql, params)
+
+    def _refresh_if_changed(self) -> None:
+        now = time.monotonic()
+        if self._data_version is not None and now - self._checked_at < self.refresh_interval:
+            return
+
+        with self._lock:
+            self._checked_at = now
+            # data_version muda quando outra conexão (outro worker) grava no banco.
+            version = self._execute('PRAGMA data_version').fetchone()[0]
+            if version == self._data_version:
+                return
+
+            records = {}
+            rows = self._execute(
+                f'SELECT id, tenant, name, {self.value_column}, config, created_at, updated_at FROM {self.table}'
+            ).fetchall()
+            for row in rows:
+                current = self._records.get(row[0])
+                # Mantém o registro atual, e com ele o que já foi compilado.
+                if current is not None and current.updated_at == row[6]:
+                    records[row[0]] = current
+                    continue
+                try:
+                    records[row[0]] = self._compile(self._record(
+                        row[0], row[1], row[2], row[3], json.loads(row[4]), row[5], row[6]
+                    ))
+                except ValueError:
+                    continue
+
+            self._records = records
+            self._data_version = version
@@ -0,0 +1,67 @@
+﻿import re
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.models.optimization import StoredTemplate
+from src.services.record_store import TenantRecordStore
+
+_SLOT_NAME = re.compile(r'[A-Za-z_]\w*')
+MAX_TEMPLATE_LENGTH = 100000
+
+
+def parse_template(template: Any) -> Tuple[List[str], List[str]]:
+    """Separa o modelo em texto fixo e placeholders (`{nome}`; `{{` é literal)."""
+    if not isinstance(template, str) or not template.strip():
+        raise ValueError('O campo "template" é obrigatório.')
+    if len(template) > MAX_TEMPLATE_LENGTH:
+        raise ValueError(f'O modelo deve ter até {MAX_TEMPLATE_LENGTH} caracteres.')
+    literals, slots = [], []
+    pending = ''
+    try:
+        parsed = list(Formatter().parse(template))
+    except ValueError:
+        raise ValueError('Modelo inválido: chaves sem par (use "{{" e "}}" para chaves literais).')
+    for literal, name, format_spec, conversion in parsed:
+        pending += literal
+        if name is None:
+            continue
+        if not _SLOT_NAME.fullmatch(name) or format_spec or conversion:
+            raise ValueError(f'Placeholder inválido: "{{{name}}}". Use apenas {{nome}}.')
+        literals.append(pending)
+        slots.append(name)
+        pending = ''
+    literals.append(pending)
+    if not slots:
+        raise ValueError('O modelo deve ter pelo menos um placeholder.')
+    return literals, slots
+
+
+class TemplateStore(TenantRecordStore[StoredTemplate]):
+    """Modelos de prompt do tenant, persistidos no SQLite dos presets.
+
+    Além do plano, a compilação separa o texto fixo dos placeholders. Os
+    trechos fixos otimizados (`compiled`) são montados por cada worker no
+    primeiro uso do modelo.
+    """
+
+    table = 'templates'
+    value_column = 'template'
+    record_type = StoredTemplate
+    label = 'modelo'
+
+    def create(self, tenant: str, name: str, template: str, config: Dict[str, Any]) -> StoredTemplate:
+        return self._create(tenant, name, template, config or {})
+
+    def update(
+        self,
+        tenant: str,
+        template_id: str,
+        name: Optional[str] = None,
+        template: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None
+    ) -> Optional[StoredTemplate]:
+        return self._update(tenant, template_id, name, template, config)
+
+    def _compile(self, stored: StoredTemplate) -> StoredTemplate:
+        stored.literals, stored.slots = parse_template(stored.template)
+        return super()._compile(stored)
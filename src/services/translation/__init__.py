@@ -0,0 +1,14 @@
+﻿from .cache import TranslationCache
+from .chunking import split_chunks
+from .glossary import GlossaryTranslator, load_glossary_translator
+from .hot_segments import CachePrewarmer, CountMinSketch, HotSegments
+
+__all__ = [
+    'TranslationCache',
+    'split_chunks',
+    'GlossaryTranslator',
+    'load_glossary_translator',
+    'CountMinSketch',
+    'HotSegments',
+    'CachePrewarmer'
+]
@@ -0,0 +1,39 @@
+﻿import re
+from typing import List
+
+# Uma frase com o espaço que a segue; o último trecho pode não ter pontuação.
+_SENTENCE = re.compile(r'[^.!?\n]*(?:[.!?]+|\n|$)\s*')
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    # Frases maiores que o limite são cortadas no último espaço antes dele.
+    pieces = []
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(' ', 0, max_chars) + 1 or max_chars
+        pieces.append(sentence[:cut])
+        sentence = sentence[cut:]
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def split_chunks(text: str, max_chars: int) -> List[str]:
+    """Divide o texto em trechos de até `max_chars` alinhados às frases.
+
+    Os trechos mantêm os espaços entre as frases, então `''.join` devolve o
+    texto original.
+    """
+    chunks: List[str] = []
+    current = ''
+    for match in _SENTENCE.finditer(text):
+        sentence = match.group()
+        if not sentence:
+            continue
+        for piece in _split_long(sentence, max_chars):
+            if current and len(current) + len(piece) > max_chars:
+                chunks.append(current)
+                current = ''
+            current += piece
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,73 @@
+﻿import os
+import re
+from typing import Dict, Optional
+
+from src.services.optimization.abbreviation_service import AbbreviationMatcher
+from src.services.optimization.custom_dictionary_service import parse_dictionary
+
+
+# Palavras dentro de termos com hífen, ponto ou barra ("e-mail", "S.A.",
+# "C:/dados/a") não são traduzidas; um ponto final depois da palavra, sim.
+_TOKEN_START = r'(?<![\w./-])'
+_TOKEN_END = r'(?!\w|[./-]\w)'
+_SENTENCE_END = '.!?:'
+_OPENING_MARKS = '"\'“‘«(['
+
+
+def _starts_sentence(text: str, position: int) -> bool:
+    index = position - 1
+    while index >= 0 and text[index] != '\n' and (text[index].isspace() or text[index] in _OPENING_MARKS):
+        index -= 1
+    return index < 0 or text[index] == '\n' or text[index] in _SENTENCE_END
+
+
+class GlossaryTranslator:
+    """Tradutor offline palavra a palavra (ou expressão) por um glossário.
+
+    Usa o mesmo casamento em trie das abreviações personalizadas: uma passada
+    sobre o texto, sem diferenciar maiúsculas, com a expressão mais longa
+    vencendo. Palavras fora do glossário são mantidas, assim como uma letra
+    maiúscula isolada no meio da frase ("vitamina A"), que é nome e não artigo.
+    """
+
+    def __init__(self, entries: Dict[str, str]):
+        self.matcher = AbbreviationMatcher(entries.items(), _TOKEN_START, _TOKEN_END)
+
+    def __len__(self) -> int:
+        return len(self.matcher)
+
+    def translate(self, text: str) -> str:
+        if self.matcher.pattern is None:
+            return text
+        entries = self.matcher.entries
+
+        def replace(match):
+            matched_text = match.group()
+            entry = entries.get(matched_text.lower())
+            if entry is None:
+                return matched_text
+            if len(matched_text) == 1 and matched_text.isupper() and not _starts_sentence(text, match.start()):
+                return matched_text
+            return self._match_case(matched_text, entry[1])
+
+        return self.matcher.pattern.sub(replace, text)
+
+    @staticmethod
+    def _match_case(matched_text: str, translation: str) -> str:
+        if len(matched_text) > 1 and matched_text.isupper():
+            return translation.upper()
+        if matched_text[0].isupper():
+            return translation[:1].upper() + translation[1:]
+        return translation
+
+
+def load_glossary_translator(path: Optional[str] = None) -> GlossaryTranslator:
+    # Um arquivo JSON ou CSV (mesmo formato dos dicionários personalizados)
+    # complementa e sobrepõe o glossário embutido.
+    from src.data.glossary import get_pt_en_glossary
+    entries = get_pt_en_glossary()
+    if path:
+        with open(path, encoding='utf-8-sig') as source:
+            file_format = os.path.splitext(path)[1].lstrip('.').lower()
+            entries.update(parse_dictionary(source.read(), file_format))
+    return GlossaryTranslator(entries)
@@ -0,0 +1,240 @@
+﻿import logging
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from .cache import TranslationCache
+
+_MASK_32 = 0xFFFFFFFF
+
+
+class CountMinSketch:
+    """Contagem aproximada de frequências em memória fixa.
+
+    A estimativa nunca fica abaixo da contagem real; o erro para cima é
+    limitado por `total / width` na maioria das linhas. A atualização é
+    conservadora (só sobem os contadores iguais ao mínimo), o que reduz esse
+    erro nos itens raros.
+    """
+
+    def __init__(self, width: int, depth: int):
+        self.width = max(width, 1)
+        self.depth = max(depth, 1)
+        self._rows = [array('I', bytes(4 * self.width)) for _ in range(self.depth)]
+        self.total = 0
+
+    def _indexes(self, key: Hashable) -> List[int]:
+        # Um hash de 64 bits dividido em dois gera os índices de todas as
+        # linhas (h1 + i * h2), sem recalcular o hash da chave.
+        value = hash(key)
+        h1, h2 = value & _MASK_32, ((value >> 32) & _MASK_32) | 1
+        return [(h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, key: Hashable) -> int:
+        indexes = self._indexes(key)
+        estimate = min(row[index] for row, index in zip(self._rows, indexes)) + 1
+        if estimate > _MASK_32:
+            return estimate - 1
+        for row, index in zip(self._rows, indexes):
+            if row[index] < estimate:
+                row[index] = estimate
+        self.total += 1
+        return estimate
+
+    def estimate(self, key: Hashable) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def decay(self) -> None:
+        """Divide as contagens por dois, para os segmentos antigos esfriarem."""
+        self._rows = [array('I', (count >> 1 for count in row)) for row in self._rows]
+        self.total >>= 1
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(row.itemsize * len(row) for row in self._rows)
+
+
+class HotSegments:
+    """Os `top_k` segmentos mais frequentes (heavy hitters) sobre o sketch.
+
+    O decaimento do sketch depende de novos registros; sem tráfego, são os
+    `max_idle` segundos sem ocorrência que tiram um segmento do top.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        depth: int,
+        top_k: int,
+        decay_every: int,
+        max_idle: float = 0.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.sketch = CountMinSketch(width, depth)
+        self.top_k = top_k
+        self.decay_every = decay_every
+        self.max_idle = max_idle
+        self.clock = clock
+        self.top: Dict[Hashable, int] = {}
+        self.last_seen: Dict[Hashable, float] = {}
+        # Menor contagem do top; só um segmento acima dela disputa uma vaga.
+        self._floor = 0
+        self.records = 0
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable) -> None:
+        if self.top_k <= 0:
+            return
+        with self._lock:
+            self.records += 1
+            count = self.sketch.add(key)
+            if key in self.top:
+                self.top[key] = count
+            elif len(self.top) < self.top_k:
+                self.top[key] = count
+                self._floor = min(self.top.values())
+            elif count > self._floor:
+                coldest = min(self.top, key=self.top.__getitem__)
+                if count > self.top[coldest]:
+                    del self.top[coldest]
+                    self.last_seen.pop(coldest, None)
+                    self.top[key] = count
+                self._floor = min(self.top.values())
+            if key in self.top:
+                self.last_seen[key] = self.clock()
+            if self.decay_every > 0 and self.records % self.decay_every == 0:
+                self.sketch.decay()
+                self.top = {item: value >> 1 for item, value in self.top.items() if value > 1}
+                self.last_seen = {item: self.last_seen[item] for item in self.top}
+                self._floor = min(self.top.values(), default=0)
+
+    def drop_idle(self) -> int:
+        """Tira do top os segmentos sem ocorrência há mais de `max_idle` segundos."""
+        if self.max_idle <= 0:
+            return 0
+        with self._lock:
+            limit = self.clock() - self.max_idle
+            idle = [key for key, seen in self.last_seen.items() if seen < limit]
+            for key in idle:
+                del self.top[key]
+                del self.last_seen[key]
+            if idle:
+                self._floor = min(self.top.values(), default=0)
+            return len(idle)
+
+    def is_hot(self, key: Hashable) -> bool:
+        return key in self.top
+
+    def hottest(self) -> List[Tuple[Hashable, int]]:
+        with self._lock:
+            return sorted(self.top.items(), key=lambda item: item[1], reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'width': self.sketch.width,
+            'depth': self.sketch.depth,
+            'memory_bytes': self.sketch.memory_bytes,
+            'records': self.records,
+            'top_k': self.top_k,
+            'tracked': len(self.top)
+        }
+
+
+class CachePrewarmer:
+    """Traduz de novo os segmentos quentes antes que saiam do cache.
+
+    A cada rodada, os segmentos do top com pelo menos `min_count` ocorrências
+    que não estão no cache, ou que vencem em menos de `refresh_ahead`
+    segundos, são traduzidos por `translate(key)` e gravados no cache.
+    """
+
+    def __init__(
+        self,
+        hot_segments: HotSegments,
+        cache: TranslationCache,
+        translate: Callable[[Hashable], Optional[str]],
+        refresh_ahead: float,
+        min_count: int
+    ):
+        self.hot_segments = hot_segments
+        self.cache = cache
+        self.translate = translate
+        self.refresh_ahead = refresh_ahead
+        self.min_count = min_count
+        self.warmed: Set[Hashable] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.refreshed = 0
+        self.failures = 0
+        self.hot_lookups = 0
+        self.hot_hits = 0
+        self.prewarmed_hits = 0
+
+    def run_once(self) -> int:
+        # Sem esse corte, depois que o tráfego para o top continuaria sendo
+        # retraduzido a cada ciclo de TTL, gastando a cota dos provedores.
+        self.hot_segments.drop_idle()
+        refreshed = 0
+        for key, count in self.hot_segments.hottest():
+            if count < self.min_count or self._stop.is_set():
+                continue
+            expires_in = self.cache.expires_in(key)
+            if expires_in is not None and expires_in > self.refresh_ahead:
+                continue
+            translated = self.translate(key)
+            if translated is None:
+                self.failures += 1
+                continue
+            self.cache.put(key, translated)
+            refreshed += 1
+            with self._lock:
+                self.warmed.add(key)
+        # Segmentos que saíram do top não são mais mantidos.
+        with self._lock:
+            self.warmed.intersection_update(key for key, _ in self.hot_segments.hottest())
+        self.runs += 1
+        self.refreshed += refreshed
+        return refreshed
+
+    def observe(self, key: Hashable, hit: bool) -> None:
+        """Conta uma consulta ao cache de um segmento quente."""
+        if not self.hot_segments.is_hot(key):
+            return
+        with self._lock:
+            self.hot_lookups += 1
+            if hit:
+                self.hot_hits += 1
+                if key in self.warmed:
+                    self.prewarmed_hits += 1
+
+    def start(self, interval: float) -> None:
+        with self._lock:
+            if self._thread is not None or interval <= 0:
+                return
+            self._thread = threading.Thread(target=self._loop, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Falha no pré-aquecimento do cache de tradução: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'running': self._thread is not None and not self._stop.is_set(),
+            'runs': self.runs,
+            'refreshed': self.refreshed,
+            'failures': self.failures,
+            'warmed_segments': len(self.warmed),
+            'hot_lookups': self.hot_lookups,
+            'hot_hit_rate': self.hot_hits / self.hot_lookups if self.hot_lookups else 0.0,
+            'prewarmed_hits': self.prewarmed_hits
+        }
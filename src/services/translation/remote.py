@@ -0,0 +1,264 @@
+﻿import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from urllib3.util.retry import Retry
+
+from src.config.settings import Config
+from src.services.translation.scheduler import MicroBatcher, ProviderScheduler
+from src.utils.deadline import Deadline
+
+PROVIDERS = ('mymemory', 'libretranslate')
+
+# Respostas transitórias que valem nova tentativa.
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def build_retry(config: Config) -> Retry:
+    # Só GET é repetido depois que a requisição foi enviada (leitura ou status);
+    # falhas de conexão são repetidas em qualquer método, pois nada chegou ao
+    # provedor.
+    options = dict(
+        total=config.TRANSLATION_RETRIES,
+        backoff_factor=config.TRANSLATION_BACKOFF_FACTOR,
+        status_forcelist=_RETRY_STATUSES,
+        allowed_methods=frozenset({'GET'}),
+        raise_on_status=False
+    )
+    try:
+        return Retry(backoff_jitter=config.TRANSLATION_BACKOFF_JITTER, **options)
+    except TypeError:
+        # `backoff_jitter` só existe a partir do urllib3 2.0.
+        return Retry(**options)
+
+
+def _session(adapter: HTTPAdapter) -> requests.Session:
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class _ProviderPool:
+    """Sessão de um provedor com seu próprio pool de conexões keep-alive.
+
+    As chamadas com prazo usam uma segunda sessão, sem novas tentativas: o
+    backoff e as repetições passariam do tempo que resta.
+    """
+
+    def __init__(self, config: Config, pool_size: int):
+        self.pool_size = pool_size
+        self.adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=build_retry(config)
+        )
+        self.session = _session(self.adapter)
+        self.deadline_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.deadline_session = _session(self.deadline_adapter)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.failures = 0
+
+    def connections_opened(self) -> int:
+        total = 0
+        for adapter in (self.adapter, self.deadline_adapter):
+            pools = adapter.poolmanager.pools
+            total += sum(pool.num_connections for pool in map(pools.get, pools.keys()) if pool is not None)
+        return total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pool_size': self.pool_size,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'utilization': self.in_flight / self.pool_size,
+            'peak_utilization': self.peak_in_flight / self.pool_size,
+            'connections_opened': self.connections_opened(),
+            'requests': self.requests,
+            'failures': self.failures
+        }
+
+
+def build_scheduler(config: Config, provider: str) -> ProviderScheduler:
+    limits = config.TRANSLATION_RATE_LIMITS[provider]
+    return ProviderScheduler(
+        requests_per_second=limits['requests_per_second'],
+        burst=limits['burst'],
+        chars_per_day=limits['chars_per_day'],
+        max_wait=config.TRANSLATION_MAX_QUEUE_WAIT
+    )
+
+
+class RemoteTranslator:
+    """MyMemory com fallback para LibreTranslate.
+
+    Cada provedor tem sua sessão e seu pool de conexões (compartilhados pelas
+    threads do worker), com tentativas e timeouts de conexão e leitura
+    separados, e um agendador que respeita seus limites de uso. A
+    LibreTranslate aceita vários textos por chamada, então os fallbacks
+    concorrentes são agrupados.
+
+    Com um prazo (`deadline`), a espera na fila e os timeouts ficam limitados
+    ao tempo que resta, o fallback só é tentado se ainda houver tempo e a
+    chamada não entra nos lotes, cuja janela atrasaria a resposta.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.timeout = (config.TRANSLATION_CONNECT_TIMEOUT, config.TRANSLATION_READ_TIMEOUT)
+        self.pools = {
+            provider: _ProviderPool(config, config.TRANSLATION_POOL_SIZES[provider])
+            for provider in PROVIDERS
+        }
+        self.schedulers = {provider: build_scheduler(config, provider) for provider in PROVIDERS}
+        self.libretranslate_batcher = MicroBatcher(
+            self._translate_libretranslate,
+            window=config.TRANSLATION_BATCH_WINDOW,
+            max_chars=config.TRANSLATION_BATCH_MAX_CHARS,
+            max_items=config.TRANSLATION_BATCH_MAX_ITEMS
+        )
+        self._lock = threading.Lock()
+
+    def _make_translation_request(
+        self,
+        provider: str,
+        url: str,
+        method: str,
+        chars: int,
+        deadline: Optional[Deadline] = None,
+        **kwargs
+    ) -> Any:
+        max_wait = None
+        if deadline is not None:
+            if deadline.expired():
+                return None
+            max_wait = deadline.remaining()
+
+        # Acima do limite do provedor a chamada é recusada aqui, sem gastar
+        # a cota nem provocar respostas 429.
+        if not self.schedulers[provider].acquire(chars, max_wait):
+            logging.warning(f"Limite de uso de {provider} atingido; chamada descartada.")
+            return None
+
+        pool = self.pools[provider]
+        session, timeout = pool.session, self.timeout
+        if deadline is not None:
+            # A espera na fila já consumiu parte do prazo.
+            if deadline.expired():
+                return None
+            session = pool.deadline_session
+            timeout = tuple(deadline.cap(value) for value in self.timeout)
+        with self._lock:
+            pool.in_flight += 1
+            pool.requests += 1
+            pool.peak_in_flight = max(pool.peak_in_flight, pool.in_flight)
+        try:
+            if method.upper() == 'GET':
+                response = session.get(
+                    url,
+                    params=kwargs.get('params'),
+                    timeout=timeout
+                )
+            elif method.upper() == 'POST':
+                response = session.post(
+                    url,
+                    json=kwargs.get('json'),
+                    timeout=timeout
+                )
+            else:
+                raise ValueError("Método HTTP não suportado.")
+
+            response.raise_for_status()
+            data = response.json()
+
+            if provider == 'mymemory' and data.get('responseStatus') == 200:
+                return data['responseData']['translatedText']
+            if provider == 'libretranslate' and "translatedText" in data:
+                return data["translatedText"]
+
+            logging.warning(f"Resposta inesperada da API de tradução {url}: {data}")
+            self._count_failure(pool)
+            return None
+
+        except RequestException as e:
+            logging.error(f"Erro de comunicação com a API de tradução {url}: {e}")
+            self._count_failure(pool)
+            return None
+        except (KeyError, json.JSONDecodeError) as e:
+            logging.error(f"Erro ao processar a resposta da API de tradução {url}: {e}")
+            self._count_failure(pool)
+            return None
+        finally:
+            with self._lock:
+                pool.in_flight -= 1
+
+    def _count_failure(self, pool: _ProviderPool) -> None:
+        with self._lock:
+            pool.failures += 1
+
+    def translate(self, text: str, deadline: Optional[Deadline] = None) -> Optional[str]:
+        params = {'q': text, 'langpair': 'pt|en'}
+        translated_text = self._make_translation_request(
+            'mymemory', self.config.MYMEMORY_API_URL, 'GET', len(text), deadline, params=params
+        )
+        if translated_text:
+            return translated_text
+
+        if deadline is not None and deadline.expired():
+            logging.warning("Prazo da requisição esgotado; tradução abandonada.")
+            return None
+
+        logging.info("Falha na API MyMemory, tentando fallback com LibreTranslate.")
+        if deadline is None:
+            translated_text = self.libretranslate_batcher.submit(text)
+        else:
+            translated_text = self._translate_libretranslate([text], deadline)[0]
+        if translated_text:
+            return translated_text
+
+        logging.error("Ambas as APIs de tradução falharam. Retornando texto original.")
+        return None
+
+    def _translate_libretranslate(self, texts: List[str], deadline: Optional[Deadline] = None) -> List[Optional[str]]:
+        # Um texto vai como string, como sempre foi; vários, como lista.
+        json_data = {"q": texts[0] if len(texts) == 1 else texts, "source": "pt", "target": "en"}
+        translated = self._make_translation_request(
+            'libretranslate', self.config.LIBRETRANSLATE_API_URL, 'POST', sum(map(len, texts)), deadline,
+            json=json_data
+        )
+        if isinstance(translated, str) and len(texts) == 1:
+            return [translated]
+        if isinstance(translated, list) and len(translated) == len(texts):
+            return [item if isinstance(item, str) else None for item in translated]
+        return [None] * len(texts)
+
+    def warmup(self) -> Dict[str, bool]:
+        """Abre uma conexão com cada provedor, que fica no pool para a primeira tradução."""
+        urls = {'mymemory': self.config.MYMEMORY_API_URL, 'libretranslate': self.config.LIBRETRANSLATE_API_URL}
+        results = {}
+        for provider, url in urls.items():
+            parts = urlsplit(url)
+            try:
+                self.pools[provider].session.head(
+                    f'{parts.scheme}://{parts.netloc}/', timeout=self.timeout, allow_redirects=False
+                )
+                results[provider] = True
+            except RequestException as e:
+                logging.warning(f"Falha ao aquecer a conexão com {provider}: {e}")
+                results[provider] = False
+        return results
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {
+            provider: {**pool.stats(), 'scheduler': self.schedulers[provider].stats()}
+            for provider, pool in self.pools.items()
+        }
+        stats['libretranslate']['batching'] = self.libretranslate_batcher.stats()
+        return stats
@@ -0,0 +1,174 @@
+﻿import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.rate_limiting import TokenBucket
+
+_SECONDS_PER_DAY = 86400
+
+
+class ProviderScheduler:
+    """Limites de um provedor: requisições por segundo e caracteres por dia.
+
+    Uma chamada acima do limite espera a sua vez por até `max_wait` segundos;
+    se a espera for maior, é recusada sem chegar ao provedor. Zero desativa o
+    limite correspondente.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        burst: int,
+        chars_per_day: int,
+        max_wait: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.max_wait = max_wait
+        self.sleep = sleep
+        self.request_bucket = None
+        self.char_bucket = None
+        if requests_per_second > 0:
+            self.request_bucket = TokenBucket(requests_per_second, max(burst, 1), clock)
+        if chars_per_day > 0:
+            self.char_bucket = TokenBucket(chars_per_day / _SECONDS_PER_DAY, chars_per_day, clock)
+        self._lock = threading.Lock()
+        self.queue_depth = 0
+        self.peak_queue_depth = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_observed_wait = 0.0
+
+    def acquire(self, chars: int, max_wait: Optional[float] = None) -> bool:
+        # `max_wait` só reduz a espera aceita (ex.: o prazo da requisição).
+        delay = self._reserve(chars, self.max_wait if max_wait is None else min(max_wait, self.max_wait))
+        if delay is None:
+            return False
+        if delay > 0:
+            try:
+                self.sleep(delay)
+            finally:
+                with self._lock:
+                    self.queue_depth -= 1
+        return True
+
+    def _reserve(self, chars: int, max_wait: float) -> Optional[float]:
+        with self._lock:
+            delay = 0.0
+            reserved = []
+            for bucket, tokens in ((self.request_bucket, 1), (self.char_bucket, chars)):
+                if bucket is None:
+                    continue
+                bucket_delay = bucket.reserve(tokens, max_wait)
+                if bucket_delay is None:
+                    for reserved_bucket, reserved_tokens in reserved:
+                        reserved_bucket.refund(reserved_tokens)
+                    self.rejected += 1
+                    return None
+                reserved.append((bucket, tokens))
+                delay = max(delay, bucket_delay)
+
+            self.admitted += 1
+            if delay > 0:
+                self.delayed += 1
+                self.total_wait += delay
+                self.max_observed_wait = max(self.max_observed_wait, delay)
+                self.queue_depth += 1
+                self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+            return delay
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self.queue_depth,
+            'peak_queue_depth': self.peak_queue_depth,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'delayed': self.delayed,
+            'average_wait': self.total_wait / self.delayed if self.delayed else 0.0,
+            'max_wait': self.max_observed_wait
+        }
+
+
+class _Batch:
+
+    def __init__(self):
+        self.texts: List[str] = []
+        self.chars = 0
+        self.results: List[Optional[str]] = []
+        self.closed = threading.Event()
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Junta os segmentos enviados por threads concorrentes numa só chamada.
+
+    A primeira thread de um lote espera `window` segundos pelas demais e faz a
+    chamada; as outras aguardam o resultado. Um lote fecha antes disso ao
+    atingir `max_chars` ou `max_items`.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List[str]], List[Optional[str]]],
+        window: float,
+        max_chars: int,
+        max_items: int
+    ):
+        self.send = send
+        self.window = window
+        self.max_chars = max_chars
+        self.max_items = max_items
+        self._open: Optional[_Batch] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.segments = 0
+
+    def submit(self, text: str) -> Optional[str]:
+        if self.window <= 0:
+            return self._send([text])[0]
+
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            index = len(batch.texts)
+            batch.texts.append(text)
+            batch.chars += len(text)
+            if batch.chars >= self.max_chars or len(batch.texts) >= self.max_items:
+                self._open = None
+                batch.closed.set()
+
+        if not leader:
+            batch.done.wait()
+            return batch.results[index]
+
+        batch.closed.wait(self.window)
+        with self._lock:
+            if self._open is batch:
+                self._open = None
+        try:
+            batch.results = self._send(batch.texts)
+        finally:
+            if len(batch.results) != len(batch.texts):
+                batch.results = [None] * len(batch.texts)
+            batch.done.set()
+        return batch.results[index]
+
+    def _send(self, texts: List[str]) -> List[Optional[str]]:
+        with self._lock:
+            self.batches += 1
+            self.segments += len(texts)
+        results = self.send(texts)
+        if not results or len(results) != len(texts):
+            return [None] * len(texts)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'batches': self.batches,
+            'segments': self.segments,
+            'average_batch_size': self.segments / self.batches if self.batches else 0.0
+        }
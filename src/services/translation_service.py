@@ -1,71 +1,138 @@
-﻿import json
-import logging
-from typing import Optional
-
-import requests
-from requests.exceptions import RequestException
+﻿import threading
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from src.config.settings import Config
+from src.services.translation import (
+    CachePrewarmer,
+    GlossaryTranslator,
+    HotSegments,
+    TranslationCache,
+    load_glossary_translator,
+    split_chunks
+)
+from src.utils.deadline import Deadline
+from src.utils.validators import TRANSLATION_BACKENDS
 
 
 class TranslationService:
+    """Escolhe o backend de tradução e divide o texto em trechos cacheados.
+
+    `remote` traduz no máximo `TRANSLATION_CHAR_LIMIT` caracteres do texto,
+    como sempre fez; `glossary` roda localmente, sem limite nem rede. Os dois
+    dividem o texto em trechos alinhados às frases, e cada trecho traduzido
+    fica no cache por `TRANSLATION_CACHE_TTL` segundos.
+
+    A frequência de cada trecho traduzido remotamente é registrada num sketch;
+    com `start_prewarming` (só no worker da API), os mais frequentes são
+    retraduzidos em segundo plano antes de vencerem, para que os trechos
+    recorrentes (prompts de sistema, modelos) sempre encontrem o cache. O
+    glossário é local e barato, então fica de fora.
+    """
 
     def __init__(self, config: Config):
         self.config = config
-        self.http_session = requests.Session()
-
-    def _make_translation_request(self, url: str, method: str, **kwargs) -> Optional[str]:
-        try:
-            if method.upper() == 'GET':
-                response = self.http_session.get(
-                    url, 
-                    params=kwargs.get('params'), 
-                    timeout=self.config.REQUESTS_TIMEOUT
-                )
-            elif method.upper() == 'POST':
-                response = self.http_session.post(
-                    url, 
-                    json=kwargs.get('json'), 
-                    timeout=self.config.REQUESTS_TIMEOUT
-                )
-            else:
-                raise ValueError("Método HTTP não suportado.")
-
-            response.raise_for_status()
-            data = response.json()
-
-            if "mymemory" in url and data.get('responseStatus') == 200:
-                return data['responseData']['translatedText']
-            if "libretranslate" in url and "translatedText" in data:
-                return data["translatedText"]
-
-            logging.warning(f"Resposta inesperada da API de tradução {url}: {data}")
-            return None
-
-        except RequestException as e:
-            logging.error(f"Erro de comunicação com a API de tradução {url}: {e}")
-            return None
-        except (KeyError, json.JSONDecodeError) as e:
-            logging.error(f"Erro ao processar a resposta da API de tradução {url}: {e}")
-            return None
-
-    def translate_to_english(self, text: str) -> str:
-        text_to_translate = text[:self.config.TRANSLATION_CHAR_LIMIT]
-
-        params = {'q': text_to_translate, 'langpair': 'pt|en'}
-        translated_text = self._make_translation_request(
-            self.config.MYMEMORY_API_URL, 'GET', params=params
+        self.cache = TranslationCache(config.TRANSLATION_CACHE_SIZE, config.TRANSLATION_CACHE_TTL)
+        self._remote = None
+        self._glossary: Optional[GlossaryTranslator] = None
+        self._lock = threading.Lock()
+        self.hot_segments = HotSegments(
+            config.TRANSLATION_SKETCH_WIDTH,
+            config.TRANSLATION_SKETCH_DEPTH,
+            config.TRANSLATION_PREWARM_TOP_K,
+            config.TRANSLATION_SKETCH_DECAY,
+            config.TRANSLATION_PREWARM_MAX_IDLE
         )
-        if translated_text:
-            return translated_text
-
-        logging.info("Falha na API MyMemory, tentando fallback com LibreTranslate.")
-        json_data = {"q": text_to_translate, "source": "pt", "target": "en"}
-        translated_text = self._make_translation_request(
-            self.config.LIBRETRANSLATE_API_URL, 'POST', json=json_data
+        self.prewarmer = CachePrewarmer(
+            self.hot_segments,
+            self.cache,
+            self._prewarm_translate,
+            refresh_ahead=config.TRANSLATION_PREWARM_AHEAD,
+            min_count=config.TRANSLATION_PREWARM_MIN_COUNT
         )
-        if translated_text:
-            return translated_text
 
-        logging.error("Ambas as APIs de tradução falharam. Retornando texto original.")
-        return text
+    def start_prewarming(self) -> None:
+        self.prewarmer.start(self.config.TRANSLATION_PREWARM_INTERVAL)
+
+    @property
+    def remote(self):
+        # `requests` é a dependência mais cara de importar; o backend offline
+        # não a carrega.
+        if self._remote is None:
+            with self._lock:
+                if self._remote is None:
+                    from src.services.translation.remote import RemoteTranslator
+                    self._remote = RemoteTranslator(self.config)
+        return self._remote
+
+    @property
+    def glossary(self) -> GlossaryTranslator:
+        if self._glossary is None:
+            with self._lock:
+                if self._glossary is None:
+                    self._glossary = load_glossary_translator(self.config.TRANSLATION_GLOSSARY_PATH)
+        return self._glossary
+
+    def preload(self, backend: Optional[str] = None) -> None:
+        backend = backend or self.config.TRANSLATION_BACKEND
+        if backend == 'glossary':
+            self.glossary
+        else:
+            self.remote
+
+    def warmup(self) -> Dict[str, bool]:
+        return self.remote.warmup()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'cache': self.cache.stats(),
+            'providers': self._remote.stats() if self._remote is not None else {},
+            'hot_segments': self.hot_segments.stats(),
+            'prewarm': self.prewarmer.stats()
+        }
+
+    def _translator(self, backend: str) -> Callable[[str], Optional[str]]:
+        return self.glossary.translate if backend == 'glossary' else self.remote.translate
+
+    def _prewarm_translate(self, key: Tuple[str, str]) -> Optional[str]:
+        return self.remote.translate(key[1])
+
+    def translate_to_english(
+        self,
+        text: str,
+        backend: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        backend = backend or self.config.TRANSLATION_BACKEND
+        if backend not in TRANSLATION_BACKENDS:
+            raise ValueError(f'Backend de tradução desconhecido: "{backend}".')
+
+        original = text
+        translate = self._translator(backend)
+        if backend == 'remote':
+            text = text[:self.config.TRANSLATION_CHAR_LIMIT]
+            if deadline is not None:
+                translate = partial(translate, deadline=deadline)
+
+        parts = []
+        for chunk in split_chunks(text, self.config.TRANSLATION_CHAR_LIMIT):
+            # Os espaços nas bordas não vão para o tradutor.
+            core = chunk.strip()
+            if not core:
+                parts.append(chunk)
+                continue
+            key = (backend, core)
+            translated = self.cache.get(key)
+            if backend == 'remote':
+                self.hot_segments.record(key)
+                self.prewarmer.observe(key, translated is not None)
+            if translated is None:
+                translated = translate(core)
+                if translated is None:
+                    # Falha do tradutor: o texto segue sem tradução.
+                    return original
+                self.cache.put(key, translated)
+            leading = chunk[:len(chunk) - len(chunk.lstrip())]
+            trailing = chunk[len(chunk.rstrip()):]
+            parts.append(leading + translated + trailing)
+        return ''.join(parts)
@@ -0,0 +1,92 @@
+﻿import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# Faixas cobertas pela tabela pré-calculada: Latin-1, Latin Extended-A/B, os
+# diacríticos combinantes (removidos), Latin Extended Additional e
+# Latin Extended-C/D.
+TABLE_RANGES = (
+    (0x0000, 0x024F),
+    (0x0300, 0x036F),
+    (0x1E00, 0x1EFF),
+    (0x2C60, 0x2C7F),
+    (0xA720, 0xA7FF),
+)
+
+_OUTSIDE_TABLE = re.compile(
+    '[^' + ''.join(f'\\u{start:04x}-\\u{end:04x}' for start, end in TABLE_RANGES) + ']+'
+)
+# Uma faixa só é bem mais rápida de testar que as cinco da tabela.
+_OUTSIDE_LATIN = re.compile('[^\\x00-\\u024f]')
+_NOT_ASCII_OR_COMBINING = re.compile('[^\\x00-\\x7f\\u0300-\\u036f]')
+_NON_ASCII = re.compile('[^\\x00-\\x7f]')
+
+
+def strip_accents_nfd(text: str) -> str:
+    normalized_text = unicodedata.normalize('NFD', text)
+    return "".join(c for c in normalized_text if unicodedata.category(c) != 'Mn')
+
+
+def _build_accent_table() -> Dict[int, Optional[str]]:
+    table: Dict[int, Optional[str]] = {}
+    for start, end in TABLE_RANGES:
+        for code in range(start, end + 1):
+            char = chr(code)
+            folded = strip_accents_nfd(char)
+            if folded != char:
+                table[code] = folded or None
+    return table
+
+
+ACCENT_TABLE = _build_accent_table()
+
+
+@lru_cache(maxsize=4096)
+def _fold_char(char: str) -> str:
+    return strip_accents_nfd(char)
+
+
+@lru_cache(maxsize=4096)
+def _fold_run(run: str) -> str:
+    # A decomposição é por caractere e as marcas Mn saem todas, então dobrar
+    # um trecho isolado dá o mesmo resultado que dobrá-lo dentro do texto.
+    return strip_accents_nfd(run)
+
+
+def _fold_outside(match: 're.Match[str]') -> str:
+    return _fold_run(match.group())
+
+
+def fold_accents(text: str) -> str:
+    """Remove acentos (marcas Mn após NFD) sem percorrer o texto em Python.
+
+    As faixas latinas usam `ACCENT_TABLE`; só os trechos fora delas (travessão,
+    aspas curvas, grego, emoji) passam pelo filtro por categoria, com cache.
+    Texto só de Latin-1 e Latin Extended-A/B que, decomposto, fica em ASCII e
+    diacríticos combinantes sai por um encode ASCII, mais rápido que a tabela.
+    """
+    if text.isascii():
+        return text
+    if not _OUTSIDE_LATIN.search(text):
+        decomposed = unicodedata.normalize('NFD', text)
+        if not _NOT_ASCII_OR_COMBINING.search(decomposed):
+            # U+0300..U+036F são todos Mn, então descartar os não-ASCII na
+            # codificação equivale ao filtro por categoria.
+            return decomposed.encode('ascii', 'ignore').decode('ascii')
+        return text.translate(ACCENT_TABLE)
+    return _OUTSIDE_TABLE.sub(_fold_outside, text.translate(ACCENT_TABLE))
+
+
+def fold_spans(text: str) -> List[Tuple[int, int, int]]:
+    """Trechos (início, fim, novo tamanho) em que `fold_accents` muda o tamanho do texto.
+
+    A remoção é feita caractere a caractere; só entram os caracteres que somem
+    (diacríticos soltos) ou viram mais de um (ex.: sílabas hangul).
+    """
+    spans = []
+    for match in _NON_ASCII.finditer(text):
+        length = len(_fold_char(match.group()))
+        if length != 1:
+            spans.append((match.start(), match.end(), length))
+    return spans
@@ -0,0 +1,81 @@
+﻿import gzip
+import hashlib
+import json
+from typing import Any, Callable, Dict, Optional
+
+from werkzeug.datastructures import Accept
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele "br" não é oferecido
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard é opcional; sem ele "zstd" não é oferecido
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json',
+    'text/plain',
+    'text/html',
+    'text/css',
+    'application/javascript',
+})
+
+
+def _gzip(data: bytes) -> bytes:
+    # mtime=0 deixa a saída determinística para o mesmo conteúdo.
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _build_compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    # Ordem de preferência do servidor quando o cliente aceita vários com o mesmo q.
+    compressors: Dict[str, Callable[[bytes], bytes]] = {}
+    if zstandard is not None:
+        compressors['zstd'] = zstandard.ZstdCompressor(level=3).compress
+    if brotli is not None:
+        compressors['br'] = lambda data: brotli.compress(data, quality=5)
+    compressors['gzip'] = _gzip
+    return compressors
+
+
+COMPRESSORS = _build_compressors()
+
+
+def negotiate_encoding(accept_encodings: Accept) -> Optional[str]:
+    return accept_encodings.best_match(list(COMPRESSORS))
+
+
+def compress_response(response, accept_encodings: Accept, min_size: int):
+    if (response.direct_passthrough
+            or response.is_streamed
+            or not 200 <= response.status_code < 300
+            or response.status_code == 204
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    # A representação depende do Accept-Encoding mesmo quando não comprimimos.
+    response.vary.add('Accept-Encoding')
+
+    encoding = negotiate_encoding(accept_encodings)
+    if encoding is None:
+        return response
+
+    compressed = COMPRESSORS[encoding](data)
+    if len(compressed) >= len(data):
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def content_etag(data: Any) -> str:
+    serialized = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:32]
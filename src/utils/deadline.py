@@ -0,0 +1,59 @@
+﻿import time
+from typing import Callable, List, Optional
+
+
+class Deadline:
+    """Prazo de uma requisição, no relógio monotônico.
+
+    O pipeline consulta `allows` antes de cada etapa cara; uma etapa negada
+    fica registrada em `skipped` para a resposta indicar o resultado parcial.
+    """
+
+    def __init__(self, expires_at: float, clock: Callable[[], float] = time.monotonic):
+        self.expires_at = expires_at
+        self.clock = clock
+        self.skipped: List[str] = []
+
+    @classmethod
+    def after_ms(cls, budget_ms: float, clock: Callable[[], float] = time.monotonic) -> 'Deadline':
+        return cls(clock() + budget_ms / 1000.0, clock)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cap(self, seconds: float) -> float:
+        """Limita uma espera ou um timeout ao tempo que resta."""
+        return min(seconds, self.remaining())
+
+    def allows(self, stage: str, reserve: float = 0.0) -> bool:
+        """Indica se ainda há tempo (mais `reserve` segundos) para a etapa."""
+        if self.remaining() > reserve:
+            return True
+        self.skip(stage)
+        return False
+
+    def skip(self, stage: str) -> None:
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.skipped)
+
+
+def parse_deadline_ms(value: Optional[object]) -> Optional[float]:
+    """Converte o orçamento informado pelo cliente (ms); None quando ausente."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError('deadline_ms deve ser um número de milissegundos')
+    try:
+        budget = float(value)
+    except (TypeError, ValueError):
+        raise ValueError('deadline_ms deve ser um número de milissegundos')
+    if not budget > 0 or budget == float('inf'):
+        raise ValueError('deadline_ms deve ser maior que zero')
+    return budget
@@ -0,0 +1,47 @@
+﻿import json
+from typing import Any
+
+from flask import make_response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usa-se o json da stdlib
+    orjson = None
+
+FAST_JSON_AVAILABLE = orjson is not None
+
+# As funções usam orjson só com `fast=True`, que o app passa quando
+# `Config.FAST_JSON` está ligado; sem ele, o json da stdlib de sempre.
+
+
+def dumps(obj: Any, fast: bool = False) -> bytes:
+    if fast and orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: Any, fast: bool = False) -> Any:
+    if fast and orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+
+def output_json(data, code, headers=None, fast: bool = False):
+    response = make_response(dumps(data, fast), code)
+    response.headers.extend(headers or {})
+    response.mimetype = 'application/json'
+    return response
@@ -0,0 +1,136 @@
+﻿from bisect import bisect_right
+from typing import Iterable, List, Tuple
+
+# (início, fim, novo tamanho) de um trecho editado, em posições do texto atual.
+Span = Tuple[int, int, int]
+
+
+class OffsetMap:
+    """Mapeamento de posições entre o texto original e o texto atual do pipeline.
+
+    Cada etapa registra com `apply` os trechos que alterou, em posições do texto
+    que recebeu. O mapa guarda os trechos editados como intervalos ordenados e
+    disjuntos (no texto atual e no original); entre eles o deslocamento é
+    constante, então cada conversão é uma busca binária, O(log k) para k
+    trechos. Uma posição dentro de um trecho editado é levada para o início ou
+    o fim do trecho correspondente.
+    """
+
+    __slots__ = ('_current_starts', '_current_ends', '_source_starts', '_source_ends')
+
+    def __init__(self):
+        self._current_starts: List[int] = []
+        self._current_ends: List[int] = []
+        self._source_starts: List[int] = []
+        self._source_ends: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._current_starts)
+
+    @staticmethod
+    def _convert(position, is_end, from_starts, from_ends, to_starts, to_ends) -> int:
+        index = bisect_right(from_ends, position)
+        if index < len(from_starts) and from_starts[index] < position:
+            return to_ends[index] if is_end else to_starts[index]
+        if index == 0:
+            return position
+        return position + to_ends[index - 1] - from_ends[index - 1]
+
+    def to_current(self, position: int, is_end: bool = False) -> int:
+        return self._convert(
+            position, is_end,
+            self._source_starts, self._source_ends, self._current_starts, self._current_ends
+        )
+
+    def to_source(self, position: int, is_end: bool = False) -> int:
+        return self._convert(
+            position, is_end,
+            self._current_starts, self._current_ends, self._source_starts, self._source_ends
+        )
+
+    def to_current_span(self, start: int, end: int) -> Tuple[int, int]:
+        return self.to_current(start), self.to_current(end, is_end=True)
+
+    def to_source_span(self, start: int, end: int) -> Tuple[int, int]:
+        return self.to_source(start), self.to_source(end, is_end=True)
+
+    def apply(self, spans: Iterable[Span]) -> None:
+        """Registra as edições de uma etapa: trechos ordenados e disjuntos do texto atual."""
+        spans = list(spans)
+        if not spans:
+            return
+
+        current_starts, current_ends = self._current_starts, self._current_ends
+        source_starts, source_ends = self._source_starts, self._source_ends
+        new_current_starts: List[int] = []
+        new_current_ends: List[int] = []
+        new_source_starts: List[int] = []
+        new_source_ends: List[int] = []
+
+        def keep(index: int, shift: int) -> None:
+            new_current_starts.append(current_starts[index] + shift)
+            new_current_ends.append(current_ends[index] + shift)
+            new_source_starts.append(source_starts[index])
+            new_source_ends.append(source_ends[index])
+
+        count = len(current_starts)
+        old = span_index = shift = 0
+        while span_index < len(spans):
+            start, end, length = spans[span_index]
+            span_index += 1
+            while old < count and current_ends[old] <= start:
+                keep(old, shift)
+                old += 1
+
+            # Trechos já editados que se sobrepõem (e outras edições desta etapa
+            # que caem dentro deles) viram um único trecho.
+            group_start, group_end = start, end
+            source_start, source_end = self.to_source(start), self.to_source(end, is_end=True)
+            delta = length - (end - start)
+            while True:
+                if old < count and current_starts[old] < group_end and current_ends[old] > group_start:
+                    group_start = min(group_start, current_starts[old])
+                    group_end = max(group_end, current_ends[old])
+                    source_start = min(source_start, source_starts[old])
+                    source_end = max(source_end, source_ends[old])
+                    old += 1
+                elif span_index < len(spans) and spans[span_index][0] < group_end:
+                    next_start, next_end, next_length = spans[span_index]
+                    span_index += 1
+                    delta += next_length - (next_end - next_start)
+                    group_end = max(group_end, next_end)
+                    source_end = max(source_end, self.to_source(next_end, is_end=True))
+                else:
+                    break
+
+            new_current_starts.append(group_start + shift)
+            new_current_ends.append(group_end + shift + delta)
+            new_source_starts.append(source_start)
+            new_source_ends.append(source_end)
+            shift += delta
+
+        while old < count:
+            keep(old, shift)
+            old += 1
+
+        self._current_starts, self._current_ends = new_current_starts, new_current_ends
+        self._source_starts, self._source_ends = new_source_starts, new_source_ends
+
+
+def join_spans(length: int, kept: Iterable[Tuple[int, int]]) -> List[Span]:
+    """Edições equivalentes a `' '.join` dos trechos mantidos de um texto de tamanho `length`."""
+    spans: List[Span] = []
+    previous_end = None
+    for start, end in kept:
+        if previous_end is None:
+            if start > 0:
+                spans.append((0, start, 0))
+        elif start - previous_end != 1:
+            spans.append((previous_end, start, 1))
+        previous_end = end
+    if previous_end is None:
+        if length:
+            spans.append((0, length, 0))
+    elif previous_end < length:
+        spans.append((previous_end, length, 0))
+    return spans
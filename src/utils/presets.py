@@ -1,4 +1,4 @@
-﻿from typing import Dict, Any
+﻿from typing import Dict, Any, Optional
 
 from src.models.optimization import PresetConfig
 
@@ -40,6 +40,16 @@ PRESETS: Dict[str, PresetConfig] = {
         description='Apenas tradução para inglês (mais eficiente para IAs).',
         config={'translate_to_english': True, 'language': 'pt'}
     ),
+    'offline_translation': PresetConfig(
+        description='Tradução local por glossário, sem chamadas de rede (menor latência).',
+        config={
+            'translate_to_english': True,
+            'translation_backend': 'glossary',
+            'remove_accents': True,
+            'stop_word_removal': 0.3,
+            'language': 'pt'
+        }
+    ),
     'gpt_optimized': PresetConfig(
         description='Otimizado especificamente para GPT (máxima economia mantendo entendimento)',
         config={
@@ -79,11 +89,19 @@ PRESETS: Dict[str, PresetConfig] = {
 }
 
 
+_presets_dict: Optional[Dict[str, Dict[str, Any]]] = None
+
+
 def get_presets_dict() -> Dict[str, Dict[str, Any]]:
-    return {
-        name: {
-            'description': preset.description,
-            'config': preset.config
+    # PRESETS é estático: o dicionário de resposta é montado uma única vez.
+    # Quem precisar alterar uma configuração deve copiá-la antes.
+    global _presets_dict
+    if _presets_dict is None:
+        _presets_dict = {
+            name: {
+                'description': preset.description,
+                'config': preset.config
+            }
+            for name, preset in PRESETS.items()
         }
-        for name, preset in PRESETS.items()
-    }
+    return _presets_dict
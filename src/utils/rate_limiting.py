@@ -0,0 +1,54 @@
+﻿import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """Balde de fichas com reabastecimento contínuo.
+
+    `try_acquire` só retira fichas disponíveis; `reserve` aceita ficar devendo
+    e devolve quanto tempo o chamador deve esperar, o que enfileira as
+    reservas na ordem de chegada sem precisar de uma fila explícita.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _delay(self, tokens: float) -> float:
+        missing = tokens - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate if self.rate > 0 else float('inf')
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Retira `tokens` e devolve 0, ou devolve a espera (s) até haver fichas."""
+        with self._lock:
+            self._refill()
+            delay = self._delay(tokens)
+            if delay == 0:
+                self.tokens -= tokens
+            return delay
+
+    def reserve(self, tokens: float, max_wait: float) -> Optional[float]:
+        """Reserva `tokens` e devolve a espera, ou None se ela passar de `max_wait`."""
+        with self._lock:
+            self._refill()
+            delay = self._delay(tokens)
+            if delay > max_wait:
+                return None
+            self.tokens -= tokens
+            return delay
+
+    def refund(self, tokens: float) -> None:
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + tokens)
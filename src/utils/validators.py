@@ -1,22 +1,83 @@
-﻿from typing import Dict, Any, Optional
+﻿from typing import Dict, Any, Mapping, Optional
+
+
+CONFIG_PARAM_TYPES = {
+    'translate_to_english': bool,
+    'language': str,
+    'stop_word_removal': float,
+    'remove_accents': bool,
+    'word_compression': float,
+    'min_word_length': int,
+    'remove_punctuation': bool,
+    'abbreviation_level': float,
+    'preserve_entities': bool,
+    'translation_backend': str,
+}
+
+TRANSLATION_BACKENDS = ('remote', 'glossary')
 
 
 def validate_request_data(data: Dict[str, Any]) -> Optional[str]:
     if not data or 'text' not in data:
         return 'Campo "text" é obrigatório no corpo da requisição.'
     
-    config = data.get('config', {})
+    return validate_config_options(data.get('config', {}))
+
+
+def _is_number(value: Any) -> bool:
+    # bool é subclasse de int, mas `true` não é uma proporção válida.
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _in_unit_range(value: Any) -> bool:
+    return _is_number(value) and 0 <= value <= 1
+
+
+def validate_config_options(config: Dict[str, Any]) -> Optional[str]:
+    if not isinstance(config, dict):
+        return 'A configuração deve ser um objeto.'
     
     wc = config.get('word_compression')
-    if wc is not None and not (0 <= wc <= 1):
-        return 'O valor de "word_compression" deve estar entre 0 e 1.'
+    if wc is not None and not _in_unit_range(wc):
+        return 'O valor de "word_compression" deve ser um número entre 0 e 1.'
         
     swr = config.get('stop_word_removal')
-    if swr is not None and not (0 <= swr <= 1):
-        return 'O valor de "stop_word_removal" deve estar entre 0 e 1.'
+    if swr is not None and not _in_unit_range(swr):
+        return 'O valor de "stop_word_removal" deve ser um número entre 0 e 1.'
         
     mwl = config.get('min_word_length')
-    if mwl is not None and not (isinstance(mwl, int) and mwl >= 1):
+    if mwl is not None and not (isinstance(mwl, int) and not isinstance(mwl, bool) and mwl >= 1):
         return 'O valor de "min_word_length" deve ser um número inteiro maior ou igual a 1.'
+    
+    al = config.get('abbreviation_level')
+    if al is not None and not _in_unit_range(al):
+        return 'O valor de "abbreviation_level" deve ser um número entre 0 e 1.'
+
+    tb = config.get('translation_backend')
+    if tb is not None and tb not in TRANSLATION_BACKENDS:
+        return f'O valor de "translation_backend" deve ser um de: {", ".join(TRANSLATION_BACKENDS)}.'
         
     return None
+
+
+
+def parse_bool(value: str) -> bool:
+    normalized = value.strip().lower()
+    if normalized in ('1', 'true', 'yes', 'on'):
+        return True
+    if normalized in ('0', 'false', 'no', 'off'):
+        return False
+    raise ValueError(f'Valor booleano inválido: "{value}".')
+
+
+def parse_config_params(params: Mapping[str, str]) -> Dict[str, Any]:
+    config = {}
+    for name, value_type in CONFIG_PARAM_TYPES.items():
+        if name not in params:
+            continue
+        value = params[name]
+        try:
+            config[name] = parse_bool(value) if value_type is bool else value_type(value)
+        except ValueError:
+            raise ValueError(f'Valor inválido para "{name}": "{value}".')
+    return config
@@ -1,6 +1,15 @@
-﻿import json
+﻿import gzip
+import json
 import pytest
 
+from src.app import create_api_app
+from src.config.settings import TestingConfig
+from src.services.optimization_service import OptimizationService
+
+
+class TenantConfig(TestingConfig):
+    API_KEYS = {'chave-logistica': 'logistica', 'chave-acme': 'acme'}
+
 
 class TestFlaskAPI:
     
@@ -12,6 +21,17 @@ class TestFlaskAPI:
         assert data['status'] == 'healthy'
         assert 'timestamp' in data
     
+    def test_metrics_endpoint_reports_translation(self, client):
+        assert client.get('/api/v1/system/metrics').get_json()['translation'] is None
+        
+        client.post('/api/v1/optimization/optimize', json={
+            'text': 'O sistema está lento hoje', 'translate_to_english': True, 'translation_backend': 'glossary'
+        })
+        translation = client.get('/api/v1/system/metrics').get_json()['translation']
+        assert translation['cache']['misses'] == 1
+        # O backend remoto não foi usado, então nenhum pool foi criado.
+        assert translation['providers'] == {}
+    
     def test_presets_endpoint(self, client):
         response = client.get('/api/v1/config/presets')
         
@@ -150,3 +170,509 @@ class TestFlaskAPIComplexScenarios:
         
         assert 'stats' in data
         assert data['stats']['original_length'] > 0
+
+
+class TestCustomDictionariesAPI:
+    
+    @pytest.fixture
+    def client(self):
+        return create_api_app(TenantConfig).test_client()
+    
+    def test_tenant_dictionary_lifecycle(self, client):
+        headers = {'X-API-KEY': 'chave-logistica'}
+        
+        response = client.put('/api/v1/dictionaries/frete',
+                              json={'entries': {'conhecimento de transporte': 'CTe'}},
+                              headers=headers)
+        assert response.status_code == 200
+        assert response.get_json()['memory_bytes'] > 0
+        
+        payload = {'text': 'emitir o conhecimento de transporte hoje', 'abbreviation_level': 0.9}
+        tenant_result = client.post('/api/v1/optimization/optimize', json=payload, headers=headers)
+        other_result = client.post('/api/v1/optimization/optimize', json=payload)
+        
+        assert 'cte' in tenant_result.get_json()['optimized_text']
+        assert 'cte' not in other_result.get_json()['optimized_text']
+        
+        listing = client.get('/api/v1/dictionaries', headers=headers).get_json()
+        assert [d['name'] for d in listing['dictionaries']] == ['frete']
+        
+        assert client.delete('/api/v1/dictionaries/frete', headers=headers).status_code == 204
+        assert client.get('/api/v1/dictionaries/frete', headers=headers).status_code == 404
+    
+    def test_tenant_header_must_match_api_key(self, client):
+        entries = {'entries': {'nota fiscal': 'NF'}}
+        
+        spoofed = client.put('/api/v1/dictionaries/fiscal', json=entries, headers={'X-Tenant-ID': 'acme'})
+        other_key = client.put('/api/v1/dictionaries/fiscal', json=entries,
+                               headers={'X-API-KEY': 'chave-logistica', 'X-Tenant-ID': 'acme'})
+        
+        assert spoofed.status_code == 403
+        assert spoofed.get_json()['code'] == 'TENANT_FORBIDDEN'
+        assert other_key.status_code == 403
+        assert client.get('/api/v1/dictionaries', headers={'X-API-KEY': 'chave-acme'}).get_json()['dictionaries'] == []
+    
+    def test_anonymous_dictionary_writes_are_rejected(self, client):
+        anonymous = client.put('/api/v1/dictionaries/foo', json={'entries': {'mundo': 'md'}})
+        unknown_key = client.put('/api/v1/dictionaries/foo', json={'entries': {'mundo': 'md'}},
+                                 headers={'X-API-KEY': 'chave-inventada'})
+        
+        assert anonymous.status_code == 401
+        assert anonymous.get_json()['code'] == 'TENANT_REQUIRED'
+        assert unknown_key.status_code == 401
+        assert client.delete('/api/v1/dictionaries/foo').status_code == 401
+        assert client.post('/api/v1/dictionaries/reload').status_code == 401
+        
+        result = client.post('/api/v1/optimization/optimize',
+                             json={'text': 'olá mundo mundo', 'abbreviation_level': 0.9})
+        assert result.get_json()['optimized_text'] == 'olá mundo mundo'
+    
+    def test_trusted_proxy_tenant_header(self):
+        class ProxyConfig(TestingConfig):
+            TRUST_TENANT_HEADER = True
+        
+        client = create_api_app(ProxyConfig).test_client()
+        client.put('/api/v1/dictionaries/fiscal', json={'entries': {'nota fiscal': 'NF'}},
+                   headers={'X-Tenant-ID': 'acme'})
+        
+        listing = client.get('/api/v1/dictionaries', headers={'X-Tenant-ID': 'acme'}).get_json()
+        assert listing['tenant'] == 'acme'
+        assert [d['name'] for d in listing['dictionaries']] == ['fiscal']
+        assert client.get('/api/v1/dictionaries').get_json()['dictionaries'] == []
+    
+    def test_per_request_custom_abbreviations(self, client):
+        payload = {
+            'text': 'emitir a duplicata mercantil hoje',
+            'abbreviation_level': 0.9,
+            'custom_abbreviations': {'duplicata mercantil': 'DM'}
+        }
+        
+        response = client.post('/api/v1/optimization/optimize', json=payload)
+        
+        assert response.status_code == 200
+        assert response.get_json()['optimized_text'] == 'emitir a dm hoje'
+    
+    def test_invalid_custom_abbreviations(self, client):
+        payload = {'text': 'texto', 'custom_abbreviations': {'termo': 1}}
+        
+        response = client.post('/api/v1/optimization/optimize', json=payload)
+        
+        assert response.status_code == 400
+        assert response.get_json()['code'] == 'VALIDATION_ERROR'
+
+
+class TestCustomPresetsAPI:
+    
+    @pytest.fixture
+    def client(self):
+        app = create_api_app(TenantConfig)
+        return app.test_client()
+    
+    def test_custom_preset_lifecycle(self, client):
+        headers = {'X-API-KEY': 'chave-acme'}
+        payload = {'name': 'sem-acentos', 'config': {'remove_accents': True, 'abbreviation_level': 0}}
+        
+        created = client.post('/api/v1/config/custom-presets', json=payload, headers=headers)
+        assert created.status_code == 201
+        preset_id = created.get_json()['id']
+        
+        response = client.post('/api/v1/optimization/optimize',
+                               json={'text': 'Ação rápida', 'preset_id': preset_id},
+                               headers=headers)
+        assert response.status_code == 200
+        assert response.get_json()['optimized_text'] == 'Acao rapida'
+        
+        other_tenant = client.post('/api/v1/optimization/optimize',
+                                   json={'text': 'Ação rápida', 'preset_id': preset_id})
+        assert other_tenant.status_code == 400
+        assert other_tenant.get_json()['code'] == 'INVALID_PRESET'
+        
+        updated = client.put(f'/api/v1/config/custom-presets/{preset_id}',
+                             json={'description': 'Remove acentos'}, headers=headers)
+        assert updated.get_json()['description'] == 'Remove acentos'
+        
+        assert client.delete(f'/api/v1/config/custom-presets/{preset_id}', headers=headers).status_code == 204
+        assert client.get(f'/api/v1/config/custom-presets/{preset_id}', headers=headers).status_code == 404
+    
+    def test_invalid_custom_preset_config(self, client):
+        payload = {'name': 'ruim', 'config': {'word_compression': 5}}
+        
+        response = client.post('/api/v1/config/custom-presets', json=payload)
+        
+        assert response.status_code == 400
+    
+    def test_non_numeric_config_values_are_rejected(self, client):
+        created = client.post('/api/v1/config/custom-presets', json={'name': 'base', 'config': {}})
+        url = f"/api/v1/config/custom-presets/{created.get_json()['id']}"
+        
+        for config in ({'word_compression': 'x'}, {'abbreviation_level': True}, {'min_word_length': False}):
+            response = client.put(url, json={'config': config})
+            assert response.status_code == 400, config
+            assert response.get_json()['code'] == 'VALUE_ERROR'
+        messages = client.post('/api/v1/optimization/messages', json={
+            'messages': [{'role': 'user', 'content': 'Texto'}],
+            'role_configs': {'user': {'word_compression': 'x'}}
+        })
+        assert messages.status_code == 400
+        
+        optimize = client.post('/api/v1/optimization/optimize', json={'text': 'x', 'abbreviation_level': 'x'})
+        assert optimize.status_code == 400
+        assert optimize.get_json()['code'] == 'VALIDATION_ERROR'
+
+
+class TestMessagesAPI:
+    
+    MESSAGES = [
+        {'role': 'system', 'content': 'Você é um assistente prestativo.'},
+        {'role': 'user', 'content': 'Qual é o prazo de entrega?'},
+        {'role': 'assistant', 'content': 'O prazo é de cinco dias úteis.'},
+        {'role': 'user', 'content': 'Qual é o prazo de entrega?'},
+        {'role': 'user', 'content': 'E a ação?'}
+    ]
+    
+    @pytest.fixture
+    def client(self):
+        return create_api_app(TestingConfig).test_client()
+    
+    def test_role_configs_and_deduplication(self, client):
+        payload = {
+            'messages': self.MESSAGES,
+            'remove_accents': True,
+            'abbreviation_level': 0,
+            'role_configs': {'system': None, 'history': {'abbreviation_level': 0, 'word_compression': 0.5}}
+        }
+        
+        response = client.post('/api/v1/optimization/messages', json=payload)
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        messages = data['messages']
+        assert [m['role'] for m in messages] == ['system', 'user', 'assistant', 'user', 'user']
+        assert messages[0]['content'] == 'Você é um assistente prestativo.'
+        assert [m['source'] for m in messages] == ['unchanged', 'optimized', 'optimized', 'duplicate', 'optimized']
+        # O histórico é comprimido; a última mensagem usa a configuração padrão.
+        assert len(messages[1]['content']) < len('Qual e o prazo de entrega?')
+        assert messages[4]['content'] == 'E a acao?'
+        assert 'original_content' not in messages[0]
+        assert data['stats']['messages'] == 5
+        assert data['stats']['original_length'] == sum(len(m['content']) for m in self.MESSAGES)
+        assert data['stats']['characters_saved'] == sum(m['stats']['characters_saved'] for m in messages)
+        
+        # No turno seguinte o histórico repetido vem do cache.
+        data = client.post('/api/v1/optimization/messages', json=payload).get_json()
+        assert data['stats']['sources'] == {'optimized': 0, 'cache': 3, 'duplicate': 1, 'unchanged': 1}
+        assert client.get('/api/v1/system/metrics').get_json()['message_cache']['hits'] == 3
+    
+    def test_invalid_messages(self, client):
+        url = '/api/v1/optimization/messages'
+        
+        assert client.post(url, json={'messages': []}).status_code == 400
+        assert client.post(url, json={'messages': [{'role': 'user'}]}).status_code == 400
+        invalid_role = client.post(url, json={
+            'messages': self.MESSAGES, 'role_configs': {'user': {'word_compression': 5}}
+        })
+        assert invalid_role.status_code == 400
+        assert invalid_role.get_json()['code'] == 'VALIDATION_ERROR'
+        unknown_preset = client.post(url, json={'messages': self.MESSAGES, 'preset': 'inexistente'})
+        assert unknown_preset.get_json()['code'] == 'INVALID_PRESET'
+
+
+class TestTemplatesAPI:
+    
+    @pytest.fixture
+    def client(self):
+        return create_api_app(TenantConfig).test_client()
+    
+    def test_template_lifecycle(self, client):
+        headers = {'X-API-KEY': 'chave-acme'}
+        payload = {
+            'name': 'suporte',
+            'template': 'Você é o atendente da {empresa}. Pergunta: {pergunta}',
+            'config': {'remove_accents': True, 'abbreviation_level': 0}
+        }
+        
+        created = client.post('/api/v1/optimization/templates', json=payload, headers=headers)
+        assert created.status_code == 201
+        template = created.get_json()
+        assert template['slots'] == ['empresa', 'pergunta']
+        
+        url = f"/api/v1/optimization/templates/{template['id']}/render"
+        response = client.post(url, json={'values': {'empresa': 'Ação', 'pergunta': 'Preço?'}}, headers=headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['optimized_text'] == 'Voce e o atendente da Acao. Pergunta: Preco?'
+        assert 'original_text' not in data
+        assert data['stats']['original_length'] == len('Você é o atendente da Ação. Pergunta: Preço?')
+        
+        missing = client.post(url, json={'values': {'empresa': 'ACME'}}, headers=headers)
+        assert missing.status_code == 400 and missing.get_json()['code'] == 'VALIDATION_ERROR'
+        assert client.post(url, json={'values': {}}).status_code == 404
+        
+        assert client.delete(f"/api/v1/optimization/templates/{template['id']}", headers=headers).status_code == 204
+        assert client.post(url, json={'values': {}}, headers=headers).status_code == 404
+    
+    def test_invalid_template(self, client):
+        response = client.post('/api/v1/optimization/templates', json={'name': 'ruim', 'template': 'Olá {nome'})
+        
+        assert response.status_code == 400
+
+
+class TestOptimizationPayloadOptions:
+    
+    def test_return_original_false_omits_echo(self, client):
+        response = client.post('/api/v1/optimization/optimize',
+                               json={'text': 'Texto de exemplo', 'return_original': False})
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert 'original_text' not in data
+        assert 'return_original' not in data['config_used']
+    
+    def test_raw_text_body_with_query_config(self, client):
+        response = client.post('/api/v1/optimization/optimize/raw?remove_accents=true&abbreviation_level=0',
+                               data='Ação rápida', content_type='text/plain')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['optimized_text'] == 'Acao rapida'
+        assert 'original_text' not in data
+        assert response.headers['X-Characters-Saved'] == '0'
+    
+    def test_raw_text_response_with_header_config(self, client):
+        response = client.post('/api/v1/optimization/optimize/raw',
+                               data='Ação rápida',
+                               content_type='text/plain',
+                               headers={
+                                   'Accept': 'text/plain',
+                                   'X-Optimization-Config': json.dumps({'remove_accents': True})
+                               })
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        assert response.get_data(as_text=True) == 'Acao rapida'
+        assert response.headers['X-Original-Length'] == '11'
+    
+    def test_raw_text_non_numeric_header_config(self, client):
+        response = client.post('/api/v1/optimization/optimize/raw', data='Texto', content_type='text/plain',
+                               headers={'X-Optimization-Config': json.dumps({'abbreviation_level': 'x'})})
+        
+        assert response.status_code == 400
+        assert response.get_json()['code'] == 'VALIDATION_ERROR'
+    
+    def test_raw_text_invalid_query_value(self, client):
+        response = client.post('/api/v1/optimization/optimize/raw?word_compression=muito',
+                               data='Texto', content_type='text/plain')
+        
+        assert response.status_code == 400
+        assert response.get_json()['code'] == 'VALIDATION_ERROR'
+    
+    def test_explain_returns_stages_and_original_offsets(self, client):
+        text = 'Viajei de São Paulo para o Ceará com JavaScript, custou R$ 50,00'
+        response = client.post('/api/v1/optimization/optimize', json={
+            'text': text, 'explain': True, 'abbreviation_level': 0.9, 'remove_accents': True
+        })
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        explanation = data['explanation']
+        stages = {stage['stage']: stage['characters_saved'] for stage in explanation['stages']}
+        assert stages['abbreviations'] > 0
+        assert sum(stages.values()) == data['stats']['characters_saved']
+        for edit in explanation['edits']:
+            assert text[edit['start']:edit['end']] == edit['original']
+        assert {'SP', 'CE'} <= {edit['replacement'] for edit in explanation['edits']}
+        assert any(entity['entity_type'] == 'money' for entity in explanation['entities'])
+        assert 'explain' not in data['config_used']
+    
+    def test_explain_is_opt_in(self, client):
+        response = client.post('/api/v1/optimization/optimize', json={'text': 'Texto de exemplo'})
+        assert 'explanation' not in response.get_json()
+        
+        raw = client.post('/api/v1/optimization/optimize/raw?explain=true',
+                          data='Texto em São Paulo', content_type='text/plain')
+        assert raw.get_json()['explanation']['edits'][0]['replacement'] == 'SP'
+    
+    def test_fast_json_responses_match_stdlib(self):
+        class FastJSONConfig(TestingConfig):
+            FAST_JSON = True
+        
+        payload = {'text': 'Ação rápida em São Paulo', 'remove_accents': True}
+        fast = create_api_app(FastJSONConfig).test_client().post('/api/v1/optimization/optimize', json=payload)
+        default = create_api_app(TestingConfig).test_client().post('/api/v1/optimization/optimize', json=payload)
+        
+        assert fast.status_code == default.status_code == 200
+        assert fast.get_json() == default.get_json()
+    
+    def test_fast_json_stays_off_by_default(self, monkeypatch):
+        from src.utils import json_codec
+        
+        class Unavailable:
+            def __getattr__(self, name):
+                raise AssertionError('orjson usado sem FAST_JSON')
+        
+        monkeypatch.setattr(json_codec, 'orjson', Unavailable())
+        client = create_api_app(TestingConfig).test_client()
+        
+        raw = client.post('/api/v1/optimization/optimize/raw', data='Ação rápida', content_type='text/plain',
+                          headers={'X-Optimization-Config': json.dumps({'remove_accents': True})})
+        messages = client.post('/api/v1/optimization/messages',
+                               json={'messages': [{'role': 'user', 'content': 'Ação rápida'}]})
+        
+        assert raw.status_code == 200 and raw.get_json()['optimized_text'] == 'Acao rapida'
+        assert messages.status_code == 200
+
+
+class TestDeadlines:
+    
+    def test_expired_deadline_returns_partial_result(self, client):
+        response = client.post('/api/v1/optimization/optimize',
+                               json={'text': 'Ação rápida', 'remove_accents': True, 'deadline_ms': 0.001})
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['optimized_text'] == 'Acao rapida'
+        assert data['partial'] is True
+        assert 'abbreviations' in data['skipped_stages']
+        assert 'deadline_ms' not in data['config_used']
+    
+    def test_without_deadline_response_is_unchanged(self, client):
+        data = client.post('/api/v1/optimization/optimize', json={'text': 'Texto'}).get_json()
+        
+        assert 'partial' not in data and 'skipped_stages' not in data
+    
+    def test_raw_deadline_header(self, client):
+        response = client.post('/api/v1/optimization/optimize/raw',
+                               data='Ação rápida', content_type='text/plain',
+                               headers={'Accept': 'text/plain', 'X-Request-Deadline-Ms': '60000'})
+        
+        assert response.status_code == 200
+        assert response.headers['X-Partial-Result'] == 'false'
+        assert response.headers['X-Skipped-Stages'] == ''
+    
+    def test_invalid_deadline(self, client):
+        response = client.post('/api/v1/optimization/optimize/raw?deadline_ms=abc',
+                               data='Texto', content_type='text/plain')
+        
+        assert response.status_code == 400
+        assert response.get_json()['code'] == 'VALIDATION_ERROR'
+
+
+class TestResponseCaching:
+    
+    def test_presets_conditional_get(self, client):
+        first = client.get('/api/v1/config/presets')
+        
+        assert first.status_code == 200
+        assert first.headers['ETag'].startswith('W/')
+        assert 'max-age' in first.headers['Cache-Control']
+        
+        second = client.get('/api/v1/config/presets', headers={'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 304
+        assert second.data == b''
+    
+    def test_preset_detail_etag_differs_per_preset(self, client):
+        moderate = client.get('/api/v1/config/presets/moderate')
+        aggressive = client.get('/api/v1/config/presets/aggressive')
+        
+        assert moderate.headers['ETag'] != aggressive.headers['ETag']
+        stale = client.get('/api/v1/config/presets/moderate',
+                           headers={'If-None-Match': aggressive.headers['ETag']})
+        assert stale.status_code == 200
+    
+    def test_large_response_is_compressed(self, client):
+        text = 'Este é um texto repetido para testar a compressão. ' * 100
+        response = client.post('/api/v1/optimization/optimize', json={'text': text},
+                               headers={'Accept-Encoding': 'gzip'})
+        
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(gzip.decompress(response.data))['original_text'] == text
+    
+    def test_small_or_unaccepted_responses_are_not_compressed(self, client):
+        small = client.post('/api/v1/optimization/optimize', json={'text': 'Texto curto'},
+                            headers={'Accept-Encoding': 'gzip'})
+        identity = client.post('/api/v1/optimization/optimize', json={'text': 'Texto longo ' * 200},
+                               headers={'Accept-Encoding': 'identity'})
+        
+        assert 'Content-Encoding' not in small.headers
+        assert 'Content-Encoding' not in identity.headers
+        assert identity.get_json()['original_text'] == 'Texto longo ' * 200
+
+
+class TestAdmissionControl:
+    
+    def test_rate_limit_per_api_key(self):
+        class LimitedConfig(TestingConfig):
+            API_KEYS = {'a': 'cliente-a', 'b': 'cliente-b'}
+            CLIENT_RATE_LIMIT = 0.5
+            CLIENT_RATE_BURST = 1
+        
+        client = create_api_app(LimitedConfig).test_client()
+        url = '/api/v1/optimization/optimize'
+        
+        assert client.post(url, json={'text': 'Texto'}, headers={'X-API-KEY': 'a'}).status_code == 200
+        limited = client.post(url, json={'text': 'Texto'}, headers={'X-API-KEY': 'a'})
+        assert limited.status_code == 429
+        assert limited.get_json()['code'] == 'RATE_LIMITED'
+        assert limited.headers['Retry-After'] == '2'
+        
+        assert client.post(url, json={'text': 'Texto'}, headers={'X-API-KEY': 'b'}).status_code == 200
+        assert client.get('/api/v1/system/health').status_code == 200
+        assert client.get('/api/v1/system/metrics').get_json()['admission']['rate_limit']['limited'] == 1
+    
+    def test_unknown_api_keys_share_the_ip_bucket(self):
+        class LimitedConfig(TestingConfig):
+            API_KEYS = {'a': 'cliente-a'}
+            CLIENT_RATE_LIMIT = 1
+            CLIENT_RATE_BURST = 1
+        
+        client = create_api_app(LimitedConfig).test_client()
+        url = '/api/v1/optimization/optimize'
+        
+        statuses = [
+            client.post(url, json={'text': 'Texto'}, headers={'X-API-KEY': f'rotativa-{i}'}).status_code
+            for i in range(5)
+        ]
+        assert statuses == [200, 429, 429, 429, 429]
+        assert client.post(url, json={'text': 'Texto'}, headers={'X-API-KEY': 'a'}).status_code == 200
+    
+    def test_rate_limit_shared_through_sqlite(self, tmp_path):
+        class SharedConfig(TestingConfig):
+            API_KEYS = {'a': 'cliente-a'}
+            CLIENT_RATE_LIMIT = 0.1
+            CLIENT_RATE_BURST = 1
+            RATE_LIMIT_DB_PATH = str(tmp_path / 'limits.sqlite3')
+        
+        # Dois apps (workers) com o mesmo arquivo dividem o balde do cliente.
+        first = create_api_app(SharedConfig).test_client()
+        second = create_api_app(SharedConfig).test_client()
+        url = '/api/v1/optimization/optimize'
+        
+        assert first.post(url, json={'text': 'Texto'}, headers={'X-API-KEY': 'a'}).status_code == 200
+        assert second.post(url, json={'text': 'Texto'}, headers={'X-API-KEY': 'a'}).status_code == 429
+    
+    def test_in_flight_budget_rejects_with_503(self, monkeypatch):
+        class BudgetConfig(TestingConfig):
+            ADMISSION_MAX_WEIGHT = 2
+            ADMISSION_WEIGHT_BYTES = 64
+        
+        client = create_api_app(BudgetConfig).test_client()
+        url = '/api/v1/optimization/optimize'
+        nested = []
+        original_optimize = OptimizationService.optimize
+        
+        def optimize_with_nested_request(self, text, *args, **kwargs):
+            # Enquanto esta requisição ocupa o orçamento inteiro, outra chega.
+            if not nested:
+                nested.append(client.post(url, json={'text': 'curto'}))
+            return original_optimize(self, text, *args, **kwargs)
+        
+        monkeypatch.setattr(OptimizationService, 'optimize', optimize_with_nested_request)
+        response = client.post(url, json={'text': 'x' * 200})
+        
+        assert response.status_code == 200
+        assert nested[0].status_code == 503
+        assert nested[0].headers['Retry-After'] == '1'
+        budget = client.get('/api/v1/system/metrics').get_json()['admission']['budget']
+        assert budget['in_flight'] == 0 and budget['rejected'] == 1 and budget['peak_in_flight'] == 2
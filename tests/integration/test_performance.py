@@ -0,0 +1,47 @@
+﻿import json
+import subprocess
+import sys
+
+import pytest
+
+
+def _run_probe(code):
+    output = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output)
+
+
+class TestStartupPerformance:
+
+    def test_import_does_not_load_dictionaries_or_http_client(self):
+        loaded = _run_probe(
+            "import json, sys\n"
+            "import src.services.optimization_service\n"
+            "print(json.dumps(sorted(sys.modules)))"
+        )
+
+        assert not [m for m in loaded if m.startswith('src.data.')]
+        assert 'requests' not in loaded
+
+    def test_dictionaries_loaded_only_for_used_stages(self):
+        loaded = _run_probe(
+            "import json, sys\n"
+            "from src.config.settings import Config\n"
+            "from src.services.optimization_service import OptimizationService\n"
+            "service = OptimizationService(Config())\n"
+            "service.optimize('Texto sem abreviações', {\n"
+            "    'abbreviation_level': 0, 'preserve_entities': False, 'remove_accents': True\n"
+            "})\n"
+            "print(json.dumps(sorted(sys.modules)))"
+        )
+
+        assert not [m for m in loaded if m.startswith('src.data.')]
+        assert 'requests' not in loaded
+
+    def test_preload_warms_resources_for_preset(self, optimization_service):
+        optimization_service.preload({'abbreviation_level': 0.5, 'preserve_entities': True})
+
+        assert optimization_service.abbreviation_service.is_loaded
+        assert optimization_service.entity_service.is_loaded
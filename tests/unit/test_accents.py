@@ -0,0 +1,45 @@
+﻿import unicodedata
+
+from hypothesis import given, settings, strategies as st
+
+from src.data.locations import find_location_match, normalize_text
+from src.utils.accents import ACCENT_TABLE, TABLE_RANGES, fold_accents, strip_accents_nfd
+
+# Letras das faixas latinas da tabela misturadas com o que cai no fallback
+# (grego, cirílico, hangul, símbolos fora do BMP).
+characters = st.one_of(
+    st.sampled_from('abcXYZ 019.;!'),
+    *(st.integers(start, end).map(chr) for start, end in TABLE_RANGES),
+    st.sampled_from(';άйÅ가ཱི\U0001d165\ue000\uf8ff')
+)
+
+
+class TestFoldAccents:
+
+    @settings(max_examples=500, deadline=None)
+    @given(st.lists(characters, max_size=40).map(''.join))
+    def test_matches_nfd_filter(self, text):
+        assert fold_accents(text) == strip_accents_nfd(text)
+
+    def test_table_covers_latin_ranges(self):
+        assert ACCENT_TABLE[ord('ç')] == 'c'
+        assert ACCENT_TABLE[ord('ệ')] == 'e'
+        assert ACCENT_TABLE[0x0301] is None
+        assert ord('ß') not in ACCENT_TABLE
+
+    def test_common_cases(self):
+        assert fold_accents('Ação em São Paulo') == 'Acao em Sao Paulo'
+        assert fold_accents('Việt Nam, Ελλάδα') == 'Viet Nam, Ελλαδα'
+        assert fold_accents(unicodedata.normalize('NFD', 'ação')) == 'acao'
+        assert fold_accents('Ação — “ótimo” por 5 € 👍') == 'Acao — “otimo” por 5 € 👍'
+
+
+class TestLocationNormalization:
+
+    def test_normalize_text(self):
+        assert normalize_text('CEARÁ') == 'ceara'
+
+    def test_find_location_match_ignores_accents_and_case(self):
+        assert find_location_match('São Paulo') == 'SP'
+        assert find_location_match('sao paulo') == 'SP'
+        assert find_location_match('Atlantida') is None
@@ -0,0 +1,44 @@
+﻿import pytest
+
+from src.services import batch_service
+from src.services.batch_service import BatchService
+
+CONFIG = {'remove_accents': True, 'abbreviation_level': 0}
+TEXTS = [f"Ação número {i} em ótimo estado." for i in range(40)] + ['', 'Só um']
+
+
+class TestBatchService:
+
+    def test_parallel_results_match_sequential(self):
+        with BatchService(CONFIG, workers=1) as sequential, BatchService(CONFIG, workers=2) as parallel:
+            expected = sequential.optimize_texts(TEXTS)
+            assert parallel.optimize_texts(TEXTS, batch_size=7) == expected
+
+        assert expected[0] == 'Acao numero 0 em otimo estado'
+        assert expected[-2:] == ['', 'So um']
+
+    def test_buffers_are_reused_between_calls(self):
+        with BatchService(CONFIG, workers=2) as service:
+            first = service.optimize_texts(TEXTS[:10])
+            second = service.optimize_texts(TEXTS)
+
+        assert second[:10] == first
+
+    def test_overflowing_results_fall_back_to_pipe(self, monkeypatch):
+        monkeypatch.setattr(batch_service, 'output_capacity', lambda length: 0)
+
+        with BatchService(CONFIG, workers=2) as service:
+            assert service.optimize_texts(TEXTS[:5]) == [
+                f"Acao numero {i} em otimo estado" for i in range(5)
+            ]
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_map_file_reads_spans(self, tmp_path, workers):
+        path = tmp_path / 'entrada.txt'
+        path.write_bytes('Ação um\nAção dois\nAção três'.encode('utf-8'))
+        spans = [[(0, 9), (10, 21)], [(22, 34)]]
+
+        with BatchService(CONFIG, workers=workers) as service:
+            results = [[bytes(output) for output in outputs] for outputs in service.map_file(str(path), spans)]
+
+        assert results == [[b'Acao um', b'Acao dois'], [b'Acao tres']]
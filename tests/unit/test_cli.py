@@ -0,0 +1,132 @@
+﻿import json
+import os
+
+import pytest
+
+from src.cli import align_offset, iter_records, main
+
+CONFIG = json.dumps({'remove_accents': True, 'abbreviation_level': 0})
+
+
+class TestOptimizeCLI:
+
+    @pytest.fixture
+    def lines_file(self, tmp_path):
+        path = tmp_path / 'entrada.txt'
+        path.write_text(''.join(f"Linha {i}: ação número {i}.\n" for i in range(50)), encoding='utf-8')
+        return path
+
+    def test_iter_records_and_align_offset(self):
+        data = b'um\ndois\ntres'
+
+        assert list(iter_records(data, 0, b'\n')) == [(0, 2, 3), (3, 7, 8), (8, 12, 12)]
+        assert align_offset(data, 4, b'\n') == 8
+        assert align_offset(data, 3, b'\n') == 3
+
+    def test_optimize_lines_in_order(self, lines_file, tmp_path):
+        output = tmp_path / 'saida.txt'
+
+        assert main(['optimize', str(lines_file), '-o', str(output), '--config', CONFIG,
+                     '--workers', '1', '--batch-size', '7', '-q']) == 0
+
+        lines = output.read_text(encoding='utf-8').splitlines()
+        assert len(lines) == 50
+        assert lines[0] == 'Linha 0: acao numero 0'
+        assert lines[49] == 'Linha 49: acao numero 49'
+        assert not os.path.exists(f'{output}.checkpoint')
+
+    def test_parallel_output_matches_sequential(self, lines_file, tmp_path):
+        sequential = tmp_path / 'sequencial.txt'
+        parallel = tmp_path / 'paralelo.txt'
+
+        main(['optimize', str(lines_file), '-o', str(sequential), '--config', CONFIG, '--workers', '1', '-q'])
+        main(['optimize', str(lines_file), '-o', str(parallel), '--config', CONFIG,
+              '--workers', '2', '--batch-size', '5', '-q'])
+
+        assert parallel.read_bytes() == sequential.read_bytes()
+
+    def test_jsonl_field(self, tmp_path):
+        source = tmp_path / 'entrada.jsonl'
+        source.write_text(
+            json.dumps({'id': 1, 'text': 'Ação rápida'}, ensure_ascii=False) + '\nnão é json\n',
+            encoding='utf-8'
+        )
+        output = tmp_path / 'saida.jsonl'
+
+        main(['optimize', str(source), '-o', str(output), '--format', 'jsonl',
+              '--config', CONFIG, '--workers', '1', '-q'])
+
+        first, second = output.read_text(encoding='utf-8').splitlines()
+        assert json.loads(first) == {'id': 1, 'text': 'Acao rapida'}
+        assert second == 'não é json'
+
+    def test_delimiter_format(self, tmp_path):
+        source = tmp_path / 'entrada.txt'
+        source.write_text('Ação um\n---\nAção dois', encoding='utf-8')
+        output = tmp_path / 'saida.txt'
+
+        main(['optimize', str(source), '-o', str(output), '--format', 'delimiter',
+              '--delimiter', '\\n---\\n', '--config', CONFIG, '--workers', '1', '-q'])
+
+        assert output.read_text(encoding='utf-8') == 'Acao um\n---\nAcao dois'
+
+    @pytest.fixture
+    def interrupted(self, lines_file, tmp_path):
+        output = tmp_path / 'interrompido.txt'
+        output.write_bytes(b'Linha 0\nLinha 1\n')
+        with open(f'{output}.checkpoint', 'w', encoding='utf-8') as checkpoint:
+            json.dump({
+                'input': str(lines_file),
+                'input_size': lines_file.stat().st_size,
+                'input_offset': 40,
+                'output_offset': 16,
+                'records': 2
+            }, checkpoint)
+        return output
+
+    def test_resume_without_output_is_rejected(self, lines_file, interrupted, capsys):
+        interrupted.unlink()
+
+        with pytest.raises(SystemExit):
+            main(['optimize', str(lines_file), '-o', str(interrupted), '--config', CONFIG,
+                  '--workers', '1', '--resume', '-q'])
+        assert 'removida ou truncada' in capsys.readouterr().err
+        assert not interrupted.exists()
+
+    def test_resume_with_truncated_output_is_rejected(self, lines_file, interrupted, capsys):
+        interrupted.write_bytes(b'Linha 0\n')
+
+        with pytest.raises(SystemExit):
+            main(['optimize', str(lines_file), '-o', str(interrupted), '--config', CONFIG,
+                  '--workers', '1', '--resume', '-q'])
+        assert 'removida ou truncada' in capsys.readouterr().err
+        assert interrupted.read_bytes() == b'Linha 0\n'
+
+    def test_resume_from_checkpoint(self, lines_file, tmp_path):
+        complete = tmp_path / 'completo.txt'
+        main(['optimize', str(lines_file), '-o', str(complete), '--config', CONFIG, '--workers', '1', '-q'])
+        expected = complete.read_bytes()
+
+        # Simula uma execução interrompida depois de 20 registros, com um
+        # registro parcial gravado após o último checkpoint.
+        input_offset = len(''.join(f"Linha {i}: ação número {i}.\n" for i in range(20)).encode('utf-8'))
+        done = b''.join(expected.splitlines(keepends=True)[:20])
+        resumed = tmp_path / 'retomado.txt'
+        resumed.write_bytes(done + b'Linha 20: parc')
+        with open(f'{resumed}.checkpoint', 'w', encoding='utf-8') as checkpoint:
+            json.dump({
+                'input': str(lines_file),
+                'input_size': lines_file.stat().st_size,
+                'input_offset': input_offset,
+                'output_offset': len(done),
+                'records': 20
+            }, checkpoint)
+
+        main(['optimize', str(lines_file), '-o', str(resumed), '--config', CONFIG,
+              '--workers', '1', '--resume', '-q'])
+
+        assert resumed.read_bytes() == expected
+
+    def test_invalid_preset(self, lines_file):
+        with pytest.raises(SystemExit):
+            main(['optimize', str(lines_file), '--preset', 'inexistente', '-q'])
@@ -0,0 +1,117 @@
+﻿import json
+import time
+
+import pytest
+
+from src.services.optimization import AbbreviationService, CustomDictionaryService
+from src.services.optimization.abbreviation_service import AbbreviationMatcher
+
+
+class TestCustomDictionaryService:
+
+    @pytest.fixture
+    def directory(self, tmp_path):
+        tenant_dir = tmp_path / 'logistica'
+        tenant_dir.mkdir()
+        (tenant_dir / 'frete.json').write_text(
+            json.dumps({'conhecimento de transporte': 'CTe'}), encoding='utf-8'
+        )
+        (tenant_dir / 'fiscal.csv').write_text(
+            'original,abbreviation\nnota fiscal,NF\n', encoding='utf-8'
+        )
+        return tmp_path
+
+    @pytest.fixture
+    def service(self, directory):
+        service = CustomDictionaryService(str(directory))
+        service.reload()
+        return service
+
+    def test_loads_json_and_csv_per_tenant(self, service):
+        names = sorted(d.name for d in service.list_dictionaries('logistica'))
+
+        assert names == ['fiscal', 'frete']
+        assert service.get_matcher('outro') is None
+        assert len(service.get_matcher('logistica')) == 2
+
+    def test_custom_entries_applied_before_global_dictionary(self, service):
+        abbreviations = AbbreviationService()
+        text = "emitir a nota fiscal e o conhecimento de transporte"
+
+        result, replacements = abbreviations.apply_abbreviations(
+            text, aggressiveness=0.9, extra_matchers=[service.get_matcher('logistica')]
+        )
+
+        assert result == "emitir a nf e o cte"
+        assert {r.category for r in replacements} == {'custom'}
+
+    def test_reload_swaps_snapshot_atomically(self, service, directory):
+        previous = service.get_matcher('logistica')
+
+        path = directory / 'logistica' / 'frete.json'
+        path.write_text(json.dumps({'ordem de coleta': 'OC', 'conhecimento de transporte': 'CTe'}), encoding='utf-8')
+        assert service.reload() == 1
+
+        assert len(previous) == 2
+        assert len(service.get_matcher('logistica')) == 3
+
+    def test_invalid_file_keeps_previous_version(self, service, directory):
+        (directory / 'logistica' / 'frete.json').write_text('{quebrado', encoding='utf-8')
+
+        service.reload()
+
+        frete = [d for d in service.list_dictionaries('logistica') if d.name == 'frete'][0]
+        assert frete.entries == {'conhecimento de transporte': 'CTe'}
+
+    def test_deleted_file_is_unloaded(self, service, directory):
+        (directory / 'logistica' / 'fiscal.csv').unlink()
+
+        service.reload()
+
+        assert [d.name for d in service.list_dictionaries('logistica')] == ['frete']
+
+    def test_register_persists_file_and_accounts_memory(self, service, directory):
+        dictionary = service.register('fintech', 'pagamentos', {'transferência eletrônica disponível': 'TED'})
+
+        assert (directory / 'fintech' / 'pagamentos.json').exists()
+        assert dictionary.memory_bytes > 0
+        assert service.stats()['dictionaries'] == 3
+
+    def test_reload_limited_to_tenant(self, service, directory):
+        (directory / 'logistica' / 'fiscal.csv').unlink()
+        (directory / 'fintech').mkdir()
+        (directory / 'fintech' / 'pix.json').write_text(json.dumps({'chave aleatória': 'EVP'}), encoding='utf-8')
+
+        assert service.reload('fintech') == 1
+
+        assert service.get_matcher('fintech') is not None
+        assert len(service.get_matcher('logistica')) == 2
+
+    def test_matcher_keys_ending_in_punctuation(self):
+        abbreviations = AbbreviationService()
+        matcher = AbbreviationMatcher([('S.A.', 'SA'), ('Ltda.', 'L')])
+
+        result, _ = abbreviations.apply_abbreviations(
+            'ACME S.A. e Beta Ltda. fecharam', aggressiveness=0.9,
+            preserve_context=False, extra_matchers=[matcher]
+        )
+
+        assert result == 'ACME SA e Beta L fecharam'
+
+    def test_register_rejects_invalid_names(self, service):
+        with pytest.raises(ValueError):
+            service.register('../fora', 'x', {'a': 'b'})
+
+    def test_watcher_picks_up_new_files(self, service, directory):
+        service.start_watching(0.05)
+        try:
+            (directory / 'logistica' / 'armazem.json').write_text(
+                json.dumps({'centro de distribuição': 'CD'}), encoding='utf-8'
+            )
+            deadline = time.time() + 2
+            while time.time() < deadline and len(service.get_matcher('logistica')) < 3:
+                time.sleep(0.02)
+        finally:
+            service.stop_watching()
+
+        assert len(service.get_matcher('logistica')) == 3
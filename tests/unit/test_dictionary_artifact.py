@@ -0,0 +1,82 @@
+﻿import os
+import subprocess
+import sys
+
+import pytest
+
+from src.data.artifact import (
+    build_artifact,
+    compile_dictionaries,
+    load_dictionaries,
+    read_artifact,
+    source_checksum,
+    source_fingerprint,
+)
+from src.data.locations import is_known_location
+from src.data.animals import is_nature_element
+from src.data.technology import is_tech_term
+
+
+class TestDictionaryArtifact:
+
+    @pytest.fixture
+    def artifact_path(self, tmp_path):
+        path = str(tmp_path / 'dictionaries.bin')
+        build_artifact(path)
+        return path
+
+    def test_round_trip_matches_sources(self, artifact_path):
+        data = read_artifact(artifact_path, expected_checksum=source_checksum())
+
+        assert data == compile_dictionaries()
+
+    def test_stale_checksum_is_rejected(self, artifact_path):
+        assert read_artifact(artifact_path, expected_checksum='0' * 64) is None
+        assert read_artifact(artifact_path, expected_fingerprint='0' * 64) is None
+
+    def test_unchanged_sources_skip_the_content_hash(self, artifact_path, monkeypatch):
+        import src.data.artifact as artifact_module
+
+        assert read_artifact(artifact_path, expected_fingerprint=source_fingerprint()) is not None
+        monkeypatch.setattr(artifact_module, 'source_checksum', lambda: pytest.fail('fontes relidas'))
+        assert load_dictionaries(artifact_path).abbreviations
+
+    def test_checksum_covers_accent_folding_and_compiler(self):
+        from src.data.artifact import _SOURCE_FILES
+
+        assert any(path.endswith(os.path.join('utils', 'accents.py')) for path in _SOURCE_FILES)
+        assert any(path.endswith(os.path.join('data', 'artifact.py')) for path in _SOURCE_FILES)
+
+    def test_loading_does_not_execute_data_modules(self, artifact_path):
+        code = (
+            'import sys; from src.data.artifact import load_dictionaries; '
+            f'artifact = load_dictionaries({artifact_path!r}); artifact.is_known_location("Ceará"); '
+            'print("src.data.locations" in sys.modules)'
+        )
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+
+        assert output.stdout.strip() == 'False'
+
+    def test_corrupted_file_falls_back_to_sources(self, tmp_path):
+        path = tmp_path / 'corrupted.bin'
+        path.write_bytes(b'not an artifact')
+
+        artifact = load_dictionaries(str(path))
+
+        assert artifact.checksum == source_checksum()
+        assert artifact.abbreviations
+
+    def test_lookups_match_source_helpers(self, artifact_path):
+        artifact = load_dictionaries(artifact_path)
+
+        for word in ['Ceará', 'ceara', 'São Paulo', 'gatos', 'Python', 'PG', 'mesa']:
+            assert artifact.is_known_location(word) == is_known_location(word)
+            assert artifact.is_nature_element(word) == is_nature_element(word)
+            assert artifact.is_tech_term(word) == is_tech_term(word)
+
+    def test_abbreviations_sorted_longest_first(self, artifact_path):
+        artifact = load_dictionaries(artifact_path)
+        lengths = [len(original) for original, _ in artifact.abbreviations]
+
+        assert lengths == sorted(lengths, reverse=True)
@@ -1,5 +1,6 @@
 ﻿import pytest
 from src.services.optimization_service import OptimizationService
+from src.utils.validators import validate_config_options
 
 
 class TestLocationVariations:
@@ -110,3 +111,23 @@ class TestIntegrationScenarios:
         assert hasattr(result.stats, 'optimized_length')
         
         assert len(result.optimized_text) > 0
+
+
+class TestConfigValidation:
+
+    @pytest.mark.parametrize('config', [
+        {'word_compression': 'x'},
+        {'stop_word_removal': '0.5'},
+        {'abbreviation_level': True},
+        {'min_word_length': True},
+    ])
+    def test_non_numeric_values_rejected(self, config):
+        assert validate_config_options(config) is not None
+
+    def test_config_used_does_not_alias_the_plan(self, optimization_service):
+        plan = optimization_service.build_plan({'remove_accents': True})
+
+        result = optimization_service.optimize('Ação', None, plan=plan)
+        result.config_used['remove_accents'] = False
+
+        assert plan.config == {'remove_accents': True}
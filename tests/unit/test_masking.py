@@ -0,0 +1,49 @@
+﻿from src.services.optimization.entity_preservation_service import EntityPreservationService
+from src.services.optimization.masking import mask_entities
+from src.utils.offsets import OffsetMap
+
+
+class TestEntityMasking:
+
+    def test_mask_and_restore_round_trip(self):
+        text = 'Pague R$ 50,00 via https://exemplo.com ou R$ 50,00 em 2 dias'
+        entities = EntityPreservationService().extract_entities(text)
+        masked, mask, remaining = mask_entities(text, entities)
+
+        assert 'https://' not in masked and 'R$' not in masked
+        # Textos iguais compartilham a sentinela.
+        assert len(mask) == 2
+        assert all(len(sentinel) == 1 for sentinel in mask.originals)
+        assert mask.restore(masked) == text
+        assert all(entity.preservation_level.value != 'never' for entity in remaining)
+
+    def test_offsets_track_masked_spans(self):
+        text = 'Escreva para contato@empresa.com hoje'
+        entities = EntityPreservationService().extract_entities(text)
+        offsets = OffsetMap()
+        masked, _, _ = mask_entities(text, entities, offsets)
+
+        position = masked.index('hoje')
+        assert offsets.to_source(position) == text.index('hoje')
+
+    def test_private_use_characters_in_input_are_not_reused(self):
+        text = '\ue000 contato@empresa.com'
+        entities = EntityPreservationService().extract_entities(text)
+        masked, mask, _ = mask_entities(text, entities)
+
+        assert '\ue000' not in mask.originals
+        assert mask.restore(masked) == text
+
+    def test_pipeline_keeps_protected_entities_intact(self, optimization_service):
+        text = 'Acesse https://www.empresa.com.br/página, escreva para suporte@empresa.com.br ou pague R$ 50,00.'
+        config = {
+            'abbreviation_level': 0.9, 'remove_accents': True, 'remove_punctuation': True,
+            'stop_word_removal': 1.0, 'word_compression': 0.5
+        }
+        result = optimization_service.optimize(text, config, explain=True)
+
+        for protected in ('https://www.empresa.com.br/página', 'suporte@empresa.com.br', 'R$ 50,00'):
+            assert protected in result.optimized_text
+        assert not any('\ue000' <= char <= '\uf8ff' for char in result.optimized_text)
+        stages = {stage.stage: stage.characters_saved for stage in result.explanation.stages}
+        assert sum(stages.values()) == result.stats.characters_saved
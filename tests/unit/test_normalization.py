@@ -0,0 +1,74 @@
+﻿import re
+import string
+import unicodedata
+
+from hypothesis import given, settings, strategies as st
+
+from src.config.settings import TestingConfig
+from src.services.optimization.normalization import TextNormalizer, collapse_whitespace
+from src.utils.accents import fold_accents
+from src.utils.offsets import OffsetMap
+
+REMOVABLE_CHARS = TestingConfig.REMOVABLE_CHARS
+normalizer = TextNormalizer(REMOVABLE_CHARS)
+
+# Alfabeto com os casos delicados: acentos compostos e decompostos, pontuação
+# repetida, espaços Unicode, caracteres cujo NFD gera pontuação (U+037E) ou
+# que não têm marcas removíveis (hangul, CGJ).
+ALPHABET = (
+    string.ascii_letters + string.digits + string.punctuation
+    + ' \t\n\r\x0b\x0c\x1c\xa0\u2003\u3000'
+    + 'áàâãäçéêíóôõúüñÁÂÃÇÉÍÓÚÅåøßĳŉǅȁȴ'
+    + '\u0301\u0327\u034f\u037e\u1ec7\u212b\uac00\u0f73\U0001d165'
+)
+
+texts = st.text(alphabet=ALPHABET, max_size=60)
+
+
+def legacy_pipeline(text, remove_accents, remove_punctuation, final):
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = re.sub(r'([.!?,\-;:"])\1+', r'\1', text)
+    if final:
+        text = re.sub(r'[.,;:]+\s*$', '', text)
+    if remove_accents:
+        normalized_text = unicodedata.normalize('NFD', text)
+        text = "".join(c for c in normalized_text if unicodedata.category(c) != 'Mn')
+    if remove_punctuation:
+        text = re.sub(f'[{re.escape("".join(REMOVABLE_CHARS))}]', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def fused_pipeline(text, remove_accents, remove_punctuation, final):
+    text = normalizer.normalize_spacing(text, final=final)
+    text = normalizer.fold(text, remove_accents, remove_punctuation)
+    return collapse_whitespace(text)
+
+
+class TestFusedNormalization:
+
+    @settings(max_examples=500, deadline=None)
+    @given(texts, st.booleans(), st.booleans(), st.booleans())
+    def test_matches_legacy_pipeline(self, text, remove_accents, remove_punctuation, final):
+        assert fused_pipeline(text, remove_accents, remove_punctuation, final) == \
+            legacy_pipeline(text, remove_accents, remove_punctuation, final)
+
+    @settings(max_examples=300, deadline=None)
+    @given(texts)
+    def test_fold_accents_matches_nfd(self, text):
+        normalized_text = unicodedata.normalize('NFD', text)
+        assert fold_accents(text) == "".join(c for c in normalized_text if unicodedata.category(c) != 'Mn')
+
+    @settings(max_examples=300, deadline=None)
+    @given(texts, st.booleans(), st.booleans(), st.booleans())
+    def test_offsets_track_output_length(self, text, remove_accents, remove_punctuation, final):
+        offsets = OffsetMap()
+        result = normalizer.normalize_spacing(text, final=final, offsets=offsets)
+        result = normalizer.fold(result, remove_accents, remove_punctuation, offsets)
+        result = collapse_whitespace(result, offsets)
+
+        assert result == fused_pipeline(text, remove_accents, remove_punctuation, final)
+        assert offsets.to_current(len(text), is_end=True) == len(result)
+
+    def test_nfd_generated_punctuation_is_removed(self):
+        assert normalizer.fold('a; b', remove_accents=True, remove_punctuation=True) == 'a b'
+        assert normalizer.fold('ação!', remove_accents=True, remove_punctuation=True) == 'acao'
@@ -0,0 +1,63 @@
+﻿from hypothesis import given, settings, strategies as st
+
+from src.utils.offsets import OffsetMap, join_spans
+
+
+def simulate(source_length, stage_list):
+    """Aplica as etapas a uma lista com a posição de origem de cada caractere."""
+    chars = list(range(source_length))
+    for spans in stage_list:
+        for start, end, length in reversed(spans):
+            chars[start:end] = [None] * length
+    return chars
+
+
+class TestOffsetMap:
+
+    @settings(max_examples=400, deadline=None)
+    @given(st.integers(0, 40).flatmap(lambda n: st.tuples(st.just(n), st.data())))
+    def test_positions_follow_characters(self, args):
+        source_length, data = args
+        length = source_length
+        stage_list = []
+        for _ in range(data.draw(st.integers(1, 5))):
+            cuts = sorted(data.draw(st.lists(st.integers(0, length), max_size=8)))
+            spans = []
+            for start, end in zip(cuts[::2], cuts[1::2]):
+                if spans and start < spans[-1][1]:
+                    continue
+                spans.append((start, end, data.draw(st.integers(0, 4))))
+            stage_list.append(spans)
+            length += sum(new_length - (end - start) for start, end, new_length in spans)
+
+        offsets = OffsetMap()
+        for spans in stage_list:
+            offsets.apply(spans)
+
+        chars = simulate(source_length, stage_list)
+        assert offsets.to_current(source_length, is_end=True) == len(chars)
+        for current, source in enumerate(chars):
+            if source is None:
+                continue
+            # O trecho mapeado de cada caractere mantido o contém.
+            start, end = offsets.to_current_span(source, source + 1)
+            assert start <= current < end
+            start, end = offsets.to_source_span(current, current + 1)
+            assert start <= source < end
+
+    def test_untouched_positions_shift_linearly(self):
+        offsets = OffsetMap()
+        offsets.apply([(2, 5, 1), (10, 10, 3)])
+        offsets.apply([(0, 1, 0)])
+
+        assert offsets.to_current(8) == 8 - 2 - 1
+        assert offsets.to_source(5) == 8
+        assert offsets.to_current_span(3, 4) == (1, 2)
+        assert len(offsets) == 3
+
+    def test_join_spans(self):
+        text = '  um   dois três '
+        kept = [(2, 4), (7, 11)]
+        spans = join_spans(len(text), kept)
+        assert spans == [(0, 2, 0), (4, 7, 1), (11, len(text), 0)]
+        assert join_spans(3, []) == [(0, 3, 0)]
@@ -1,5 +1,6 @@
 ﻿import pytest
 from src.services.optimization_service import OptimizationService
+from src.utils.deadline import Deadline
 
 
 class TestOptimizationServiceCore:
@@ -62,3 +63,84 @@ class TestOptimizationServiceCore:
         assert '10' in result.optimized_text or '23' in result.optimized_text
         
         assert result.stats.compression_ratio_percent >= 0
+    
+    def test_entities_keep_positions_after_earlier_edits(self, optimization_service):
+        # As abreviações e a limpeza de espaços encurtam o texto antes do
+        # e-mail; a compressão precisa encontrá-lo na posição atual.
+        text = "Depois   do desenvolvimento da aplicação em São Paulo, escreva para atendimento@empresa.com hoje"
+        config = {'abbreviation_level': 0.9, 'word_compression': 0.5}
+        result = optimization_service.optimize(text, config)
+        
+        assert 'atendimento@' in result.optimized_text
+        
+        unprotected = optimization_service.optimize(text, {**config, 'preserve_entities': False})
+        assert 'atendimento@' not in unprotected.optimized_text
+
+
+class TestOptimizationStream:
+    
+    def test_stream_matches_full_text(self, optimization_service):
+        text = "O sistema custa R$ 20 por mês em São Paulo, segundo o relatório.\n\n" * 40
+        chunks = [text[i:i + 50] for i in range(0, len(text), 50)]
+        config = {'remove_accents': True, 'word_compression': 0.6}
+        
+        streamed = ''.join(optimization_service.optimize_stream(chunks, config, window_size=200))
+        
+        assert streamed == optimization_service.optimize(text, config).optimized_text
+    
+    def test_stream_does_not_cut_inside_multiword_location(self, optimization_service):
+        text = "palavra " * 20 + "em São Paulo hoje"
+        window_size = text.index('Paulo') + 2
+        
+        streamed = ''.join(optimization_service.optimize_stream([text], {}, window_size=window_size))
+        
+        assert streamed.endswith('em SP hoje')
+    
+    def test_stream_strips_trailing_punctuation_only_at_end(self, optimization_service):
+        text = "Primeiro parágrafo termina aqui.\n\nSegundo parágrafo termina aqui.\n\n\n"
+        
+        streamed = ''.join(optimization_service.optimize_stream([text], {'abbreviation_level': 0}, window_size=20))
+        
+        assert streamed == "Primeiro parágrafo termina aqui. Segundo parágrafo termina aqui"
+    
+    def test_stream_empty_input(self, optimization_service):
+        assert list(optimization_service.optimize_stream(iter(()), {})) == []
+
+
+class TestDeadlinePropagation:
+    
+    TEXT = "Acesse https://exemplo.com/Relatório para ver o relatório de aproximadamente 10 páginas."
+    CONFIG = {
+        'remove_accents': True,
+        'stop_word_removal': 0.5,
+        'word_compression': 0.6,
+        'translate_to_english': True,
+        'translation_backend': 'glossary'
+    }
+    
+    def test_expired_deadline_runs_only_normalization(self, optimization_service):
+        deadline = Deadline(expires_at=0.0, clock=lambda: 1.0)
+        
+        result = optimization_service.optimize(self.TEXT, self.CONFIG, deadline=deadline)
+        
+        assert result.partial
+        assert result.skipped_stages == [
+            'entities', 'abbreviations', 'translation', 'stop_words', 'word_compression'
+        ]
+        assert result.optimized_text == "Acesse https://exemplo.com/Relatorio para ver o relatorio de aproximadamente 10 paginas"
+    
+    def test_ample_deadline_matches_unbounded_result(self, optimization_service):
+        result = optimization_service.optimize(self.TEXT, self.CONFIG, deadline=Deadline.after_ms(60000))
+        
+        assert not result.partial and result.skipped_stages == []
+        assert result.optimized_text == optimization_service.optimize(self.TEXT, self.CONFIG).optimized_text
+        assert optimization_service.optimize(self.TEXT, self.CONFIG).skipped_stages is None
+    
+    def test_remote_translation_needs_reserve(self, optimization_service):
+        deadline = Deadline(expires_at=0.1, clock=lambda: 0.0)
+        config = {**self.CONFIG, 'translation_backend': 'remote'}
+        
+        result = optimization_service.optimize(self.TEXT, config, deadline=deadline)
+        
+        assert result.skipped_stages == ['translation']
+        assert 'https://exemplo.com/Relatório' in result.optimized_text
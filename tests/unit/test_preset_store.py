@@ -0,0 +1,59 @@
+﻿import pytest
+
+from src.services.preset_store import PresetStore
+
+
+class TestPresetStore:
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        return str(tmp_path / 'presets.sqlite3')
+
+    @pytest.fixture
+    def store(self, db_path, optimization_service):
+        store = PresetStore(db_path, optimization_service.build_plan, refresh_interval=0)
+        yield store
+        store.close()
+
+    def test_create_compiles_plan(self, store):
+        preset = store.create('acme', 'faturas', 'Resumo', {'word_compression': 0.7, 'remove_accents': True})
+
+        stored = store.get('acme', preset.id)
+        assert stored.plan.word_compression == 0.7
+        assert stored.plan.remove_accents is True
+        assert stored.plan.abbreviation_level == 0.5
+
+    def test_presets_are_tenant_scoped(self, store):
+        preset = store.create('acme', 'faturas', '', {})
+
+        assert store.get('outro', preset.id) is None
+        assert store.list('outro') == []
+        assert [p.name for p in store.list('acme')] == ['faturas']
+
+    def test_invalid_config_is_rejected_on_write(self, store):
+        with pytest.raises(ValueError):
+            store.create('acme', 'ruim', '', {'word_compression': 3})
+
+    def test_duplicate_name_is_rejected(self, store):
+        store.create('acme', 'faturas', '', {})
+
+        with pytest.raises(ValueError):
+            store.create('acme', 'faturas', '', {})
+
+    def test_update_and_delete(self, store):
+        preset = store.create('acme', 'faturas', '', {'stop_word_removal': 0.1})
+
+        updated = store.update('acme', preset.id, config={'stop_word_removal': 0.4})
+        assert updated.plan.stop_word_removal == 0.4
+
+        assert store.delete('acme', preset.id)
+        assert store.get('acme', preset.id) is None
+
+    def test_sees_writes_from_other_workers(self, store, db_path, optimization_service):
+        other_worker = PresetStore(db_path, optimization_service.build_plan, refresh_interval=0)
+        assert store.list('acme') == []
+
+        preset = other_worker.create('acme', 'faturas', '', {'word_compression': 0.8})
+        other_worker.close()
+
+        assert store.get('acme', preset.id).plan.word_compression == 0.8
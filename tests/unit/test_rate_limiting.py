@@ -0,0 +1,104 @@
+﻿import sqlite3
+
+from src.services.admission import ClientRateLimiter, SQLiteBucketStore
+from src.services.translation.scheduler import ProviderScheduler
+from src.utils.rate_limiting import TokenBucket
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket:
+
+    def test_try_acquire_reports_wait_without_taking(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+
+        assert bucket.try_acquire() == 0 and bucket.try_acquire() == 0
+        assert bucket.try_acquire() == 0.5
+        clock.now = 0.5
+        assert bucket.try_acquire() == 0
+
+    def test_reservations_queue_in_arrival_order(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=1, clock=clock)
+
+        delays = [bucket.reserve(1, max_wait=1) for _ in range(4)]
+        assert [round(delay, 6) for delay in delays] == [0, 0.1, 0.2, 0.3]
+        assert bucket.reserve(10, max_wait=0.5) is None
+        # A recusa não consome fichas.
+        assert round(bucket.reserve(1, max_wait=1), 6) == 0.4
+
+
+class TestProviderScheduler:
+
+    def test_rejects_when_wait_exceeds_limit_and_refunds(self):
+        clock = FakeClock()
+        scheduler = ProviderScheduler(
+            requests_per_second=1, burst=1, chars_per_day=86400, max_wait=0.5,
+            clock=clock, sleep=clock.sleep
+        )
+
+        assert scheduler.acquire(100)
+        # Requisições por segundo esgotadas: recusa sem gastar caracteres.
+        assert not scheduler.acquire(100)
+        assert scheduler.char_bucket.tokens == 86300
+
+        clock.now = 0.6
+        assert scheduler.acquire(100)
+        assert clock.now == 1.0
+        stats = scheduler.stats()
+        assert stats['admitted'] == 2 and stats['rejected'] == 1
+        assert stats['delayed'] == 1 and round(stats['average_wait'], 6) == 0.4
+
+
+class TestClientRateLimiter:
+
+    def test_fails_open_when_database_is_locked(self, tmp_path):
+        db_path = str(tmp_path / 'limits.sqlite3')
+        limiter = ClientRateLimiter(rate=1, burst=1, store=SQLiteBucketStore(db_path, timeout=0.05), api_keys=['a'])
+        key = limiter.client_key('a', '10.0.0.1')
+        assert limiter.check(key) == 0
+
+        other = sqlite3.connect(db_path, isolation_level=None)
+        other.execute('BEGIN IMMEDIATE')
+        try:
+            assert limiter.check(key) == 0
+        finally:
+            other.execute('ROLLBACK')
+            other.close()
+
+        assert limiter.stats()['store_failures'] == 1
+        assert limiter.check(key) > 0
+
+    def test_sqlite_store_prunes_refilled_buckets(self, tmp_path):
+        clock = FakeClock()
+        store = SQLiteBucketStore(str(tmp_path / 'limits.sqlite3'), prune_every=3, clock=clock)
+        store.take('antigo', rate=1, capacity=2)
+        clock.now = 1.0
+        store.take('recente', rate=1, capacity=2)
+
+        # No terceiro registro, 'antigo' está parado há mais de capacity / rate.
+        clock.now = 2.5
+        store.take('novo', rate=1, capacity=2)
+
+        keys = {row[0] for row in store._connect().execute('SELECT key FROM rate_limits')}
+        assert keys == {'recente', 'novo'}
+        assert store.pruned == 1
+        store.close()
+
+    def test_unknown_keys_use_the_ip(self):
+        limiter = ClientRateLimiter(rate=1, burst=1, store=None, api_keys=['a'])
+
+        assert limiter.client_key('x', '10.0.0.1') == limiter.client_key('y', '10.0.0.1')
+        assert limiter.client_key('x', '10.0.0.1') == limiter.client_key(None, '10.0.0.1')
+        assert limiter.client_key('a', '10.0.0.1') != limiter.client_key(None, '10.0.0.1')
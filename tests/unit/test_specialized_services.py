@@ -1,5 +1,8 @@
 ﻿import pytest
-from src.services.optimization.abbreviation_service import AbbreviationService
+from src.data.numbers import NumberPreservationService
+from src.services.optimization.abbreviation_service import (
+    AbbreviationMatcher, AbbreviationService, quantize_aggressiveness
+)
 from src.services.optimization.entity_preservation_service import EntityPreservationService
 
 
@@ -38,6 +41,60 @@ class TestAbbreviationService:
         assert "km" in result_text
         assert "kg" in result_text
 
+    @pytest.mark.parametrize("aggressiveness", [0.0, 0.3, 0.5, 0.53, 0.6, 0.8, 0.9, 1.0])
+    def test_active_matcher_match_should_abbreviate(self, service, aggressiveness):
+        level = quantize_aggressiveness(aggressiveness)
+        expected = {
+            original.lower() for original, abbrev in service.dictionaries.abbreviations
+            if service._should_abbreviate(original, abbrev, level)
+        }
+        matcher = service.active_matcher(aggressiveness, preserve_context=False)
+        assert set(matcher.entries) == expected
+        assert service.active_matcher(level, preserve_context=False) is matcher
+
+    def test_active_matcher_cache_is_keyed_by_level(self, service):
+        matcher = service.active_matcher(0.51, preserve_context=False)
+        assert service.active_matcher(0.5312345, preserve_context=False) is matcher
+        assert service.active_matcher(0.55, preserve_context=False) is matcher
+        assert service.active_matcher(0.56, preserve_context=False) is not matcher
+        for step in range(1000):
+            service.active_matcher(step / 1000, preserve_context=step % 2 == 0)
+        assert len(service._active_matchers) <= 42
+
+    def test_rejected_entry_gives_way_to_shorter_one(self, service):
+        matcher = AbbreviationMatcher([('banco de dados', 'banco dados'), ('banco', 'b')])
+        # "banco de dados" economiza pouco para a agressividade; "banco" passa.
+        result = service._apply_matcher('o banco de dados', matcher, 0.3, preserve_context=False)
+        assert result == 'o b de dados'
+
+    def test_replacement_source_offsets_point_to_input(self, service):
+        text = "Viajei de São Paulo para Rio de Janeiro com JavaScript e o desenvolvimento da aplicação"
+        result_text, replacements = service.apply_abbreviations(text, 0.9, preserve_context=False)
+        
+        assert len(replacements) >= 4
+        for replacement in replacements:
+            assert text[replacement.source_start:replacement.source_end] == replacement.original
+
+    def test_nested_replacement_maps_to_whole_source_span(self, service):
+        text = "Moro na cidade de São Paulo desde 2010"
+        matcher = AbbreviationMatcher([('cidade de São Paulo', 'São Paulo')])
+        result_text, replacements = service.apply_abbreviations(
+            text, 0.9, preserve_context=False, extra_matchers=[matcher]
+        )
+        
+        assert result_text == "Moro na SP desde 2010"
+        location = replacements[-1]
+        assert location.replacement == 'SP'
+        assert text[location.source_start:location.source_end] == 'cidade de São Paulo'
+
+    def test_collect_false_skips_records(self, service):
+        text = "Viajei de São Paulo com JavaScript"
+        collected, replacements = service.apply_abbreviations(text)
+        result_text, no_replacements = service.apply_abbreviations(text, collect=False)
+        
+        assert result_text == collected
+        assert replacements and no_replacements == []
+
 
 class TestEntityPreservationService:
     
@@ -67,3 +124,25 @@ class TestEntityPreservationService:
         should_preserve, ratio = service.should_preserve_word("Python", 0, entities)
         assert isinstance(should_preserve, bool)
         assert ratio is None or isinstance(ratio, float)
+
+
+class TestNumberPreservationService:
+
+    @pytest.fixture
+    def service(self):
+        return NumberPreservationService()
+
+    def test_token_reasons(self, service):
+        assert service.is_important_number("v2.1") == (True, "contains_digits")
+        assert service.is_important_number("GB,") == (True, "measurement_unit")
+        assert service.is_important_number("relatório") == (False, "no_importance_indicators")
+
+    def test_context_keywords_with_position(self, service):
+        text = "o preço ficou alto demais"
+        assert service.is_important_number(text, position=3) == (True, "context_financial")
+        assert service.is_important_number(text) == (False, "no_importance_indicators")
+
+    def test_custom_patterns_are_evaluated(self):
+        service = NumberPreservationService([r'\bdúzia\b', r'\bmilhar(?:es)?\b'])
+        assert service.is_important_number("Milhares") == (True, "matched_pattern")
+        assert service.is_important_number("centena") == (False, "no_importance_indicators")
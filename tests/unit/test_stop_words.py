@@ -0,0 +1,55 @@
+﻿from src.config.settings import TestingConfig
+from src.services.optimization_service import OptimizationService
+from src.services.optimization.stop_words import StopWordFilter, fold_word, select_evenly
+from src.utils.offsets import OffsetMap
+
+
+class TestStopWordFilter:
+
+    def test_fold_word_ignores_case_accents_and_punctuation(self):
+        assert fold_word('Então,') == 'entao'
+        assert fold_word('JÁ') == 'ja'
+        assert fold_word('"the"') == 'the'
+
+    def test_accent_variants_are_matched(self):
+        stop_words = StopWordFilter({'então', 'já'})
+
+        assert stop_words.remove('ENTAO ele ja saiu, Já!', 1.0) == 'ele saiu,'
+
+    def test_select_evenly_keeps_exact_count(self):
+        for count in range(1, 30):
+            for ratio in (0.1, 0.3, 0.5, 0.75, 1.0):
+                selected = select_evenly(count, ratio)
+                assert len(selected) == int(count * ratio)
+                assert selected == sorted(set(selected))
+
+    def test_removals_are_spread_across_text(self):
+        stop_words = StopWordFilter({'de'})
+        text = ' '.join(['de', 'x'] * 10)
+
+        result = stop_words.remove(text, 0.5).split()
+
+        assert result.count('de') == 5
+        # Antes as remoções vinham todas do início do texto.
+        assert result[:2] == ['de', 'x']
+        assert result[-2:] == ['x', 'x']
+
+    def test_removal_records_offsets(self):
+        text = 'o gato e o cachorro'
+        offsets = OffsetMap()
+        result = StopWordFilter(['o', 'e']).remove(text, 1.0, offsets)
+
+        assert result == 'gato cachorro'
+        assert offsets.to_current_span(11, 19) == (5, 13)
+        assert offsets.to_current(len(text), is_end=True) == len(result)
+
+    def test_external_stop_word_list(self, tmp_path):
+        (tmp_path / 'pt.txt').write_text('# lista do domínio\nportanto\nlogo\n', encoding='utf-8')
+
+        class ExternalStopWordsConfig(TestingConfig):
+            STOP_WORDS_DIR = str(tmp_path)
+
+        service = OptimizationService(ExternalStopWordsConfig())
+
+        assert service.remove_stop_words('Portanto o caso, logo encerrado', 'pt', 1.0) == 'caso, encerrado'
+        assert len(service.stop_word_filter('pt')) == len(TestingConfig.STOP_WORDS['pt']) + 2
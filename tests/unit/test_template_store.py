@@ -0,0 +1,107 @@
+﻿import pytest
+
+from src.services.preset_store import PresetStore
+from src.services.template_store import TemplateStore, parse_template
+
+
+class TestParseTemplate:
+
+    def test_literals_surround_slots(self):
+        literals, slots = parse_template('Olá {nome}, {{literal}} {nome} e {pedido}')
+
+        assert slots == ['nome', 'nome', 'pedido']
+        assert literals == ['Olá ', ', {literal} ', ' e ', '']
+
+    @pytest.mark.parametrize('template', ['Sem placeholders', 'Olá {}', 'Olá {0}', 'Olá {nome!r}', 'Olá {nome', ''])
+    def test_invalid_templates(self, template):
+        with pytest.raises(ValueError):
+            parse_template(template)
+
+
+class TestTemplateRendering:
+
+    @pytest.fixture
+    def store(self, optimization_service):
+        store = TemplateStore(':memory:', optimization_service.build_plan, refresh_interval=0)
+        yield store
+        store.close()
+
+    def test_static_parts_are_compiled_once(self, store, optimization_service, monkeypatch):
+        template = store.create('acme', 'suporte', 'Você é o atendente da {empresa}. Pergunta: {pergunta}.', {
+            'remove_accents': True,
+            'abbreviation_level': 0
+        })
+        pipeline_inputs = []
+        run_pipeline = optimization_service._run_pipeline
+        monkeypatch.setattr(
+            optimization_service, '_run_pipeline',
+            lambda text, *args, **kwargs: pipeline_inputs.append(text) or run_pipeline(text, *args, **kwargs)
+        )
+
+        first = optimization_service.render_template(template, {'empresa': 'Ação', 'pergunta': 'Preço'}, 'acme')
+        second = optimization_service.render_template(template, {'empresa': 'Ótica', 'pergunta': 'Horário'}, 'acme')
+
+        assert first.optimized_text == 'Voce e o atendente da Acao. Pergunta: Preco'
+        assert second.optimized_text == 'Voce e o atendente da Otica. Pergunta: Horario'
+        # Depois da compilação, só os valores passam pelo pipeline.
+        assert pipeline_inputs[-2:] == ['Ótica', 'Horário']
+        assert len(pipeline_inputs) == 3 + 4
+        filled = optimization_service.optimize('Você é o atendente da Ação. Pergunta: Preço.', template.config)
+        assert first.optimized_text == filled.optimized_text
+        assert first.stats.original_length == len('Você é o atendente da Ação. Pergunta: Preço.')
+
+    def test_missing_and_invalid_values(self, store, optimization_service):
+        template = store.create('acme', 'saudacao', 'Olá {nome}', {})
+
+        with pytest.raises(ValueError):
+            optimization_service.render_template(template, {}, 'acme')
+        with pytest.raises(ValueError):
+            optimization_service.render_template(template, {'nome': 42}, 'acme')
+
+    def test_remote_translation_failure_is_not_cached(self, store, optimization_service):
+        template = store.create('acme', 'remoto', 'Você é o assistente. Pergunta: {pergunta}', {
+            'translate_to_english': True,
+            'translation_backend': 'remote',
+            'abbreviation_level': 0
+        })
+        healthy = []
+        translation = optimization_service.translation_service
+        translation._remote = type('Remote', (), {
+            'translate': lambda self, text: f'TRANSLATED({text})' if healthy else None
+        })()
+
+        failed = optimization_service.render_template(template, {'pergunta': 'Preço'}, 'acme')
+        healthy.append(True)
+        recovered = optimization_service.render_template(template, {'pergunta': 'Preço'}, 'acme')
+
+        assert 'Você é o assistente' in failed.optimized_text
+        assert template.compiled is None
+        assert recovered.optimized_text == 'TRANSLATED(Você é o assistente. Pergunta:) TRANSLATED(Preço)'
+
+
+class TestTemplateStore:
+
+    def test_shares_database_with_presets(self, tmp_path, optimization_service):
+        db_path = str(tmp_path / 'presets.sqlite3')
+        presets = PresetStore(db_path, optimization_service.build_plan, refresh_interval=0)
+        templates = TemplateStore(db_path, optimization_service.build_plan, refresh_interval=0)
+        other_worker = TemplateStore(db_path, optimization_service.build_plan, refresh_interval=0)
+
+        preset = presets.create('acme', 'suporte', '', {'word_compression': 0.8})
+        template = other_worker.create('acme', 'suporte', 'Olá {nome}', {'remove_accents': True})
+        other_worker.close()
+
+        assert presets.get('acme', preset.id).plan.word_compression == 0.8
+        stored = templates.get('acme', template.id)
+        assert stored.slots == ['nome']
+        assert stored.plan.remove_accents is True
+        with pytest.raises(ValueError, match='modelo'):
+            templates.create('acme', 'suporte', 'Oi {nome}', {})
+
+        updated = templates.update('acme', template.id, template='Oi {cliente}')
+        assert updated.slots == ['cliente']
+        assert templates.delete('acme', template.id)
+        assert templates.list('acme') == []
+        assert [p.name for p in presets.list('acme')] == ['suporte']
+        presets.close()
+        templates.close()
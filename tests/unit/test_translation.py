@@ -0,0 +1,355 @@
+﻿import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from src.config.settings import Config
+from src.services.translation import CountMinSketch, GlossaryTranslator, HotSegments, TranslationCache, split_chunks
+from src.data.glossary import get_pt_en_glossary
+from src.services.optimization_service import OptimizationService
+from src.services.translation.remote import RemoteTranslator
+from src.services.translation_service import TranslationService
+from src.utils.deadline import Deadline
+from src.utils.validators import validate_config_options
+
+
+class TestSplitChunks:
+
+    def test_chunks_rejoin_to_original(self):
+        text = 'Primeira frase. Segunda frase!  Terceira sem ponto\nQuarta? ' + 'palavra ' * 40
+        chunks = split_chunks(text, 60)
+
+        assert ''.join(chunks) == text
+        assert all(len(chunk) <= 60 for chunk in chunks)
+
+    def test_sentences_are_grouped_up_to_limit(self):
+        assert split_chunks('Um. Dois. Três.', 100) == ['Um. Dois. Três.']
+        assert split_chunks('Um. Dois. Três.', 10) == ['Um. Dois. ', 'Três.']
+
+
+class TestGlossaryTranslator:
+
+    def test_longest_phrase_wins_and_case_is_kept(self):
+        translator = GlossaryTranslator({'por favor': 'please', 'por': 'by', 'empresa': 'company'})
+
+        assert translator.translate('Por favor, a EMPRESA por aqui') == 'Please, a COMPANY by aqui'
+
+    def test_builtin_glossary_translates_offline(self):
+        service = TranslationService(Config())
+        translated = service.translate_to_english('O sistema está lento hoje.', 'glossary')
+
+        assert translated == 'The system is slow today.'
+        assert service._remote is None
+
+    @pytest.mark.parametrize('text, expected', [
+        ('Enviar o e-mail', 'Send the e-mail'),
+        ('Contrato da ACME S.A. hoje', 'Contract of the ACME S.A. today'),
+        ('Tome vitamina A hoje', 'Tome vitamina A today'),
+        ('Abra C:/dados/a/o agora', 'Abra C:/dados/a/o now'),
+        ('A empresa. O sistema: a casa', 'The company. The system: the casa'),
+    ])
+    def test_letters_inside_tokens_and_names_are_kept(self, text, expected):
+        translator = GlossaryTranslator(get_pt_en_glossary())
+
+        assert translator.translate(text) == expected
+
+    def test_optimize_keeps_tokens_with_glossary_backend(self):
+        service = OptimizationService(Config())
+        config = {'translate_to_english': True, 'translation_backend': 'glossary', 'abbreviation_level': 0}
+
+        for text in ('e-mail', 'vitamina A', 'C:/dados/a/o'):
+            assert service.optimize(text, config).optimized_text == text
+
+
+class TestTranslationService:
+
+    def test_chunks_are_cached_per_backend(self):
+        service = TranslationService(Config())
+        calls = []
+        service._remote = type('Remote', (), {'translate': lambda self, text: calls.append(text) or text.upper()})()
+
+        assert service.translate_to_english('olá mundo') == 'OLÁ MUNDO'
+        assert service.translate_to_english('olá mundo') == 'OLÁ MUNDO'
+        assert calls == ['olá mundo']
+        assert service.cache.stats()['hits'] == 1
+
+    def test_remote_failure_returns_original_text(self):
+        service = TranslationService(Config())
+        service._remote = type('Remote', (), {'translate': lambda self, text: None})()
+
+        assert service.translate_to_english('texto original') == 'texto original'
+        assert len(service.cache) == 0
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            TranslationService(Config()).translate_to_english('texto', 'local-model')
+        assert validate_config_options({'translation_backend': 'local-model'}) is not None
+        assert validate_config_options({'translation_backend': 'glossary'}) is None
+
+
+class TestTranslationCache:
+
+    def test_expired_and_evicted_entries(self):
+        cache = TranslationCache(max_entries=2, ttl=0)
+        cache.put('a', 'A')
+        assert cache.get('a') is None
+
+        cache = TranslationCache(max_entries=2, ttl=60)
+        for key in 'abc':
+            cache.put(key, key.upper())
+        assert cache.get('a') is None and cache.get('c') == 'C'
+
+
+class TestHotSegments:
+
+    def test_sketch_never_underestimates(self):
+        sketch = CountMinSketch(width=64, depth=4)
+        counts = {f'trecho {i}': i % 7 + 1 for i in range(200)}
+        for key, count in counts.items():
+            for _ in range(count):
+                sketch.add(key)
+
+        assert all(sketch.estimate(key) >= count for key, count in counts.items())
+        assert sketch.memory_bytes == 64 * 4 * 4
+        sketch.decay()
+        assert sketch.total == sum(counts.values()) // 2
+
+    def test_heavy_hitters_survive_long_tail(self):
+        hot = HotSegments(width=512, depth=4, top_k=4, decay_every=0)
+        for i in range(600):
+            hot.record(('remote', f'frase rara {i}'))
+            if i % 10 == 0:
+                for key in ('sistema', 'modelo', 'saudação'):
+                    hot.record(('remote', key))
+
+        hottest = [key for (_, key), _ in hot.hottest()[:3]]
+        assert sorted(hottest) == ['modelo', 'saudação', 'sistema']
+        assert hot.stats()['tracked'] == 4
+
+    def test_prewarm_refreshes_hot_segments_before_expiry(self):
+        config = Config()
+        config.TRANSLATION_PREWARM_INTERVAL = 0
+        config.TRANSLATION_PREWARM_MIN_COUNT = 2
+        # Toda entrada já está dentro da janela de renovação.
+        config.TRANSLATION_PREWARM_AHEAD = config.TRANSLATION_CACHE_TTL + 1
+        service = TranslationService(config)
+        calls = []
+        service._remote = type('Remote', (), {'translate': lambda self, text: calls.append(text) or text.upper()})()
+
+        for _ in range(3):
+            service.translate_to_english('prompt de sistema')
+        service.translate_to_english('pergunta única')
+        assert calls == ['prompt de sistema', 'pergunta única']
+
+        assert service.prewarmer.run_once() == 1
+        assert calls[-1] == 'prompt de sistema'
+        assert service.translate_to_english('prompt de sistema') == 'PROMPT DE SISTEMA'
+
+        stats = service.prewarmer.stats()
+        assert stats['refreshed'] == 1 and stats['prewarmed_hits'] == 1
+        assert stats['hot_hit_rate'] == 0.6 and not stats['running']
+        sketch_bytes = service.hot_segments.stats()['memory_bytes']
+        assert sketch_bytes == config.TRANSLATION_SKETCH_WIDTH * config.TRANSLATION_SKETCH_DEPTH * 4
+
+    def test_only_remote_segments_are_tracked_and_prewarm_is_opt_in(self):
+        service = TranslationService(Config())
+
+        for _ in range(3):
+            service.translate_to_english('O sistema está lento hoje.', 'glossary')
+
+        assert service.hot_segments.records == 0
+        assert not service.prewarmer.stats()['running']
+        assert not OptimizationService(Config()).translation_service.prewarmer.stats()['running']
+
+    def test_idle_segments_stop_being_refreshed(self):
+        now = [0.0]
+        hot = HotSegments(width=64, depth=4, top_k=4, decay_every=0, max_idle=60, clock=lambda: now[0])
+        for _ in range(5):
+            hot.record(('remote', 'prompt antigo'))
+        now[0] = 50
+        hot.record(('remote', 'prompt atual'))
+
+        now[0] = 100
+        assert hot.drop_idle() == 1
+        assert [key for (_, key), _ in hot.hottest()] == ['prompt atual']
+
+
+class FakeProvider(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Respostas na ordem em que as requisições chegam: (status, corpo). Sem
+    # respostas programadas o provedor devolve o texto em maiúsculas.
+    scripted = []
+    received = []
+    # Intervalo mínimo (s) entre requisições; abaixo dele responde 429.
+    min_interval = 0.0
+    last_request = 0.0
+    throttled = 0
+    # Atraso (s) antes de cada resposta.
+    delay = 0.0
+    lock = threading.Lock()
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        with FakeProvider.lock:
+            FakeProvider.received.append((self.command, self.path, body))
+            now = time.monotonic()
+            too_soon = now - FakeProvider.last_request < FakeProvider.min_interval
+            FakeProvider.last_request = now
+        time.sleep(FakeProvider.delay)
+        if too_soon:
+            FakeProvider.throttled += 1
+            status, response = 429, {}
+        elif FakeProvider.scripted:
+            status, response = FakeProvider.scripted.pop(0)
+        else:
+            status, response = 200, self._translate(body)
+        payload = json.dumps(response).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _translate(self, body):
+        if self.command == 'GET':
+            text = parse_qs(urlsplit(self.path).query).get('q', [''])[0]
+            return {'responseStatus': 200, 'responseData': {'translatedText': text.upper()}}
+        if self.command == 'POST':
+            q = body['q']
+            return {'translatedText': [item.upper() for item in q] if isinstance(q, list) else q.upper()}
+        return {}
+
+    do_GET = do_POST = do_HEAD = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def provider_config():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeProvider)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    FakeProvider.scripted, FakeProvider.received = [], []
+    FakeProvider.min_interval, FakeProvider.last_request, FakeProvider.throttled = 0.0, 0.0, 0
+    FakeProvider.delay = 0.0
+
+    config = Config()
+    base = f'http://127.0.0.1:{server.server_port}'
+    config.MYMEMORY_API_URL = f'{base}/get'
+    config.LIBRETRANSLATE_API_URL = f'{base}/translate'
+    config.TRANSLATION_BACKOFF_FACTOR = 0
+    config.TRANSLATION_POOL_SIZES = {'mymemory': 2, 'libretranslate': 1}
+    config.TRANSLATION_RATE_LIMITS = {
+        provider: {'requests_per_second': 0, 'burst': 1, 'chars_per_day': 0}
+        for provider in ('mymemory', 'libretranslate')
+    }
+    yield config
+    server.shutdown()
+    server.server_close()
+
+
+class TestRemoteTranslator:
+
+    def test_get_is_retried_on_transient_status(self, provider_config):
+        FakeProvider.scripted = [
+            (503, {}),
+            (200, {'responseStatus': 200, 'responseData': {'translatedText': 'hello'}})
+        ]
+        translator = RemoteTranslator(provider_config)
+
+        assert translator.translate('olá') == 'hello'
+        assert [method for method, _, _ in FakeProvider.received] == ['GET', 'GET']
+        stats = translator.stats()['mymemory']
+        assert stats['requests'] == 1 and stats['failures'] == 0
+        assert stats['in_flight'] == 0 and stats['peak_utilization'] == 0.5
+        assert stats['connections_opened'] == 1
+
+    def test_post_fallback_is_not_retried(self, provider_config):
+        FakeProvider.scripted = [(500, {})] * 3 + [(503, {}), (200, {'translatedText': 'late'})]
+        translator = RemoteTranslator(provider_config)
+
+        assert translator.translate('olá') is None
+        assert [method for method, _, _ in FakeProvider.received] == ['GET'] * 3 + ['POST']
+        assert translator.stats()['libretranslate']['failures'] == 1
+
+    def test_deadline_caps_timeout_without_retry_or_fallback(self, provider_config):
+        FakeProvider.delay = 0.5
+        translator = RemoteTranslator(provider_config)
+
+        started = time.monotonic()
+        assert translator.translate('olá', Deadline.after_ms(150)) is None
+        assert time.monotonic() - started < 0.45
+        assert [method for method, _, _ in FakeProvider.received] == ['GET']
+
+    def test_warmup_keeps_connection_in_pool(self, provider_config):
+        translator = RemoteTranslator(provider_config)
+
+        assert translator.warmup() == {'mymemory': True, 'libretranslate': True}
+        FakeProvider.scripted = [(200, {'responseStatus': 200, 'responseData': {'translatedText': 'hi'}})]
+        assert translator.translate('oi') == 'hi'
+        assert translator.stats()['mymemory']['connections_opened'] == 1
+
+
+class TestTranslationScheduler:
+
+    def test_bursts_respect_provider_rate_limit(self, provider_config):
+        FakeProvider.min_interval = 0.02
+        provider_config.TRANSLATION_RETRIES = 0
+        provider_config.TRANSLATION_RATE_LIMITS['mymemory'] = {
+            'requests_per_second': 20, 'burst': 1, 'chars_per_day': 0
+        }
+        translator = RemoteTranslator(provider_config)
+
+        texts = [f'texto {i}' for i in range(8)]
+        results = {}
+        threads = [threading.Thread(target=lambda t=t: results.update({t: translator.translate(t)})) for t in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {t: t.upper() for t in texts}
+        assert FakeProvider.throttled == 0
+        scheduler = translator.stats()['mymemory']['scheduler']
+        assert scheduler['admitted'] == 8 and scheduler['rejected'] == 0
+        assert scheduler['delayed'] >= 6 and scheduler['peak_queue_depth'] >= 1
+        assert scheduler['queue_depth'] == 0
+
+    def test_over_quota_calls_skip_the_provider(self, provider_config):
+        provider_config.TRANSLATION_MAX_QUEUE_WAIT = 0.05
+        provider_config.TRANSLATION_RATE_LIMITS['mymemory'] = {
+            'requests_per_second': 0, 'burst': 1, 'chars_per_day': 10
+        }
+        translator = RemoteTranslator(provider_config)
+
+        assert translator.translate('olá mundo') == 'OLÁ MUNDO'
+        # A cota do dia acabou: a segunda chamada vai direto para o fallback.
+        assert translator.translate('bom dia') == 'BOM DIA'
+        assert [method for method, _, _ in FakeProvider.received] == ['GET', 'POST']
+        assert translator.stats()['mymemory']['scheduler']['rejected'] == 1
+
+    def test_concurrent_fallbacks_share_one_call(self, provider_config):
+        provider_config.TRANSLATION_BATCH_WINDOW = 0.5
+        provider_config.TRANSLATION_BATCH_MAX_ITEMS = 4
+        provider_config.TRANSLATION_RATE_LIMITS['mymemory'] = {
+            'requests_per_second': 0, 'burst': 1, 'chars_per_day': 1
+        }
+        translator = RemoteTranslator(provider_config)
+
+        texts = ['um', 'dois', 'três', 'quatro']
+        results = {}
+        threads = [threading.Thread(target=lambda t=t: results.update({t: translator.translate(t)})) for t in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {t: t.upper() for t in texts}
+        assert len(FakeProvider.received) == 1
+        method, _, body = FakeProvider.received[0]
+        assert method == 'POST' and sorted(body['q']) == sorted(texts)
+        assert translator.stats()['libretranslate']['batching']['average_batch_size'] == 4